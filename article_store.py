@@ -0,0 +1,252 @@
+"""
+Persistent, indexed store of processed articles (SQLite).
+
+Every summarized article is kept with its title, topic, publish time, summary,
+BREAKING flag and zlib-compressed extracted text. The ingest daemon fills it
+between digests; a digest run processes only the window's articles that are
+missing and then assembles its sections with one indexed range query:
+
+    with ArticleStore() as store:
+        items = store.query_window(window_start, window_end, topics=list(TOPICS), per_topic=5)
+        week = store.query_days(7, now_local)   # multi-day digests, nothing re-fetched
+
+Entries without a publish date are placed at the time they were first stored.
+"""
+
+from datetime import datetime, timedelta
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+import zlib
+
+from config import ARTICLE_STORE_PATH, ARTICLE_STORE_RETENTION_DAYS, LOCAL_TZ
+
+# Outcomes worth keeping; errors and too-short extractions are retried next time
+STORED_STATUSES = ("summarized", "cached", "duplicate", "fallback")
+# Stored so the digest can show them, but processed again by the next run / ingest pass
+REPROCESS_STATUSES = ("fallback",)
+
+# Time an article belongs to for window queries (indexed expression)
+_WHEN = "COALESCE(published_ts, ingested_at)"
+
+_COLUMNS = (
+    "url", "topic", "title", "published_ts", "is_breaking", "summary", "status", "duplicate_of", "text", "ingested_at",
+)
+
+
+def _compress(text: str | None) -> bytes | None:
+    return zlib.compress(text.encode("utf-8"), 6) if text else None
+
+
+def _decompress(blob: bytes | None) -> str:
+    return zlib.decompress(blob).decode("utf-8") if blob else ""
+
+
+class ArticleStore:
+    def __init__(self, path: str = ARTICLE_STORE_PATH):
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                url TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                title TEXT NOT NULL,
+                published_ts REAL,
+                summary TEXT NOT NULL,
+                status TEXT NOT NULL,
+                duplicate_of TEXT,
+                ingested_at REAL NOT NULL
+            )
+            """
+        )
+        # Columns added after the first version of the store
+        existing = {row["name"] for row in self._db.execute("PRAGMA table_info(articles)")}
+        if "is_breaking" not in existing:
+            self._db.execute("ALTER TABLE articles ADD COLUMN is_breaking INTEGER NOT NULL DEFAULT 0")
+        if "text" not in existing:
+            self._db.execute("ALTER TABLE articles ADD COLUMN text BLOB")
+        # url is the primary key; time and topic+time serve the window queries
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS idx_articles_when ON articles({_WHEN})")
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS idx_articles_topic_when ON articles(topic, {_WHEN})")
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # -------------------------
+    # Writes
+    # -------------------------
+    def save_items(self, items: list[dict[str, Any]]) -> int:
+        """Upsert pipeline results; only successful outcomes are kept. Returns rows written."""
+        now = time.time()
+        rows = [
+            (
+                it["url"],
+                it["topic"],
+                it["title"],
+                it["published_local"].timestamp() if it.get("published_local") else None,
+                int(bool(it.get("is_breaking"))),
+                it.get("summary", ""),
+                it["status"],
+                it.get("duplicate_of"),
+                _compress(it.get("text")),
+                now,
+            )
+            for it in items
+            if it.get("status") in STORED_STATUSES
+        ]
+        with self._lock:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO articles ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows,
+            )
+            self._db.commit()
+        return len(rows)
+
+    def prune(self, retention_days: float = ARTICLE_STORE_RETENTION_DAYS) -> int:
+        """Delete articles older than the retention period. Returns rows deleted."""
+        cutoff = time.time() - retention_days * 86400
+        with self._lock:
+            n = self._db.execute(f"DELETE FROM articles WHERE {_WHEN} < ?", (cutoff,)).rowcount
+            self._db.commit()
+        return n
+
+    # -------------------------
+    # Reads
+    # -------------------------
+    def get_many(self, urls: list[str]) -> dict[str, dict[str, Any]]:
+        """Stored rows by URL (without the text)."""
+        if not urls:
+            return {}
+        cols = ", ".join(c for c in _COLUMNS if c != "text")
+        out: dict[str, dict[str, Any]] = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT {cols} FROM articles WHERE url IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                out.update({row["url"]: dict(row) for row in rows})
+        return out
+
+    def get_ready(self, urls: list[str]) -> dict[str, dict[str, Any]]:
+        """Stored rows by URL that need no more processing."""
+        return {url: row for url, row in self.get_many(urls).items() if row["status"] not in REPROCESS_STATUSES}
+
+    def get_text(self, url: str) -> str:
+        with self._lock:
+            row = self._db.execute("SELECT text FROM articles WHERE url = ?", (url,)).fetchone()
+        return _decompress(row["text"]) if row else ""
+
+    def get_texts(self, urls: list[str]) -> dict[str, str]:
+        """Extracted text by URL, for the stored rows that have one."""
+        out: dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT url, text FROM articles WHERE text IS NOT NULL AND url IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                out.update({row["url"]: _decompress(row["text"]) for row in rows})
+        return out
+
+    def query_window(
+        self,
+        start: datetime,
+        end: datetime,
+        topics: list[str] | None = None,
+        per_topic: int | None = None,
+        now_local: datetime | None = None,
+        breaking_delta: timedelta | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Digest items for [start, end], newest first within each topic (topics in
+        the given order), at most `per_topic` each. Near-duplicates are attached
+        to their representative's item["also"]; one whose representative is
+        outside the window is shown on its own with the representative's
+        summary. With `now_local` + `breaking_delta`, BREAKING is recomputed
+        for that moment instead of using the stored flag.
+        """
+        sql = (
+            f"SELECT url, topic, title, published_ts, is_breaking, summary, status, duplicate_of, ingested_at "
+            f"FROM articles WHERE {_WHEN} BETWEEN ? AND ?"
+        )
+        params: list[Any] = [start.timestamp(), end.timestamp()]
+        if topics is not None:
+            sql += f" AND topic IN ({','.join('?' * len(topics))})"
+            params += topics
+        sql += f" ORDER BY {_WHEN} DESC"
+        with self._lock:
+            rows = [dict(r) for r in self._db.execute(sql, params)]
+
+        by_url = {r["url"]: r for r in rows if r["status"] != "duplicate"}
+        outside = self.get_many(
+            [r["duplicate_of"] for r in rows if r["status"] == "duplicate" and r["duplicate_of"] not in by_url]
+        )
+        items_by_url = {url: self._row_to_item(r, now_local, breaking_delta) for url, r in by_url.items()}
+        for r in rows:
+            if r["status"] != "duplicate":
+                continue
+            rep = items_by_url.get(r["duplicate_of"])
+            if rep is not None:
+                rep.setdefault("also", []).append({"url": r["url"], "title": r["title"], "topic": r["topic"]})
+            elif r["duplicate_of"] in outside:
+                r["summary"] = outside[r["duplicate_of"]]["summary"]
+                items_by_url[r["url"]] = self._row_to_item(r, now_local, breaking_delta)
+
+        # Keep the query's newest-first order
+        items = [items_by_url[r["url"]] for r in rows if r["url"] in items_by_url]
+        order = {t: i for i, t in enumerate(topics)} if topics is not None else {}
+        items.sort(key=lambda it: order.get(it["topic"], len(order)))  # stable: newest first per topic
+        if per_topic is not None:
+            counts: dict[str, int] = {}
+            capped = []
+            for it in items:
+                counts[it["topic"]] = counts.get(it["topic"], 0) + 1
+                if counts[it["topic"]] <= per_topic:
+                    capped.append(it)
+            items = capped
+        return items
+
+    def query_days(self, days: float, now_local: datetime | None = None, **kwargs) -> list[dict[str, Any]]:
+        """Items from the last `days` days (e.g. a weekly digest); kwargs as for query_window."""
+        end = now_local or datetime.now(LOCAL_TZ)
+        return self.query_window(end - timedelta(days=days), end, **kwargs)
+
+    @staticmethod
+    def _row_to_item(
+        row: dict[str, Any], now_local: datetime | None, breaking_delta: timedelta | None
+    ) -> dict[str, Any]:
+        published_local = (
+            datetime.fromtimestamp(row["published_ts"], LOCAL_TZ) if row["published_ts"] is not None else None
+        )
+        if published_local is not None and now_local is not None and breaking_delta is not None:
+            is_breaking = (now_local - published_local) <= breaking_delta
+        else:
+            is_breaking = bool(row["is_breaking"])
+        return {
+            "topic": row["topic"],
+            "title": row["title"],
+            "url": row["url"],
+            "summary": row["summary"],
+            "published_local": published_local,
+            "published_local_str": published_local.strftime("%H:%M") if published_local else "",
+            "is_breaking": is_breaking,
+            "status": "stored",
+        }
@@ -0,0 +1,184 @@
+"""
+Backfill / replay: regenerate past digests from local state, e.g. after a
+template, prompt or model change.
+
+For every date in --from..--to and every digest type, the digest's window
+is replayed as if it had been sent at SEND_TIMES[type] (or --at) that day:
+its articles and summaries come from the article store instead of the live
+feeds, Top-3 is ranked locally (no LLM re-rank) and there is no weather.
+Digests are ranked and rendered in parallel across a process pool and
+written to --out as lrt_digest_<type>_<date>.html; nothing is sent.
+
+With --resummarize every article is summarized again with the current prompt
+and model routing (LLM calls; the summary cache is bypassed), from its stored
+extracted text or, for rows stored without one, the page cache's copy of the
+article (never the network). New summaries are only used for the output,
+the article store is left as is.
+
+Usage:
+    python backfill.py --from 2026-02-20 --to 2026-02-25
+    python backfill.py --from 2026-03-10 --types evening --at 21:30 --out /tmp/digests
+    python backfill.py --from 2026-02-25 --resummarize --workers 8
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, time as dtime, timedelta
+import multiprocessing
+import os
+import statistics
+import time
+from typing import Any
+
+from article_store import ArticleStore
+from config import (
+    BREAKING_MINUTES,
+    LOCAL_TZ,
+    MAX_ARTICLES_PER_TOPIC_EVENING,
+    MAX_ARTICLES_PER_TOPIC_MIDDAY,
+    MAX_ARTICLES_PER_TOPIC_MORNING,
+    SUMMARY_WORKERS,
+    TOPICS,
+)
+from html_builder import DigestFragments
+from ranking import rank_items, top3_highlights
+from time_utils import get_time_window_local, titles_and_subject
+
+# When each digest type is replayed as sent. The evening window opens at 18:00,
+# so its replay closes a few hours later rather than right away
+SEND_TIMES = {"morning": dtime(7, 0), "midday": dtime(12, 0), "evening": dtime(21, 0)}
+MAX_PER_TOPIC = {
+    "morning": MAX_ARTICLES_PER_TOPIC_MORNING,
+    "midday": MAX_ARTICLES_PER_TOPIC_MIDDAY,
+    "evening": MAX_ARTICLES_PER_TOPIC_EVENING,
+}
+
+
+def plan_jobs(
+    store: ArticleStore, first: date, last: date, digest_types: list[str], at: dtime | None
+) -> list[dict[str, Any]]:
+    """One job per (date, digest type): its replayed window's items, straight from the store."""
+    jobs = []
+    day = first
+    while day <= last:
+        for digest_type in digest_types:
+            now_local = datetime.combine(day, at or SEND_TIMES[digest_type], tzinfo=LOCAL_TZ)
+            window_start, window_end = get_time_window_local(digest_type, now_local)
+            items = store.query_window(
+                window_start, window_end, list(TOPICS), MAX_PER_TOPIC[digest_type],
+                now_local, timedelta(minutes=BREAKING_MINUTES),
+            )
+            sections: dict[str, list[dict]] = {t: [] for t in TOPICS.keys()}
+            for item in items:
+                sections[item["topic"]].append(item)
+            jobs.append(
+                {"date_str": day.isoformat(), "digest_type": digest_type, "now_local": now_local, "sections": sections}
+            )
+        day += timedelta(days=1)
+    return jobs
+
+
+def resummarize(store: ArticleStore, items: list[dict[str, Any]]) -> dict[str, str]:
+    """New summary per URL (current prompt + routing); articles without any stored text are skipped."""
+    # Heavy (openai, trafilatura) and only needed here
+    from fetcher import cached_html, extract_text
+    from openai_helpers import route_summary, summarize_lt
+    from text_reduce import extractive_summary, reduce_text
+
+    def one(item: dict[str, Any]) -> tuple[str, str | None]:
+        text = store.get_text(item["url"])
+        if not text:
+            html = cached_html(item["url"])
+            text = extract_text(html) if html else ""
+        if not text:
+            return item["url"], None
+        _, model = route_summary(item, text)
+        try:
+            if model is None:
+                return item["url"], extractive_summary(text)
+            return item["url"], summarize_lt(item["title"], reduce_text(item["title"], text), model)
+        except Exception as ex:
+            print(f"⚠️ {item['url']}: {ex}")
+            return item["url"], None
+
+    unique = list({it["url"]: it for it in items}.values())
+    with ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="resummarize") as pool:
+        results = dict(pool.map(one, unique))
+    return {url: summary for url, summary in results.items() if summary}
+
+
+def render_job(job: dict[str, Any], out_dir: str) -> dict[str, Any]:
+    """Rank, Top-3 and render one digest to `out_dir` (runs in a worker process)."""
+    t0 = time.perf_counter()
+    sections = job["sections"]
+    items = [it for cards in sections.values() for it in cards]
+    # The HTML byte budget shortens / drops the lowest-ranked cards first
+    for rank, i in enumerate(rank_items(items, job["now_local"])):
+        items[i]["rank"] = rank
+    top3 = top3_highlights(items, job["now_local"])
+
+    _, header, subtitle = titles_and_subject(job["date_str"], job["digest_type"])
+    fragments = DigestFragments(job["date_str"], header, subtitle, sections, top3, None)
+    html_doc = fragments.document()
+    path = os.path.join(out_dir, f"lrt_digest_{job['digest_type']}_{job['date_str']}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html_doc)
+    return {
+        "path": path,
+        "articles": len(items),
+        "bytes": len(html_doc.encode("utf-8")),
+        "seconds": time.perf_counter() - t0,
+        "dropped": fragments.dropped,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--from", dest="first", type=date.fromisoformat, required=True, help="first date (YYYY-MM-DD)")
+    ap.add_argument("--to", dest="last", type=date.fromisoformat, help="last date, inclusive (default: --from)")
+    ap.add_argument("--types", default="morning,midday", help="comma-separated digest types")
+    ap.add_argument("--at", type=dtime.fromisoformat, help="replayed send time (HH:MM) for every type")
+    ap.add_argument("--out", default="backfill", help="output directory")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--resummarize", action="store_true", help="summarize again with the current prompt / model")
+    args = ap.parse_args()
+
+    digest_types = [t.strip() for t in args.types.split(",") if t.strip()]
+    unknown = [t for t in digest_types if t not in SEND_TIMES]
+    if unknown:
+        ap.error(f"unknown digest types: {', '.join(unknown)}")
+    os.makedirs(args.out, exist_ok=True)
+
+    t0 = time.perf_counter()
+    with ArticleStore() as store:
+        jobs = plan_jobs(store, args.first, args.last or args.first, digest_types, args.at)
+        if args.resummarize:
+            summaries = resummarize(store, [it for job in jobs for cards in job["sections"].values() for it in cards])
+            for job in jobs:
+                for cards in job["sections"].values():
+                    for it in cards:
+                        it["summary"] = summaries.get(it["url"], it["summary"])
+            print(f"ℹ️ Resummarized {len(summaries)} articles")
+
+    # spawn, as for the pipeline's extract workers
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(jobs))), mp_context=ctx) as pool:
+        results = list(pool.map(render_job, jobs, [args.out] * len(jobs)))
+    wall = time.perf_counter() - t0
+
+    for r in results:
+        note = f", {r['dropped']} cards over budget" if r["dropped"] else ""
+        print(f"  {r['path']}: {r['articles']} articles, {r['bytes'] / 1024:.1f} KB{note}")
+    articles = sum(r["articles"] for r in results)
+    render_times = [r["seconds"] for r in results]
+    print(
+        f"✅ Backfill: {len(results)} digests ({articles} articles, {sum(r['bytes'] for r in results) / 1024:.0f} KB) "
+        f"in {wall:.1f}s — {len(results) / wall:.1f} digests/s, {articles / wall:.0f} articles/s; "
+        f"render p50 {statistics.median(render_times) * 1000:.0f} ms, max {max(render_times) * 1000:.0f} ms"
+        if results
+        else "ℹ️ Backfill: nothing to render"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Offline summary jobs (Batch API) submitted ahead of a digest, and collected
+when it is sent. Small on-disk store (JSON).
+
+`lrt_multi_digest.py --prepare` runs SUMMARY_BATCH_JOB_LEAD_MINUTES before a
+SUMMARY_BATCH_JOB_DIGESTS digest: it plans that digest's articles and submits
+their summaries as a job (DigestPipeline mode "batch_job"), recorded here with
+each article's URL, model and extracted-text hash. At send time `collect`
+checks every pending job once, without waiting: a finished job's summaries go
+into the summary cache under the key the pipeline looks them up with, and
+whatever is not finished is summarized right away. A job still running stays
+pending and feeds a later run.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any
+
+from config import BATCH_JOBS_PATH
+from openai_helpers import poll_summary_batch_job
+from summary_cache import SummaryCache, text_hash
+
+
+class BatchJobStore:
+    def __init__(self, path: str = BATCH_JOBS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._jobs: dict[str, dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._jobs = json.load(f)
+            except (OSError, ValueError):
+                self._jobs = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+    def save(self) -> None:
+        dir_name = os.path.dirname(self.path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._jobs, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def add(self, batch_id: str, model: str, articles: list[tuple[str, str]]) -> None:
+        """Record a submitted job: its (url, extracted text) articles, in request order."""
+        with self._lock:
+            self._jobs[batch_id] = {
+                "model": model,
+                "submitted_at": time.time(),
+                "articles": [{"url": url, "text_hash": text_hash(text)} for url, text in articles],
+            }
+
+    def pending_urls(self) -> set[str]:
+        with self._lock:
+            return {a["url"] for job in self._jobs.values() for a in job["articles"]}
+
+    def collect(self, cache: SummaryCache) -> int:
+        """
+        Check every pending job once. A finished one (completed, failed,
+        expired or cancelled) has its summaries put into `cache` and is
+        forgotten. Returns the number of summaries cached.
+        """
+        with self._lock:
+            jobs = dict(self._jobs)
+        cached = 0
+        for batch_id, job in jobs.items():
+            try:
+                results = poll_summary_batch_job(batch_id, len(job["articles"]))
+            except Exception as ex:
+                print(f"⚠️ Batch job {batch_id}: {ex}")
+                continue
+            if results is None:
+                continue
+            for article, summary in zip(job["articles"], results):
+                if summary is not None:
+                    cache.put_hashed(article["url"], article["text_hash"], job["model"], summary)
+                    cached += 1
+            with self._lock:
+                self._jobs.pop(batch_id, None)
+        return cached
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
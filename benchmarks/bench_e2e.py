@@ -0,0 +1,160 @@
+"""
+Offline end-to-end benchmark for lrt_multi_digest.main.
+
+Runs the full digest (feeds -> fetch -> extract -> summarize -> Top-3 -> HTML ->
+SMTP) against local stand-ins (benchmarks/standins.py) instead of lrt.lt,
+OpenAI, open-meteo and Gmail, at several article counts, and reports wall time,
+per-stage latency percentiles and throughput from the run's JSON report.
+
+Each scale runs in a fresh subprocess with an empty cache directory, so
+config.py picks up the settings below and no cache hits carry over.
+
+Usage:
+    python benchmarks/bench_e2e.py --scales 10,100,1000 --llm-latency 0.3 --llm-error-rate 0.02
+    python benchmarks/bench_e2e.py --scales 100 --llm-rpm 60      # rate-limited API (429 + retry-after)
+    FETCH_WORKERS=16 SUMMARY_WORKERS=8 python benchmarks/bench_e2e.py   # compare concurrency settings
+"""
+
+import argparse
+from datetime import datetime
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+from zoneinfo import ZoneInfo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TOPICS = ["Lietuvoje", "Pasaulyje", "Mokslas ir IT", "Verslas", "Sportas"]
+STAGES = ["feeds", "fetch", "extract", "summary", "pipeline", "top3", "weather", "render", "smtp"]
+
+
+# -------------------------
+# Child: one digest run (writes its run report to RUN_REPORT_PATH)
+# -------------------------
+def run_child(feeds: dict[str, str]) -> None:
+    import config
+    import lrt_multi_digest
+
+    # Same dict object lrt_multi_digest imported, so swap the feeds in place
+    config.TOPICS.clear()
+    config.TOPICS.update(feeds)
+    lrt_multi_digest.main()
+
+
+# -------------------------
+# Parent: stand-ins + report
+# -------------------------
+def run_scale(n: int, args) -> dict:
+    from standins import LrtStandIn, OpenAIStandIn, SmtpSink, WeatherStandIn
+
+    # Morning window is local midnight -> now; publish everything inside it
+    now = datetime.now(ZoneInfo("Europe/Vilnius"))
+    since_midnight = (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds() / 60
+    window_minutes = max(1.0, min(300.0, since_midnight - 1))
+
+    lrt = LrtStandIn(TOPICS, n, window_minutes=window_minutes)
+    llm = OpenAIStandIn(
+        latency=args.llm_latency,
+        jitter=args.llm_latency / 4,
+        error_rate=args.llm_error_rate,
+        rpm_limit=args.llm_rpm,
+        tpm_limit=args.llm_tpm,
+    )
+    smtp = SmtpSink()
+    weather = WeatherStandIn(latency=0.2)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            out_path = os.path.join(tmp, "report.json")
+            env = dict(
+                os.environ,
+                DIGEST_TYPE="morning",
+                DIGEST_CACHE_DIR=os.path.join(tmp, "cache"),
+                MAX_ARTICLES_PER_TOPIC_MORNING=str(math.ceil(n / len(TOPICS))),
+                WEATHER_API_URL=weather.url,
+                WEATHER_CITIES="Vilnius:54.6872:25.2797,Kaunas:54.8985:23.9036,Klaipėda:55.7033:21.1443",
+                OPENAI_API_KEY="standin",
+                OPENAI_BASE_URL=llm.base_url,
+                NEWS_TO_EMAIL=",".join(f"reader{i}@example.test" for i in range(args.recipients)),
+                NEWS_FROM_EMAIL="digest@example.test",
+                NEWS_SMTP_USER="digest@example.test",
+                NEWS_SMTP_PASS="standin",
+                NEWS_SMTP_HOST=smtp.host,
+                NEWS_SMTP_PORT=str(smtp.port),
+                NEWS_SMTP_STARTTLS="0",
+                RUN_REPORT_PATH=out_path,
+                BENCH_FEEDS=json.dumps(lrt.topic_feeds()),
+            )
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child"],
+                env=env, cwd=ROOT, check=True, stdout=subprocess.DEVNULL if not args.verbose else None,
+            )
+            with open(out_path, encoding="utf-8") as f:
+                report = json.load(f)
+        report["standin_llm_requests"] = llm.calls
+        report["emails"] = smtp.messages
+        report["standin_weather_requests"] = weather.requests
+        return report
+    finally:
+        lrt.close()
+        llm.close()
+        smtp.close()
+        weather.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--scales", default="10,100,1000")
+    ap.add_argument("--llm-latency", type=float, default=0.2)
+    ap.add_argument("--llm-error-rate", type=float, default=0.0)
+    ap.add_argument("--llm-rpm", type=int, default=0, help="stand-in requests/minute limit (0 = none)")
+    ap.add_argument("--llm-tpm", type=int, default=0, help="stand-in tokens/minute limit (0 = none)")
+    ap.add_argument("--recipients", type=int, default=3)
+    ap.add_argument("--json", action="store_true", help="print raw results as JSON")
+    ap.add_argument("--verbose", action="store_true", help="show the digest's own output")
+    args = ap.parse_args()
+
+    if args.child:
+        run_child(json.loads(os.environ["BENCH_FEEDS"]))
+        return
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+    for n in [int(x) for x in args.scales.split(",") if x.strip()]:
+        r = results[n] = run_scale(n, args)
+        c = r["counters"]
+        wall = r["wall_seconds"]
+        articles = c.get("articles_selected", 0)
+        errors = sum(v for k, v in c.items() if k.startswith("articles_") and k.endswith(("_error", "too_short")))
+        print(
+            f"\n== {n} articles: wall {wall:.2f}s, {articles / wall:.1f} articles/s, "
+            f"{r['standin_llm_requests']} LLM requests ({c.get('llm_retries', 0)} retries, "
+            f"{c.get('llm_throttled', 0)} throttled), "
+            f"{errors} errors, {r['emails']} emails, {c.get('fetch_bytes', 0) / 1e6:.1f} MB fetched, "
+            f"{r['standin_weather_requests']} weather requests"
+        )
+        q = r["info"].get("llm_quota") or {}
+        if q:
+            print(
+                f"   quota: peak {q['rpm_peak']} RPM ({q['rpm_utilization']:.0%} of {q['rpm_limit']:.0f}), "
+                f"{q['tpm_peak']} TPM ({q['tpm_utilization']:.0%} of {q['tpm_limit']:.0f}), "
+                f"concurrency {q['concurrency_limit']} (low {q['concurrency_low']})"
+            )
+        print(f"   {'stage':<10} {'n':>5} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+        for stage in STAGES:
+            st = r["stages"].get(stage)
+            if st:
+                print(
+                    f"   {stage:<10} {st['count']:>5} {st['p50']:>8.3f} {st['p90']:>8.3f} "
+                    f"{st['p99']:>8.3f} {st['max']:>8.3f}"
+                )
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Extraction throughput benchmark.
+
+Compares trafilatura, the LRT fast path (with trafilatura fallback) and the
+fast path spread over a process pool, on saved article pages.
+
+Usage:
+    python benchmarks/bench_extract.py [FILE_OR_DIR ...] [--repeat N] [--workers N]
+
+Without paths, the article pages stored in the page cache (FETCH_CACHE_PATH)
+are used; if it has none, the LRT article-template fixtures in
+benchmarks/fixtures/.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import FETCH_CACHE_PATH  # noqa: E402
+from fetcher import (  # noqa: E402
+    MIN_TEXT_CHARS,
+    cached_html,
+    extract_text,
+    extract_text_lrt,
+    extract_text_trafilatura,
+    get_page_cache,
+)
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures", "lrt_article_*.html")
+
+
+def load_cached_pages() -> list[str]:
+    """Article pages the digest fetched before (feeds are not stored in the page cache)."""
+    cache = get_page_cache() if os.path.exists(FETCH_CACHE_PATH) else None
+    if cache is None:
+        return []
+    return [html for html in map(cached_html, cache.urls()) if html]
+
+
+def load_samples(paths: list[str]) -> list[str]:
+    files: list[str] = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(sorted(glob.glob(os.path.join(p, "*.html"))))
+        else:
+            files.extend(sorted(glob.glob(p)))
+    docs = []
+    for path in files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            docs.append(f.read())
+    return docs
+
+
+def run_serial(fn, docs: list[str]) -> float:
+    t0 = time.perf_counter()
+    for d in docs:
+        fn(d)
+    return time.perf_counter() - t0
+
+
+def run_pool(docs: list[str], workers: int) -> float:
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        list(pool.map(extract_text, docs[:workers]))  # warm up worker imports
+        t0 = time.perf_counter()
+        list(pool.map(extract_text, docs, chunksize=4))
+        return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="*")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = ap.parse_args()
+
+    if args.paths:
+        samples, source = load_samples(args.paths), "files"
+    else:
+        samples, source = load_cached_pages(), "page cache"
+        if not samples:
+            samples, source = load_samples([FIXTURES]), "fixtures"
+    if not samples:
+        sys.exit("No HTML samples found.")
+    docs = samples * args.repeat
+    mb = sum(len(d.encode("utf-8")) for d in docs) / 1e6
+
+    fast_hits = sum(1 for d in samples if len(extract_text_lrt(d)) >= MIN_TEXT_CHARS)
+    print(f"{len(samples)} samples ({source}) x {args.repeat} = {len(docs)} docs ({mb:.1f} MB); "
+          f"fast path usable on {fast_hits}/{len(samples)} samples")
+
+    results = [
+        ("trafilatura", run_serial(extract_text_trafilatura, docs)),
+        ("fast path + fallback", run_serial(extract_text, docs)),
+        (f"process pool x{args.workers}", run_pool(docs, args.workers)),
+    ]
+    for name, secs in results:
+        print(f"{name:<24} {secs:8.3f}s  {len(docs) / secs:8.1f} docs/s  {mb / secs:6.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cold-start benchmark for the scheduled entry point (lrt_multi_digest.py).
+
+The workflow starts the script several times a day and most invocations are
+not due, so they only pay interpreter start-up + imports before exiting. Each
+sample is a fresh interpreter under `python -X importtime`:
+
+    not-due path   import lrt_multi_digest and run main() with DIGEST_TYPE=none
+    full import    import digest_run (everything a due run loads)
+
+and reports the median cumulative import time of the top-level modules plus
+the heaviest imports. It doubles as a regression check: exits 1 when the
+not-due path takes longer than --max-ms or imports any of HEAVY_MODULES.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat N] [--max-ms MS] [--top N]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported before main() knows a digest is due
+HEAVY_MODULES = ("openai", "feedparser", "trafilatura", "lxml", "requests", "numpy", "charset_normalizer")
+
+NOT_DUE = "import lrt_multi_digest; lrt_multi_digest.main()"
+FULL = "import digest_run"
+
+# "import time: self [us] | cumulative | imported package"
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+# Imported by the interpreter itself before `-c` runs
+_STARTUP = {"site", "encodings", "codecs", "io", "abc", "os", "stat", "_io", "marshal", "posix", "time", "zipimport"}
+
+
+def sample(code: str) -> tuple[float, dict[str, int], set[str]]:
+    """One fresh interpreter: (wall ms of the top-level imports, self us per module, modules imported)."""
+    env = dict(os.environ, DIGEST_TYPE="none", OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "bench"))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    self_us: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        self_us[m.group(4)] = int(m.group(1))
+        # Top level of the tree (one space of indent): our modules, not site / encodings start-up
+        if len(m.group(3)) == 1 and m.group(4) not in _STARTUP:
+            total_us += int(m.group(2))
+    return total_us / 1000.0, self_us, set(self_us)
+
+
+def run(code: str, repeat: int) -> tuple[float, dict[str, int], set[str]]:
+    samples = [sample(code) for _ in range(repeat)]
+    median_ms = statistics.median(s[0] for s in samples)
+    # Self time per module: median over the samples it appears in
+    names = set().union(*(s[1] for s in samples))
+    self_us = {n: int(statistics.median(s[1][n] for s in samples if n in s[1])) for n in names}
+    return median_ms, self_us, samples[-1][2]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-ms", type=float, default=150.0, help="budget for the not-due path's imports")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    failed = False
+    for label, code in (("not-due path", NOT_DUE), ("full import", FULL)):
+        median_ms, self_us, modules = run(code, args.repeat)
+        print(f"{label:<14} {median_ms:8.1f} ms  ({len(modules)} modules, median of {args.repeat})")
+        for name, us in sorted(self_us.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+            print(f"    {us / 1000.0:7.1f} ms  {name}")
+        if code == NOT_DUE:
+            heavy = sorted(m for m in modules if m.split(".")[0] in HEAVY_MODULES)
+            if heavy:
+                print(f"❌ not-due path imports heavy modules: {', '.join(heavy[:10])}")
+                failed = True
+            if median_ms > args.max_ms:
+                print(f"❌ not-due path {median_ms:.1f} ms > budget {args.max_ms:.0f} ms")
+                failed = True
+    if not failed:
+        print("✅ Cold start within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
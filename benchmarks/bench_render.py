@@ -0,0 +1,104 @@
+"""
+HTML rendering benchmark: render time and output size of one digest.
+
+Builds a synthetic digest (items spread over the five topics, 3-5 bullet
+summaries, a few BREAKING / "Taip pat" cards) and renders it with
+html_builder.DigestFragments in each mode:
+
+    inline           every style inline, no byte budget (the old output)
+    compact          styles moved to a <style> block, whitespace minified
+    inline+budget    the default: inline, rendered compact only when over
+                     --max-bytes
+    compact+budget   compact, cut down to --max-bytes (lowest-ranked card
+                     first: summary shortened, then the card dropped)
+
+Usage:
+    python benchmarks/bench_render.py [--sizes 50,200,1000] [--repeat N] [--max-bytes B]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import HTML_MAX_BYTES, LOCAL_TZ  # noqa: E402
+from html_builder import DigestFragments  # noqa: E402
+
+TOPICS = ["Lietuvoje", "Pasaulyje", "Mokslas ir IT", "Verslas", "Sportas"]
+WORDS = (
+    "Vyriausybė pritarė naujam biudžeto projektui kuriame numatyta daugiau lėšų švietimui sveikatos "
+    "apsaugai ir gynybai o opozicija kritikuoja mokesčių pakeitimus savivaldybės ruošiasi žiemai"
+).split()
+
+MODES = (
+    ("inline", "inline", False),
+    ("compact", "compact", False),
+    ("inline+budget", "inline", True),
+    ("compact+budget", "compact", True),
+)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_sections(n: int, seed: int = 1) -> tuple[dict[str, list[dict]], list[str]]:
+    rng = random.Random(seed)
+    now = datetime.now(LOCAL_TZ)
+    sections: dict[str, list[dict]] = {t: [] for t in TOPICS}
+    ranks = rng.sample(range(n), n)
+    for i in range(n):
+        topic = TOPICS[i % len(TOPICS)]
+        published = now - timedelta(minutes=7 * i)
+        item = {
+            "title": _sentence(rng, rng.randint(6, 12)),
+            "url": f"https://www.lrt.lt/naujienos/{topic.lower().replace(' ', '-')}/{i}/straipsnis-{i}",
+            "topic": topic,
+            "summary": "\n".join(f"- {_sentence(rng, rng.randint(14, 24))}" for _ in range(rng.randint(3, 5))),
+            "published_local_str": published.strftime("%H:%M"),
+            "is_breaking": i % 17 == 0,
+            "rank": ranks[i],
+        }
+        if i % 11 == 0:
+            item["also"] = [{"url": f"https://www.lrt.lt/naujienos/pasaulyje/{i}", "topic": "Pasaulyje"}]
+        sections[topic].append(item)
+    top3 = [f"• {_sentence(rng, 8)} — {_sentence(rng, 10)}" for _ in range(3)]
+    return sections, top3
+
+
+def render(sections: dict[str, list[dict]], top3: list[str], mode: str, max_bytes: int) -> tuple[float, str, DigestFragments]:
+    t0 = time.perf_counter()
+    fragments = DigestFragments("2026-10-17", "Rytinė santrauka", "Naujienos", sections, top3, "Vilnius: +8 °C", mode, max_bytes)
+    doc = fragments.document()
+    return time.perf_counter() - t0, doc, fragments
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="50,200,1000")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-bytes", type=int, default=HTML_MAX_BYTES or 90000)
+    args = ap.parse_args()
+
+    print(f"{'items':>6} {'mode':<15} {'ms':>8} {'KB':>8} {'cards':>6} {'shortened':>9} {'dropped':>8}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        sections, top3 = make_sections(n)
+        for label, mode, budget in MODES:
+            runs = [render(sections, top3, mode, args.max_bytes if budget else 0) for _ in range(args.repeat)]
+            ms = statistics.median(r[0] for r in runs) * 1000
+            _, doc, fragments = runs[-1]
+            shown = doc.count("Skaityti ")
+            print(
+                f"{n:>6} {label:<15} {ms:8.1f} {len(doc.encode('utf-8')) / 1024:8.1f} {shown:>6} "
+                f"{fragments.shortened:>9} {fragments.dropped:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Local stand-ins for the digest's external services, for offline benchmarks.
+
+- LrtStandIn:    HTTP server with RSS feeds per topic (ETag / Last-Modified aware)
+                 and LRT-template article pages (ETag + Cache-Control max-age)
+- OpenAIStandIn: fake OpenAI responses endpoint (POST /v1/responses) with
+                 configurable latency, error rate and RPM / TPM limits (429s)
+- WeatherStandIn: open-meteo forecast endpoint (one or several coordinates per
+                 request), counts requests and locations
+- SmtpSink:      minimal SMTP server that accepts and counts messages
+
+Each server runs in a daemon thread on 127.0.0.1 and an ephemeral port.
+"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+_WORDS = (
+    "Vilniaus savivaldybė Seimas Vyriausybė ministras projektas sprendimas gyventojai "
+    "rinka kainos eurų investicijos tyrimas mokslininkai komanda rungtynės pergalė "
+    "pranešė teigė planuoja patvirtino nauja svarbu šalies regione metų "
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 18))]
+    words[0] = words[0].capitalize()
+    if rng.random() < 0.3:
+        words.insert(rng.randint(1, len(words) - 1), str(rng.randint(2, 2026)))
+    return " ".join(words) + "."
+
+
+def _serve(server) -> None:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+class _Quiet(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict[str, str] | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class LrtStandIn:
+    """
+    Serves /rss/<topic index> and /article/<id>. `articles` are spread evenly over
+    `topics`, published within the last `window_minutes`.
+    """
+
+    def __init__(
+        self, topics: list[str], articles: int, window_minutes: float = 300, seed: int = 1, page_max_age: int = 300
+    ):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        self.topics = topics
+        self.items: dict[int, list[dict]] = {i: [] for i in range(len(topics))}
+        self.pages: dict[str, bytes] = {}
+        self.page_requests = 0
+        for n in range(articles):
+            t = n % len(topics)
+            published = now - timedelta(minutes=rng.uniform(1, window_minutes))
+            title = " ".join(rng.choice(_WORDS) for _ in range(6)).capitalize()
+            paragraphs = [" ".join(_sentence(rng) for _ in range(rng.randint(2, 6))) for _ in range(rng.randint(4, 14))]
+            body = "".join(f"<p>{p}</p>" for p in paragraphs)
+            self.pages[str(n)] = (
+                f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title></head><body>"
+                f"<nav><p>Naujienos Sportas Verslas</p></nav><h1 class='title-block__heading'>{title}</h1>"
+                f"<div class='article-content'>{body}<figure><p>Nuotr. LRT</p></figure></div>"
+                f"<footer><p>© LRT</p></footer></body></html>"
+            ).encode("utf-8")
+            self.items[t].append({"id": n, "title": title, "published": published})
+        for t in self.items:
+            self.items[t].sort(key=lambda it: it["published"], reverse=True)
+
+        stand_in = self
+
+        class Handler(_Quiet):
+            def do_GET(self):
+                m = re.match(r"^/(rss|article)/(\d+)", self.path)
+                if not m:
+                    self._send(404, b"not found", "text/plain")
+                elif m.group(1) == "article":
+                    page = stand_in.pages.get(m.group(2))
+                    if page is None:
+                        self._send(404, b"not found", "text/plain")
+                        return
+                    stand_in.page_requests += 1
+                    etag = '"' + hashlib.md5(page).hexdigest() + '"'
+                    headers = {"ETag": etag, "Cache-Control": f"max-age={page_max_age}"}
+                    if self.headers.get("If-None-Match") == etag:
+                        self.send_response(304)
+                        for k, v in headers.items():
+                            self.send_header(k, v)
+                        self.end_headers()
+                        return
+                    self._send(200, page, "text/html; charset=utf-8", headers)
+                else:
+                    self._rss(int(m.group(2)))
+
+            def _rss(self, t: int):
+                body = stand_in.rss(t)
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self._send(200, body, "application/rss+xml; charset=utf-8", {"ETag": etag})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        _serve(self.server)
+
+    def rss(self, t: int) -> bytes:
+        entries = "".join(
+            f"<item><title>{it['title']}</title><link>{self.base_url}/article/{it['id']}</link>"
+            f"<guid>{self.base_url}/article/{it['id']}</guid>"
+            f"<pubDate>{format_datetime(it['published'])}</pubDate>"
+            f"<description>{it['title']}.</description></item>"
+            for it in self.items.get(t, [])
+        )
+        return (
+            f"<?xml version='1.0' encoding='utf-8'?><rss version='2.0'><channel>"
+            f"<title>{self.topics[t]}</title>{entries}</channel></rss>"
+        ).encode("utf-8")
+
+    def topic_feeds(self) -> dict[str, str]:
+        return {name: f"{self.base_url}/rss/{i}" for i, name in enumerate(self.topics)}
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+class OpenAIStandIn:
+    """
+    POST /v1/responses -> a minimal Responses API object. Sleeps `latency`
+    seconds (+/- `jitter`) per call and fails with HTTP 500 at `error_rate`.
+    Understands the batched-summary prompt format and answers per article.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.05,
+        error_rate: float = 0.0,
+        seed: int = 1,
+        rpm_limit: int = 0,
+        tpm_limit: int = 0,
+    ):
+        rng = random.Random(seed)
+        lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+        window: list[tuple[float, int]] = []  # (time, tokens) of accepted requests, last minute
+        stand_in = self
+
+        def admit(tokens: int) -> tuple[float | None, dict[str, str]]:
+            """(retry-after seconds if over a limit, x-ratelimit headers)."""
+            now = time.time()
+            with lock:
+                window[:] = [(t, n) for t, n in window if t > now - 60]
+                used_tokens = sum(n for _, n in window)
+                over = (rpm_limit and len(window) + 1 > rpm_limit) or (tpm_limit and used_tokens + tokens > tpm_limit)
+                if over:
+                    stand_in.throttled += 1
+                    return max(0.05, window[0][0] + 60 - now), {}
+                window.append((now, tokens))
+                headers = {}
+                if rpm_limit:
+                    headers["x-ratelimit-limit-requests"] = str(rpm_limit)
+                    headers["x-ratelimit-remaining-requests"] = str(rpm_limit - len(window))
+                if tpm_limit:
+                    headers["x-ratelimit-limit-tokens"] = str(tpm_limit)
+                    headers["x-ratelimit-remaining-tokens"] = str(tpm_limit - used_tokens - tokens)
+                return None, headers
+
+        class Handler(_Quiet):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                req = json.loads(self.rfile.read(length) or b"{}")
+                prompt = req.get("input") if isinstance(req.get("input"), str) else json.dumps(req.get("input"))
+                with lock:
+                    stand_in.calls += 1
+                retry_after, headers = admit(len(prompt) // 3 + 1)
+                if retry_after is not None:
+                    err = {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+                    self._send(
+                        429, json.dumps(err).encode(), "application/json",
+                        {"retry-after-ms": str(int(retry_after * 1000))},
+                    )
+                    return
+                with lock:
+                    delay = max(0.0, latency + rng.uniform(-jitter, jitter))
+                    fail = rng.random() < error_rate
+                time.sleep(delay)
+                if fail:
+                    err = {"error": {"message": "stand-in error", "type": "server_error"}}
+                    self._send(500, json.dumps(err).encode(), "application/json")
+                    return
+                text = stand_in.answer(prompt)
+                body = json.dumps(stand_in.response(req.get("model", ""), prompt, text)).encode()
+                self._send(200, body, "application/json", headers)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        _serve(self.server)
+
+    @staticmethod
+    def answer(prompt: str) -> str:
+        bullets = "- Pirmas punktas.\n- Antras punktas.\n- Trečias punktas.\nKodėl tai svarbu Lietuvai? Neaišku iš straipsnio."
+        n = len(re.findall(r"=== STRAIPSNIS \d+ ===", prompt))
+        if n:
+            return "\n".join(f"### {i}\n{bullets}" for i in range(1, n + 1))
+        if "3 svarbiausias" in prompt:
+            return "\n".join(f"{i} — svarbu" for i in range(1, 4))
+        return bullets
+
+    @staticmethod
+    def response(model: str, prompt: str, text: str) -> dict:
+        in_tokens = len(prompt) // 3 + 1
+        out_tokens = len(text) // 3 + 1
+        return {
+            "id": "resp_standin",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": model,
+            "status": "completed",
+            "output": [{
+                "type": "message",
+                "id": "msg_standin",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }],
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": in_tokens,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": out_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": in_tokens + out_tokens,
+            },
+        }
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+class WeatherStandIn:
+    """
+    GET /v1/forecast?latitude=a,b&longitude=c,d -> open-meteo shaped current /
+    daily data per coordinate (an object for one, a list for several), after
+    `latency` seconds. `fail=True` answers 503.
+    """
+
+    def __init__(self, latency: float = 0.0, fail: bool = False):
+        lock = threading.Lock()
+        self.requests = 0
+        self.locations = 0
+        self.fail = fail
+        stand_in = self
+
+        class Handler(_Quiet):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                lats = (query.get("latitude") or [""])[0].split(",")
+                lons = (query.get("longitude") or [""])[0].split(",")
+                with lock:
+                    stand_in.requests += 1
+                    stand_in.locations += len(lats)
+                time.sleep(latency)
+                if stand_in.fail:
+                    self._send(503, b"{}", "application/json")
+                    return
+                data = [
+                    {
+                        "latitude": float(lat),
+                        "longitude": float(lon),
+                        "current": {"temperature_2m": round(float(lat) / 10, 1), "wind_speed_10m": 3.5},
+                        "daily": {"temperature_2m_min": [1.0], "temperature_2m_max": [7.5]},
+                    }
+                    for lat, lon in zip(lats, lons)
+                ]
+                body = json.dumps(data if len(data) > 1 else data[0]).encode()
+                self._send(200, body, "application/json")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/forecast"
+        _serve(self.server)
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+class SmtpSink:
+    """Accepts EHLO / AUTH / MAIL / RCPT / DATA without TLS and counts delivered messages."""
+
+    def __init__(self):
+        self.messages = 0
+        self.recipients: list[str] = []
+        lock = threading.Lock()
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str):
+                self.wfile.write((line + "\r\n").encode())
+
+            def handle(self):
+                self.reply("220 sink ESMTP")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    cmd = line.decode(errors="replace").strip().upper()
+                    if cmd.startswith(("EHLO", "HELO")):
+                        self.wfile.write(b"250-sink\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                    elif cmd.startswith("AUTH"):
+                        self.reply("235 2.7.0 Authentication successful")
+                    elif cmd.startswith("RCPT"):
+                        with lock:
+                            sink.recipients.append(line.decode(errors="replace").split(":", 1)[-1].strip(" <>\r\n"))
+                        self.reply("250 OK")
+                    elif cmd.startswith("DATA"):
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                            pass
+                        with lock:
+                            sink.messages += 1
+                        self.reply("250 OK queued")
+                    elif cmd.startswith("QUIT"):
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("250 OK")
+
+        class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.host, self.port = self.server.server_address
+        _serve(self.server)
+
+    def close(self) -> None:
+        self.server.shutdown()
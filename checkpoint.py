@@ -0,0 +1,158 @@
+"""
+Checkpoint of one digest run (JSON), keyed by date and digest type.
+
+Records what a re-run of the same digest can skip:
+
+    stages       completed stages ("pipeline", "render", "smtp") with a timestamp
+    articles     per-article outcome (status) of the pipeline; the results
+                 themselves are saved to the article store as each one finishes
+    recipients   per-recipient send status ("sent" / "failed" + error)
+    documents    the rendered emails (one per distinct subscription) and which
+                 recipient gets which, so a re-run sends the same digest
+
+A re-run skips the stages it finds completed: after "pipeline" it processes
+no articles (their results are in the article store), after "render" it sends
+the stored documents if they cover every pending recipient, and only to
+recipients that are not "sent" yet; after "smtp" with everyone sent it stops. Every update is written to disk at once,
+so a job killed mid-run loses at most the step in progress: stages by atomic
+replace of the JSON, the documents once into their own file (<name>.documents.json),
+per-article and per-recipient outcomes as lines appended to a log next to it
+(<name>.log, replayed on load), so their cost does not grow with the size of the
+checkpoint.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Mapping
+
+from config import CHECKPOINT_DIR, CHECKPOINT_RETENTION_DAYS
+from email_sender import DeliveryResult
+
+
+class RunCheckpoint:
+    def __init__(self, date_str: str, digest_type: str, directory: str = CHECKPOINT_DIR):
+        self.path = os.path.join(directory, f"{digest_type}_{date_str}.json")
+        self.log_path = os.path.join(directory, f"{digest_type}_{date_str}.log")
+        self.documents_path = os.path.join(directory, f"{digest_type}_{date_str}.documents.json")
+        self._lock = threading.Lock()
+        self._state: dict[str, Any] = {"stages": {}}
+        self._articles: dict[str, str] = {}
+        self._recipients: dict[str, dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._state.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+        self._replay_log()
+        self.resumed = bool(self._state["stages"] or self._articles)
+
+    def _replay_log(self) -> None:
+        try:
+            with open(self.log_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # last line cut short by a kill
+                    if "article" in entry:
+                        self._articles[entry["article"]] = entry["status"]
+                    elif "recipient" in entry:
+                        self._recipients[entry.pop("recipient")] = entry
+        except OSError:
+            pass
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _save(self) -> None:
+        _write_json(self.path, self._state)
+
+    # -------------------------
+    # Stages
+    # -------------------------
+    def done(self, stage: str) -> bool:
+        return stage in self._state["stages"]
+
+    def complete(self, stage: str, **data: Any) -> None:
+        with self._lock:
+            self._state["stages"][stage] = {"at": time.time(), **data}
+            self._save()
+
+    def stage_data(self, stage: str) -> dict[str, Any]:
+        return self._state["stages"].get(stage) or {}
+
+    # -------------------------
+    # Articles / recipients
+    # -------------------------
+    def record_article(self, item: dict[str, Any]) -> None:
+        with self._lock:
+            self._articles[item["url"]] = item["status"]
+            self._append({"article": item["url"], "status": item["status"]})
+
+    @property
+    def articles(self) -> dict[str, str]:
+        return dict(self._articles)
+
+    def record_delivery(self, result: DeliveryResult) -> None:
+        entry = (
+            {"status": "sent", "at": time.time()}
+            if result.ok
+            else {"status": "failed", "code": result.code, "error": result.error, "attempts": result.attempts}
+        )
+        with self._lock:
+            self._recipients[result.recipient] = entry
+            self._append({"recipient": result.recipient, **entry})
+
+    def sent(self) -> set[str]:
+        return {r for r, s in self._recipients.items() if s["status"] == "sent"}
+
+    def save_documents(self, subject: str, documents: Mapping[str, str]) -> None:
+        """Rendered digest per recipient; recipients sharing a document share its copy."""
+        distinct = list(dict.fromkeys(documents.values()))
+        index = {doc: i for i, doc in enumerate(distinct)}
+        rendered = {
+            "subject": subject,
+            "documents": distinct,
+            "assignments": {r: index[doc] for r, doc in documents.items()},
+        }
+        with self._lock:
+            _write_json(self.documents_path, rendered)
+
+    def documents(self) -> tuple[str, dict[str, str]] | None:
+        """(subject, recipient -> html) of the rendered digest, if this run got that far before."""
+        try:
+            with open(self.documents_path, encoding="utf-8") as f:
+                rendered = json.load(f)
+        except (OSError, ValueError):
+            return None
+        docs = rendered["documents"]
+        return rendered["subject"], {r: docs[i] for r, i in rendered["assignments"].items()}
+
+
+def _write_json(path: str, data: Any) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def prune_checkpoints(
+    directory: str = CHECKPOINT_DIR, retention_days: float = CHECKPOINT_RETENTION_DAYS
+) -> int:
+    """Delete checkpoints not touched for `retention_days`. Returns files deleted."""
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - retention_days * 86400
+    n = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith((".json", ".log")) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            n += 1
+    return n
@@ -1,7 +1,6 @@
 import os
 
 from dotenv import load_dotenv
-from openai import OpenAI
 from zoneinfo import ZoneInfo
 
 
@@ -22,13 +21,165 @@ MAX_ARTICLES_PER_TOPIC_EVENING = int(os.getenv("MAX_ARTICLES_PER_TOPIC_EVENING",
 
 LOCAL_TZ = ZoneInfo("Europe/Vilnius")
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Pipeline concurrency (per stage)
+FEED_WORKERS = int(os.getenv("FEED_WORKERS", "5"))
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "4"))
+
+# Article fetch client (shared keep-alive pool, retries with jittered backoff)
+FETCH_POOL_SIZE = int(os.getenv("FETCH_POOL_SIZE", str(FETCH_WORKERS)))
+FETCH_CONNECT_TIMEOUT = float(os.getenv("FETCH_CONNECT_TIMEOUT", "5"))
+FETCH_READ_TIMEOUT = float(os.getenv("FETCH_READ_TIMEOUT", "20"))
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "2"))
+FETCH_BACKOFF_SECONDS = float(os.getenv("FETCH_BACKOFF_SECONDS", "0.5"))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+FETCH_DEADLINE_SECONDS = float(os.getenv("FETCH_DEADLINE_SECONDS", "30"))  # per article, retries included
+
+# Article extraction: LRT template fast path (trafilatura fallback), run in worker processes
+EXTRACT_FAST_PATH = os.getenv("EXTRACT_FAST_PATH", "1").strip() not in ("0", "false", "False")
+EXTRACT_IN_PROCESSES = os.getenv("EXTRACT_IN_PROCESSES", "1").strip() not in ("0", "false", "False")
+
 MODEL = os.getenv("OPENAI_MODEL", "gpt-5-mini")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))  # per request attempt
+
+# OpenAI rate limits (llm_client.py): starting RPM / TPM until the API's x-ratelimit-*
+# headers report the real ones (0 = unlimited); AIMD concurrency between 1 and LLM_MAX_CONCURRENCY
+OPENAI_RPM_LIMIT = float(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = float(os.getenv("OPENAI_TPM_LIMIT", "200000"))
+LLM_START_CONCURRENCY = int(os.getenv("LLM_START_CONCURRENCY", str(SUMMARY_WORKERS)))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_LATENCY_TARGET_SECONDS = float(os.getenv("LLM_LATENCY_TARGET_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "400"))
+
+# Run deadline: the pipeline stops RUN_DEADLINE_RESERVE_SECONDS before it (Top-3, HTML
+# and SMTP still have to run) and unfinished articles fall back to their RSS description.
+# 0 = no deadline.
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "600"))
+RUN_DEADLINE_RESERVE_SECONDS = float(os.getenv("RUN_DEADLINE_RESERVE_SECONDS", "60"))
+
+# Hedged summary requests: a single-article request still running past this percentile
+# of the run's summary latencies gets a duplicate; the first answer wins.
+# At most SUMMARY_HEDGE_BUDGET (fraction) of requests are hedged; 0 percentile = off.
+SUMMARY_HEDGE_PERCENTILE = float(os.getenv("SUMMARY_HEDGE_PERCENTILE", "95"))
+SUMMARY_HEDGE_MIN_SAMPLES = int(os.getenv("SUMMARY_HEDGE_MIN_SAMPLES", "5"))
+SUMMARY_HEDGE_BUDGET = float(os.getenv("SUMMARY_HEDGE_BUDGET", "0.1"))
+
+# Summary routing (openai_helpers.route_summary): extracted text shorter than
+# SUMMARY_LOCAL_MAX_CHARS gets a local extractive summary (no LLM call), up to
+# SUMMARY_FULL_MIN_CHARS the small model; longer, BREAKING and Top-3 candidate
+# articles get MODEL. SUMMARY_ROUTING=0 sends everything to MODEL.
+SUMMARY_ROUTING = os.getenv("SUMMARY_ROUTING", "1").strip() not in ("0", "false", "False")
+SUMMARY_SMALL_MODEL = os.getenv("SUMMARY_SMALL_MODEL", "gpt-5-nano")
+SUMMARY_LOCAL_MAX_CHARS = int(os.getenv("SUMMARY_LOCAL_MAX_CHARS", "700"))
+SUMMARY_FULL_MIN_CHARS = int(os.getenv("SUMMARY_FULL_MIN_CHARS", "3000"))
+SUMMARY_LOCAL_SENTENCES = int(os.getenv("SUMMARY_LOCAL_SENTENCES", "3"))
+
+# LLM input reduction: lead + most informative sentences up to this many tokens per article
+SUMMARY_INPUT_TOKENS = int(os.getenv("SUMMARY_INPUT_TOKENS", "2500"))
+SUMMARY_LEAD_SENTENCES = int(os.getenv("SUMMARY_LEAD_SENTENCES", "3"))
+
+# Near-duplicate stories (SimHash, 64 bits): cluster across topics before summarizing
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "1").strip() not in ("0", "false", "False")
+NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "5"))
+
+# Summaries: "single" (one request per article) or "batch" (several articles per request).
+# Digest types listed in SUMMARY_BATCH_JOB_DIGESTS also go through the offline Batch API: a
+# `lrt_multi_digest.py --prepare` run (cron) submits the job SUMMARY_BATCH_JOB_LEAD_MINUTES
+# before the digest is due; at send time finished results are used and the rest is summarized now
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "single").strip().lower()
+SUMMARY_BATCH_TOKENS = int(os.getenv("SUMMARY_BATCH_TOKENS", "12000"))
+SUMMARY_BATCH_MAX_ITEMS = int(os.getenv("SUMMARY_BATCH_MAX_ITEMS", "6"))
+SUMMARY_BATCH_JOB_DIGESTS = {
+    d.strip() for d in os.getenv("SUMMARY_BATCH_JOB_DIGESTS", "").split(",") if d.strip()
+}
+SUMMARY_BATCH_JOB_LEAD_MINUTES = float(os.getenv("SUMMARY_BATCH_JOB_LEAD_MINUTES", "90"))
+
+# Local on-disk state (caches, stores); persisted between runs by the workflow
+CACHE_DIR = os.getenv("DIGEST_CACHE_DIR", ".cache")
+
+# Feed state: ETag/Last-Modified validators and recently seen entries per feed
+FEED_STATE_PATH = os.getenv("FEED_STATE_PATH", os.path.join(CACHE_DIR, "feed_state.json"))
+FEED_STATE_RETENTION_HOURS = float(os.getenv("FEED_STATE_RETENTION_HOURS", "48"))
+FEED_TIMEOUT_SECONDS = float(os.getenv("FEED_TIMEOUT_SECONDS", "20"))  # per feed request (read timeout)
+
+# Run report (JSON) + optional metrics outputs; DIGEST_PROFILE=1 runs main under cProfile
+RUN_REPORT_DIR = os.getenv("RUN_REPORT_DIR", os.path.join(CACHE_DIR, "reports"))
+RUN_REPORT_PATH = os.getenv("RUN_REPORT_PATH", "")
+METRICS_LOG_FORMAT = os.getenv("METRICS_LOG_FORMAT", "").strip().lower()  # "", "logfmt", "json"
+METRICS_PUSH_URL = os.getenv("METRICS_PUSH_URL", "")
+DIGEST_PROFILE = os.getenv("DIGEST_PROFILE", "").strip().lower() not in ("", "0", "false", "no", "off")
+PROFILE_PATH = os.getenv("PROFILE_PATH", os.path.join(CACHE_DIR, "profile.pstats"))
+
+# Summary cache: keyed by URL + extracted text hash + model
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(CACHE_DIR, "summaries.sqlite3"))
+SUMMARY_CACHE_TTL_DAYS = float(os.getenv("SUMMARY_CACHE_TTL_DAYS", "14"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "5000"))
+# Batch API jobs submitted ahead of a digest, until a run collects them
+BATCH_JOBS_PATH = os.getenv("BATCH_JOBS_PATH", os.path.join(CACHE_DIR, "batch_jobs.json"))
+
+# Article store (indexed by time/topic/URL; filled by ingest_daemon.py between digests)
+ARTICLE_STORE_PATH = os.getenv("ARTICLE_STORE_PATH", os.path.join(CACHE_DIR, "articles.sqlite3"))
+INGEST_INTERVAL_MINUTES = float(os.getenv("INGEST_INTERVAL_MINUTES", "5"))
+INGEST_LOOKBACK_HOURS = float(os.getenv("INGEST_LOOKBACK_HOURS", "24"))
+# The daemon also sends each digest when it is due (then the scheduled workflow must not run);
+# 0 = ingest only, for a digest job scheduled elsewhere on the same DIGEST_CACHE_DIR
+INGEST_SEND_DIGESTS = os.getenv("INGEST_SEND_DIGESTS", "1").strip() not in ("0", "false", "False")
+ARTICLE_STORE_RETENTION_DAYS = float(os.getenv("ARTICLE_STORE_RETENTION_DAYS", "35"))
+
+# Run checkpoints (per date + digest type): a re-run resumes and only mails pending recipients
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join(CACHE_DIR, "checkpoints"))
+CHECKPOINT_RETENTION_DAYS = float(os.getenv("CHECKPOINT_RETENTION_DAYS", "3"))
+
+# Side data (weather, ...): small on-disk cache, entries expire after their own TTL
+SIDE_CACHE_PATH = os.getenv("SIDE_CACHE_PATH", os.path.join(CACHE_DIR, "side_data.json"))
+
+# HTTP cache for article pages (Cache-Control / ETag aware, compressed, LRU-bounded).
+# FETCH_REPLAY_ONLY=1 serves pages from it only and never fetches them (extraction / prompt experiments)
+FETCH_CACHE_ENABLED = os.getenv("FETCH_CACHE_ENABLED", "1").strip() not in ("0", "false", "False")
+FETCH_CACHE_PATH = os.getenv("FETCH_CACHE_PATH", os.path.join(CACHE_DIR, "pages.sqlite3"))
+FETCH_CACHE_MAX_MB = float(os.getenv("FETCH_CACHE_MAX_MB", "200"))
+FETCH_REPLAY_ONLY = os.getenv("FETCH_REPLAY_ONLY", "0").strip() not in ("0", "false", "False")
+
+# HTML rendering: "inline" keeps every style inline (for clients that drop <style>) and renders
+# only a document over HTML_MAX_BYTES (Gmail clips at ~102 KB; 0 = no budget) "compact": the
+# repeated card / section styles moved into a <style> block, whitespace stripped. A compact
+# document still over budget is cut from its lowest-ranked card up: each card's summary is cut
+# to HTML_SHORT_SUMMARY_BULLETS bullets, then the card is dropped if that is not enough
+HTML_RENDER_MODE = os.getenv("HTML_RENDER_MODE", "inline").strip().lower()
+HTML_MAX_BYTES = int(os.getenv("HTML_MAX_BYTES", "90000"))
+HTML_SHORT_SUMMARY_BULLETS = int(os.getenv("HTML_SHORT_SUMMARY_BULLETS", "1"))
+
+# Per-recipient subscriptions (subscriptions.py): JSON from NEWS_SUBSCRIPTIONS, else this file.
+# Recipients without an entry get every topic, up to the digest's max articles per topic
+SUBSCRIPTIONS_PATH = os.getenv("SUBSCRIPTIONS_PATH", "subscriptions.json")
+
+# Top-3: ranked locally (ranking.py); "llm" also re-ranks a short list with one LLM call,
+# started while the summaries are still running
+TOP3_MODE = os.getenv("TOP3_MODE", "local").strip().lower()
+TOP3_SHORTLIST = int(os.getenv("TOP3_SHORTLIST", "8"))
+RANK_RECENCY_HALF_LIFE_HOURS = float(os.getenv("RANK_RECENCY_HALF_LIFE_HOURS", "6"))
 
 # BREAKING if published within last N minutes
 BREAKING_MINUTES = int(os.getenv("BREAKING_MINUTES", "90"))
 
-# Optional: include weather block (Vilnius) in HTML/email
+# Optional: include weather block in HTML/email. All WEATHER_CITIES ("Name:lat:lon", comma
+# separated; the first is the default, subscriptions may pick another) come from one open-meteo
+# request, started alongside the pipeline and cached on disk for WEATHER_CACHE_MINUTES
 INCLUDE_WEATHER = os.getenv("INCLUDE_WEATHER", "1").strip() not in ("0", "false", "False")
+WEATHER_CITIES = os.getenv("WEATHER_CITIES", "Vilnius:54.6872:25.2797")
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.open-meteo.com/v1/forecast")
+WEATHER_CACHE_MINUTES = float(os.getenv("WEATHER_CACHE_MINUTES", "30"))
+WEATHER_TIMEOUT_SECONDS = float(os.getenv("WEATHER_TIMEOUT_SECONDS", "20"))
+
 
+def __getattr__(name: str):
+    # `client` (and the openai import behind it) is created on first use, not at import:
+    # most scheduled invocations exit before they need it
+    if name == "client":
+        from openai import OpenAI
 
+        globals()["client"] = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return globals()["client"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
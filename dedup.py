@@ -0,0 +1,94 @@
+"""
+Near-duplicate story detection (SimHash).
+
+Each article gets a 64-bit SimHash over its title words and 3-word shingles
+of the extracted text. Two articles whose fingerprints differ in at most
+NEAR_DUP_MAX_DISTANCE bits are treated as the same story: the first one seen
+becomes the cluster representative, later ones are attached to it and never
+reach the LLM.
+
+Lookups use 8 bands of 8 bits: any two fingerprints within 7 bits of each
+other share at least one band, so only that band's bucket is compared.
+"""
+
+import hashlib
+import re
+import threading
+from typing import Any
+
+from config import NEAR_DUP_MAX_DISTANCE
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_BANDS = 8
+_BAND_BITS = 64 // _BANDS
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def features(title: str, text: str) -> list[str]:
+    title_words = [f"t:{w}" for w in _WORD_RE.findall(title.lower())]
+    words = _WORD_RE.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    return title_words + shingles
+
+
+def simhash(tokens: list[str]) -> int:
+    weights = [0] * 64
+    for tok in tokens:
+        h = _hash64(tok)
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _bands(fp: int) -> list[tuple[int, int]]:
+    mask = (1 << _BAND_BITS) - 1
+    return [(i, (fp >> (i * _BAND_BITS)) & mask) for i in range(_BANDS)]
+
+
+class NearDupIndex:
+    """Thread-safe index of cluster representatives for one run (seeded with stored ones)."""
+
+    def __init__(self, max_distance: int = NEAR_DUP_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._buckets: dict[tuple[int, int], list[tuple[int, dict[str, Any]]]] = {}
+
+    def find_or_add(self, item: dict[str, Any], text: str) -> dict[str, Any] | None:
+        """
+        Return the representative `item` is a near-duplicate of (and attach
+        item's URL to it as item["also"]), or None after registering `item` as
+        a new representative.
+        """
+        fp = simhash(features(item["title"], text))
+        with self._lock:
+            best: tuple[int, dict[str, Any]] | None = None
+            for band in _bands(fp):
+                for other_fp, rep in self._buckets.get(band, []):
+                    d = hamming(fp, other_fp)
+                    if d <= self.max_distance and (best is None or d < best[0]):
+                        best = (d, rep)
+            if best is not None:
+                rep = best[1]
+                rep.setdefault("also", []).append(
+                    {"url": item["url"], "title": item["title"], "topic": item["topic"]}
+                )
+                return rep
+            self._register(fp, item)
+            return None
+
+    def add(self, item: dict[str, Any], text: str) -> None:
+        """Register `item` as a representative without looking it up (e.g. a stored article)."""
+        fp = simhash(features(item["title"], text))
+        with self._lock:
+            self._register(fp, item)
+
+    def _register(self, fp: int, item: dict[str, Any]) -> None:
+        for band in _bands(fp):
+            self._buckets.setdefault(band, []).append((fp, item))
@@ -0,0 +1,308 @@
+"""
+One digest run, once main (lrt_multi_digest.py) knows it is due: feeds ->
+plan -> fetch / extract / summarize -> article store query -> Top-3 -> HTML
+(one document per distinct subscription) -> SMTP, resumable from its checkpoint.
+
+Kept apart from the entry point so the heavy imports (feedparser, trafilatura,
+lxml, requests, openai, numpy) are only paid when a digest is actually sent.
+"""
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from article_store import ArticleStore
+from batch_jobs import BatchJobStore
+from config import (
+    BREAKING_MINUTES,
+    LLM_TIMEOUT_SECONDS,
+    LOCAL_TZ,
+    RUN_DEADLINE_RESERVE_SECONDS,
+    SUMMARY_MODE,
+    TOP3_MODE,
+    TOPICS,
+)
+from email_sender import recipients_from_env, send_html_email_personalized
+from feed_state import FeedStateStore
+from html_builder import DigestFragments
+from metrics import metrics
+from openai_helpers import SUMMARY_TIERS, rerank_top3
+from pipeline import DigestPipeline, plan_work, poll_feeds, select_candidates
+from ranking import rank_items, shortlist, top3_highlights
+from subscriptions import subscriptions_for
+from summary_cache import SummaryCache
+from weather import default_city, get_weather
+
+
+def run_digest(
+    digest_type, date_str, subject, header, subtitle, window_start, window_end, max_per_topic, deadline, checkpoint
+):
+    recipients = recipients_from_env()
+    if not recipients:
+        raise RuntimeError("NEWS_TO_EMAIL is empty. Provide comma-separated recipients.")
+    already_sent = checkpoint.sent()
+    if checkpoint.done("smtp") and already_sent.issuperset(recipients):
+        print("ℹ️ Digest already sent to every recipient by an earlier attempt — nothing to do")
+        return
+
+    rendered = checkpoint.documents() if checkpoint.done("render") else None
+    if rendered is not None and all(r in rendered[1] or r in already_sent for r in recipients):
+        # Same emails as the earlier attempt already sent to some recipients
+        subject, documents = rendered
+        documents = {r: documents[r] for r in recipients if r in documents}
+        print("ℹ️ Digest already rendered by an earlier attempt — sending it")
+    else:
+        fragments, weather_lines = _build_digest(
+            digest_type, date_str, header, subtitle, window_start, window_end, max_per_topic, deadline, checkpoint
+        )
+        # Cards and sections are rendered once; each recipient's document is assembled
+        # from the ones they subscribe to, identical subscriptions share one document
+        subscriptions = subscriptions_for(recipients)
+        with metrics.stage("render"):
+            documents = {
+                r: fragments.document(sub.topics, sub.limits_for(fragments.sections), weather_lines.get(sub.city))
+                for r, sub in subscriptions.items()
+            }
+        metrics.set("render_fragments", fragments.stats)
+        checkpoint.save_documents(subject, documents)
+        checkpoint.complete("render")
+        metrics.incr("html_documents_compacted", fragments.compacted)
+        metrics.incr("html_summaries_shortened", fragments.shortened)
+        metrics.incr("html_cards_dropped", fragments.dropped)
+        if fragments.compacted:
+            print(f"ℹ️ HTML over {fragments.max_bytes / 1024:.0f} KB: {fragments.compacted} document(s) rendered compact")
+        if fragments.shortened or fragments.dropped:
+            print(
+                f"⚠️ HTML over {fragments.max_bytes / 1024:.0f} KB: {fragments.shortened} summaries shortened, "
+                f"{fragments.dropped} cards dropped"
+            )
+    distinct = set(documents.values())
+    html_bytes = max(len(doc.encode("utf-8")) for doc in distinct)
+    metrics.set("email_bodies", len(distinct))
+    metrics.set("html_bytes", html_bytes)
+    print(f"ℹ️ {len(distinct)} distinct digest(s) for {len(documents)} recipient(s), largest {html_bytes / 1024:.1f} KB")
+
+    # file_name = f"lrt_digest_{digest_type}_{date_str}.html"
+    # with open(file_name, "w", encoding="utf-8") as f:
+    #     f.write(html_doc)
+    # print(f"✅ Saved HTML: {file_name}")
+
+    # Send (individual); recipients already sent by an earlier attempt are skipped,
+    # each outcome is checkpointed as soon as it is known
+    with metrics.stage("smtp"):
+        deliveries = send_html_email_personalized(
+            subject, documents, skip=already_sent, on_result=checkpoint.record_delivery
+        )
+    failed = [d for d in deliveries if not d.ok]
+    metrics.incr("emails_sent", len(deliveries) - len(failed))
+    metrics.incr("emails_failed", len(failed))
+    metrics.incr("emails_skipped_already_sent", len(already_sent))
+    if already_sent:
+        print(f"ℹ️ {len(already_sent)} recipient(s) already sent by an earlier attempt — skipped")
+    print(f"✅ Sent to {len(deliveries) - len(failed)}/{len(deliveries)} recipients")
+    for d in failed:
+        print(f"❌ {d.recipient}: {d.code or ''} {d.error} (attempts: {d.attempts})")
+    if not failed:
+        checkpoint.complete("smtp")
+    # print("✅ Done.")
+
+
+def _build_digest(
+    digest_type, date_str, header, subtitle, window_start, window_end, max_per_topic, deadline, checkpoint
+) -> tuple[DigestFragments, dict[str, str]]:
+    now_local = datetime.now(LOCAL_TZ)
+    breaking_delta = timedelta(minutes=BREAKING_MINUTES)
+
+    # Weather (every configured city, one request unless cached) runs alongside the rest
+    weather_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="weather")
+    weather = weather_pool.submit(get_weather)
+
+    # Poll feeds in parallel (conditional GET; unchanged feeds answer 304 and are skipped),
+    # then pick items per topic with time-window filtering + de-dup across topics
+    with metrics.stage("feeds"):
+        with FeedStateStore() as feed_state:
+            polls = poll_feeds(TOPICS, feed_state, deadline)
+    unchanged = sum(1 for p in polls.values() if p.not_modified)
+    new_count = sum(len(p.new_entries) for p in polls.values())
+    metrics.incr("feeds_not_modified", unchanged)
+    metrics.incr("feed_new_entries", new_count)
+    print(f"ℹ️ Feeds: {unchanged}/{len(polls)} unchanged, {new_count} new entries")
+
+    # Plan before fetching anything: all in-window candidates, de-duplicated and
+    # ranked by recency; only the articles each topic still needs are processed,
+    # the rest are spares that replace failed / duplicate ones
+    entries_by_topic = {topic: p.entries for topic, p in polls.items()}
+    candidates = select_candidates(
+        entries_by_topic, window_start, window_end, None, now_local, breaking_delta
+    )
+    metrics.incr("articles_candidates", len(candidates))
+
+    with ArticleStore() as store:
+        with SummaryCache() as cache, metrics.stage("pipeline"):
+            # Batch API jobs submitted ahead (prepare_batch_job): finished results go into
+            # the summary cache, nothing is waited for
+            with BatchJobStore() as batch_jobs:
+                if len(batch_jobs):
+                    collected = batch_jobs.collect(cache)
+                    metrics.incr("summary_batch_job_collected", collected)
+                    print(f"ℹ️ Batch API: {collected} summaries collected, {len(batch_jobs)} job(s) still running")
+            stored = store.get_ready([it["url"] for it in candidates])
+            work, spares = plan_work(candidates, stored, max_per_topic)
+            if checkpoint.done("pipeline"):
+                # Its results are in the store; articles that failed then are not retried now
+                earlier = checkpoint.stage_data("pipeline").get("processed", 0)
+                print(f"ℹ️ Pipeline finished by an earlier attempt ({earlier} processed) — using the article store")
+                work, spares = [], {}
+            metrics.incr("articles_selected", len(work))
+            # Results an earlier attempt of this run already paid for (saved as they finished)
+            recovered = sum(1 for url in checkpoint.articles if url in stored)
+            metrics.incr("checkpoint_articles_recovered", recovered)
+            print(
+                f"ℹ️ Plan: {len(candidates)} candidates, {len(stored)} in article store "
+                f"({recovered} from an earlier attempt), "
+                f"{len(work)} to process, {sum(map(len, spares.values()))} spare"
+            )
+            # Top-3 short list from titles / RSS descriptions: its articles are routed to
+            # the full model. The optional LLM re-rank of it runs alongside the pipeline
+            top3_candidates = shortlist(work + [it for it in candidates if it["url"] in stored], now_local)
+            for it in top3_candidates:
+                it["top3_candidate"] = True
+            rerank_pool = rerank = None
+            if TOP3_MODE == "llm":
+                remaining = deadline.remaining()
+                timeout = LLM_TIMEOUT_SECONDS if remaining is None else min(LLM_TIMEOUT_SECONDS, remaining)
+                rerank_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="top3")
+                rerank = rerank_pool.submit(rerank_top3, top3_candidates, digest_type, timeout)
+
+            def persist(item: dict) -> None:
+                store.save_items([item])
+                checkpoint.record_article(item)
+
+            processed: list[dict] = []
+            if work:
+                summary_mode = SUMMARY_MODE
+                # Leave time for Top-3, HTML and SMTP after the pipeline's own deadline
+                pipeline_deadline = deadline.minus(RUN_DEADLINE_RESERVE_SECONDS)
+                with DigestPipeline(cache=cache, summary_mode=summary_mode, deadline=pipeline_deadline) as pipeline:
+                    # A window story republished under a new URL is a duplicate of its stored copy
+                    metrics.incr("near_dup_seeded", pipeline.seed(stored.values(), store.get_texts(list(stored))))
+                    processed = pipeline.run(work, spares, on_result=persist)
+            checkpoint.complete("pipeline", processed=len(processed))
+            metrics.incr("summary_cache_hits", cache.hits)
+            metrics.incr("summary_cache_misses", cache.misses)
+            print(f"ℹ️ {cache.stats_line()}")
+            print(
+                "ℹ️ Summary routing: "
+                + ", ".join(f"{tier} {metrics.counters[f'summary_tier_{tier}']}" for tier in SUMMARY_TIERS)
+            )
+            print(
+                f"ℹ️ Page cache: {metrics.counters['fetch_cache_hits']} fresh, "
+                f"{metrics.counters['fetch_cache_revalidated']} revalidated, "
+                f"{metrics.counters['fetch_cache_stale_served']} stale served"
+            )
+
+        # Work avoided compared to the old sequential run, which fetched and summarized
+        # the first max_per_topic in-window entries of every topic
+        baseline = sum(min(n, max_per_topic) for n in Counter(it["topic"] for it in candidates).values())
+        summarized = sum(
+            1
+            for it in processed
+            if it["status"] in ("summarized", "summary_error", "fallback") and it.get("summary_tier") != "local"
+        )
+        fetches_avoided = max(0, baseline - len(processed))
+        llm_calls_avoided = max(0, baseline - summarized)
+        metrics.incr("plan_fetches_avoided", fetches_avoided)
+        metrics.incr("plan_llm_calls_avoided", llm_calls_avoided)
+        print(
+            f"ℹ️ Avoided: {fetches_avoided} fetches, {llm_calls_avoided} LLM calls of {baseline} "
+            f"({metrics.counters['plan_backfilled']} backfilled)"
+        )
+
+        # Undated entries are placed at the time they were stored, i.e. just after window_end
+        with metrics.stage("store_query"):
+            query_end = max(window_end, datetime.now(LOCAL_TZ))
+            # Near-duplicates come back attached to their representative's card
+            flat_items = store.query_window(
+                window_start, query_end, list(TOPICS), max_per_topic, now_local, breaking_delta
+            )
+        store.prune()
+
+    before = metrics.counters["reduce_tokens_before"]
+    after = metrics.counters["reduce_tokens_after"]
+    print(f"ℹ️ LLM input tokens (est.): {before} -> {after} ({before - after} saved by reduction)")
+
+    # Stories other topics also carried (same URL) count towards Top-3 coverage
+    cross_topics = {it["url"]: it["cross_topics"] for it in candidates}
+    for item in flat_items:
+        item["cross_topics"] = cross_topics.get(item["url"], [])
+
+    processed_urls = {it["url"] for it in processed}
+    for item in processed + [it for it in flat_items if it["url"] not in processed_urls]:
+        metrics.record_article(item)
+
+    sections: dict[str, list[dict]] = {t: [] for t in TOPICS.keys()}
+    for item in flat_items:
+        sections[item["topic"]].append(item)
+
+    # Top 3 highlights: local ranking over every collected item; with TOP3_MODE=llm
+    # the LLM's picks (if back in time) come first. For midday, this reflects "new since 07:00".
+    with metrics.stage("top3"):
+        reranked = None
+        if rerank is not None:
+            try:
+                reranked = rerank.result(timeout=deadline.remaining())
+            except Exception:
+                reranked = None
+            rerank_pool.shutdown(wait=False, cancel_futures=True)
+        metrics.set("top3_source", "llm" if reranked else "local")
+        top3 = top3_highlights(flat_items, now_local, reranked)
+        # The HTML byte budget shortens / drops the lowest-ranked cards first
+        for rank, i in enumerate(rank_items(flat_items, now_local)):
+            flat_items[i]["rank"] = rank
+
+    # Optional weather: whatever is back by the run deadline
+    with metrics.stage("weather"):
+        try:
+            weather_lines = weather.result(timeout=deadline.remaining())
+        except Exception:
+            weather_lines = {}
+        weather_pool.shutdown(wait=False, cancel_futures=True)
+
+    fragments = DigestFragments(date_str, header, subtitle, sections, top3, weather_lines.get(default_city()))
+    return fragments, weather_lines
+
+
+def prepare_batch_job(digest_type, window_start, window_end, max_per_topic, deadline) -> int:
+    """
+    Ahead of a SUMMARY_BATCH_JOB_DIGESTS digest (lrt_multi_digest.py --prepare):
+    plan its articles as the send will and submit the ones without a summary as
+    a Batch API job (BatchJobStore), collected when the digest is sent. Returns
+    how many articles were submitted.
+    """
+    now_local = datetime.now(LOCAL_TZ)
+    with FeedStateStore() as feed_state:
+        polls = poll_feeds(TOPICS, feed_state, deadline)
+    entries_by_topic = {topic: p.entries for topic, p in polls.items()}
+    candidates = select_candidates(
+        entries_by_topic, window_start, window_end, None, now_local, timedelta(minutes=BREAKING_MINUTES)
+    )
+    processed: list[dict] = []
+    with ArticleStore() as store, SummaryCache() as cache, BatchJobStore() as batch_jobs:
+        stored = store.get_ready([it["url"] for it in candidates])
+        work, spares = plan_work(candidates, stored, max_per_topic)
+        # Articles of a job still pending (an earlier --prepare) are not submitted twice
+        pending = batch_jobs.pending_urls()
+        work = [it for it in work if it["url"] not in pending]
+        spares = {topic: [it for it in items if it["url"] not in pending] for topic, items in spares.items()}
+        if work:
+            with DigestPipeline(
+                cache=cache, summary_mode="batch_job", deadline=deadline, batch_jobs=batch_jobs
+            ) as pipeline:
+                pipeline.seed(stored.values(), store.get_texts(list(stored)))
+                processed = pipeline.run(work, spares)
+    submitted = sum(1 for it in processed if it["status"] == "submitted")
+    print(
+        f"ℹ️ {digest_type}: {len(candidates)} candidates, {len(stored)} in article store, "
+        f"{submitted} submitted to the Batch API ({len(pending)} already pending)"
+    )
+    return submitted
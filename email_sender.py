@@ -1,47 +1,265 @@
 import os
+import queue
+import random
 import smtplib
 import ssl
+import threading
+import time
+from dataclasses import dataclass
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.policy import compat32
+from typing import Callable, Mapping
 
+# Same header encoding as Message.as_string(), but with CRLF line endings for SMTP
+_WIRE_POLICY = compat32.clone(linesep="\r\n")
 
-def send_html_email_individual(subject: str, html_doc: str) -> None:
+
+@dataclass
+class SmtpSettings:
+    host: str
+    port: int
+    user: str
+    password: str
+    from_email: str
+    starttls: bool = True
+    connections: int = 4
+    rate_per_connection: float = 5.0  # messages / second / connection (0 = unlimited)
+    max_attempts: int = 3
+
+
+@dataclass
+class DeliveryResult:
+    recipient: str
+    ok: bool
+    attempts: int
+    code: int | None = None
+    error: str = ""
+
+
+def recipients_from_env() -> list[str]:
     to_emails_raw = os.getenv("NEWS_TO_EMAIL", "")
     recipients = [e.strip() for e in to_emails_raw.split(",") if e.strip()]
-    recipients = list(dict.fromkeys(recipients))  # preserve order, remove duplicates
+    return list(dict.fromkeys(recipients))  # preserve order, remove duplicates
 
+
+def smtp_settings_from_env() -> SmtpSettings:
     from_email = (os.getenv("NEWS_FROM_EMAIL") or "").strip()
     host = (os.getenv("NEWS_SMTP_HOST") or "smtp.gmail.com").strip()
     port = int((os.getenv("NEWS_SMTP_PORT") or "587").strip())
+    starttls = (os.getenv("NEWS_SMTP_STARTTLS") or "1").strip() not in ("0", "false", "False")
     user = (os.getenv("NEWS_SMTP_USER") or "").strip()
 
     password = (os.getenv("NEWS_SMTP_PASS") or "")
     password = password.strip().replace(" ", "").replace("\u00a0", "")
 
-    if not recipients:
-        raise RuntimeError("NEWS_TO_EMAIL is empty. Provide comma-separated recipients.")
     if not all([from_email, user, password]):
         raise RuntimeError("Missing NEWS_FROM_EMAIL / NEWS_SMTP_USER / NEWS_SMTP_PASS env vars.")
     if from_email != user:
         raise RuntimeError("For Gmail SMTP, set NEWS_FROM_EMAIL equal to NEWS_SMTP_USER.")
 
-    ctx = ssl.create_default_context()
+    return SmtpSettings(
+        host=host,
+        port=port,
+        user=user,
+        password=password,
+        from_email=from_email,
+        starttls=starttls,
+        connections=int(os.getenv("NEWS_SMTP_CONNECTIONS", "4")),
+        rate_per_connection=float(os.getenv("NEWS_SMTP_RATE", "5")),
+        max_attempts=int(os.getenv("NEWS_SMTP_MAX_ATTEMPTS", "3")),
+    )
 
-    with smtplib.SMTP(host, port, timeout=30) as server:
-        server.ehlo()
-        server.starttls(context=ctx)
+
+def encode_message(subject: str, from_email: str, html_doc: str) -> bytes:
+    """
+    Build and encode the message once, without a To header. Each recipient's
+    copy is this body with their own "To:" line prepended (see `with_recipient`).
+    """
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = from_email
+    msg.attach(MIMEText("Peržiūrėkite šį laišką HTML režimu.", "plain", "utf-8"))
+    msg.attach(MIMEText(html_doc, "html", "utf-8"))
+    return msg.as_bytes(policy=_WIRE_POLICY)
+
+
+def with_recipient(body: bytes, recipient: str) -> bytes:
+    return b"To: " + recipient.encode("ascii", errors="replace") + b"\r\n" + body
+
+
+def _connect(settings: SmtpSettings) -> smtplib.SMTP:
+    server = smtplib.SMTP(settings.host, settings.port, timeout=30)
+    try:
         server.ehlo()
-        server.login(user, password)
+        if settings.starttls:
+            server.starttls(context=ssl.create_default_context())
+            server.ehlo()
+        server.login(settings.user, settings.password)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def _smtp_code(ex: Exception) -> int | None:
+    if isinstance(ex, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in ex.recipients.values()]
+        return codes[0] if codes else None
+    return getattr(ex, "smtp_code", None)
+
 
-        for recipient in recipients:
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = from_email
-            msg["To"] = recipient
+def _drop(server: smtplib.SMTP | None) -> None:
+    if server is not None:
+        try:
+            server.close()
+        except OSError:
+            pass
+    return None
 
-            msg.attach(MIMEText("Peržiūrėkite šį laišką HTML režimu.", "plain", "utf-8"))
-            msg.attach(MIMEText(html_doc, "html", "utf-8"))
 
-            server.sendmail(from_email, [recipient], msg.as_string())
-            print(f"✅ Sent to {recipient}")
+def _send_worker(
+    settings: SmtpSettings,
+    pending: "queue.Queue[str]",
+    bodies: Mapping[str, bytes],
+    results: dict[str, DeliveryResult],
+    server: smtplib.SMTP | None = None,
+    on_result: Callable[[DeliveryResult], None] | None = None,
+) -> None:
+    """One SMTP connection: sends queued recipients, rate-limited, reconnecting on drops."""
+    min_interval = 1.0 / settings.rate_per_connection if settings.rate_per_connection > 0 else 0.0
+    last_send = 0.0
+    try:
+        while True:
+            try:
+                recipient = pending.get_nowait()
+            except queue.Empty:
+                return
+
+            attempt = 0
+            while True:
+                attempt += 1
+                wait = last_send + min_interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    if server is None:
+                        server = _connect(settings)
+                    last_send = time.monotonic()
+                    server.sendmail(settings.from_email, [recipient], with_recipient(bodies[recipient], recipient))
+                    results[recipient] = DeliveryResult(recipient, True, attempt, 250)
+                    break
+                except smtplib.SMTPServerDisconnected as ex:
+                    server = _drop(server)
+                    code, error, retryable = None, str(ex), True
+                except smtplib.SMTPException as ex:
+                    code = _smtp_code(ex)
+                    error = str(ex)
+                    retryable = code is not None and 400 <= code < 500
+                    if isinstance(ex, smtplib.SMTPAuthenticationError):
+                        retryable = False
+                    elif code == 421:  # service closing the channel
+                        server = _drop(server)
+                except OSError as ex:
+                    # Socket-level failure (reset, timeout): reconnect on the next attempt
+                    server = _drop(server)
+                    code, error, retryable = None, str(ex), True
+
+                if not retryable or attempt >= settings.max_attempts:
+                    results[recipient] = DeliveryResult(recipient, False, attempt, code, error)
+                    break
+                time.sleep(random.uniform(0.5, 1.0) * (2 ** (attempt - 1)))
+            if on_result is not None:
+                on_result(results[recipient])
+    finally:
+        if server is not None:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+
+def send_bulk(
+    subject: str,
+    html_doc: str,
+    recipients: list[str],
+    settings: SmtpSettings,
+    skip: set[str] | frozenset[str] = frozenset(),
+    on_result: Callable[[DeliveryResult], None] | None = None,
+) -> list[DeliveryResult]:
+    """Send the same digest to every recipient (see `send_documents`)."""
+    return send_documents(subject, {r: html_doc for r in recipients}, settings, skip, on_result)
+
+
+def send_documents(
+    subject: str,
+    documents: Mapping[str, str],
+    settings: SmtpSettings,
+    skip: set[str] | frozenset[str] = frozenset(),
+    on_result: Callable[[DeliveryResult], None] | None = None,
+) -> list[DeliveryResult]:
+    """
+    Send each recipient their document (recipient -> HTML; one message each)
+    over a pool of SMTP connections. Recipients with the same document share
+    one encoded body. Temporary (4xx) failures and dropped sessions are retried;
+    returns one DeliveryResult per recipient, in input order.
+
+    Recipients in `skip` (e.g. already sent by an earlier attempt of the run)
+    are left out. `on_result` is called from the sending threads as soon as a
+    recipient's outcome is final, so it can be checkpointed.
+    """
+    recipients = [r for r in documents if r not in skip]
+    if not recipients:
+        return []
+    encoded: dict[str, bytes] = {}
+    bodies: dict[str, bytes] = {}
+    for r in recipients:
+        html_doc = documents[r]
+        if html_doc not in encoded:
+            encoded[html_doc] = encode_message(subject, settings.from_email, html_doc)
+        bodies[r] = encoded[html_doc]
+
+    pending: "queue.Queue[str]" = queue.Queue()
+    for r in recipients:
+        pending.put(r)
+    results: dict[str, DeliveryResult] = {}
+
+    # Open the first connection here, so bad credentials / host fail the run loudly
+    first = _connect(settings)
+    workers = [
+        threading.Thread(
+            target=_send_worker,
+            args=(settings, pending, bodies, results, first if i == 0 else None, on_result),
+            daemon=True,
+        )
+        for i in range(max(1, min(settings.connections, len(recipients))))
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    return [results.get(r) or DeliveryResult(r, False, 0, error="not attempted") for r in recipients]
+
+
+def send_html_email_individual(
+    subject: str,
+    html_doc: str,
+    skip: set[str] | frozenset[str] = frozenset(),
+    on_result: Callable[[DeliveryResult], None] | None = None,
+) -> list[DeliveryResult]:
+    recipients = recipients_from_env()
+    if not recipients:
+        raise RuntimeError("NEWS_TO_EMAIL is empty. Provide comma-separated recipients.")
+    settings = smtp_settings_from_env()
+    return send_bulk(subject, html_doc, recipients, settings, skip, on_result)
+
 
+def send_html_email_personalized(
+    subject: str,
+    documents: Mapping[str, str],
+    skip: set[str] | frozenset[str] = frozenset(),
+    on_result: Callable[[DeliveryResult], None] | None = None,
+) -> list[DeliveryResult]:
+    settings = smtp_settings_from_env()
+    return send_documents(subject, documents, settings, skip, on_result)
@@ -0,0 +1,160 @@
+"""
+Conditional RSS polling with a small on-disk feed state store (JSON).
+
+Per feed we keep the ETag / Last-Modified validators and the recently seen
+entries. Polls send conditional
+requests, so an unchanged feed answers 304 and is neither downloaded nor parsed.
+Feeds are downloaded through the fetcher's shared session with a timeout (at
+most the time left to the run deadline) and only then handed to feedparser; a
+feed that fails or times out keeps serving its stored entries.
+For a changed feed only entries whose ID is not stored yet are normalized and
+reported as new, however late or backdated their pubDate. Entries are kept for
+FEED_STATE_RETENTION_HOURS (so a digest window still sees entries from earlier
+polls); that is also the only time bound: an unseen entry older than it is
+ignored, as it would be pruned again and reported as new on every poll.
+"""
+
+import calendar
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import feedparser
+import requests
+
+from config import FEED_STATE_PATH, FEED_STATE_RETENTION_HOURS, FEED_TIMEOUT_SECONDS, FETCH_CONNECT_TIMEOUT
+from fetcher import MIN_TIMEOUT_SECONDS, get_session
+
+
+@dataclass
+class FeedPoll:
+    url: str
+    status: int | None
+    # All retained entries (feed order), including ones seen in earlier polls
+    entries: list[dict[str, Any]] = field(default_factory=list)
+    # Entries first seen in this poll
+    new_entries: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+def _entry_ts(entry: dict[str, Any]) -> float | None:
+    st = entry.get("published_parsed")
+    return float(calendar.timegm(tuple(st))) if st else None
+
+
+def normalize_entry(e: Any) -> dict[str, Any]:
+    """feedparser entry -> plain JSON-serializable dict."""
+    st = e.get("published_parsed") or e.get("updated_parsed")
+    link = e.get("link")
+    return {
+        "id": e.get("id") or link,
+        "title": e.get("title") or link or "",
+        "link": link,
+        "description": e.get("summary") or "",
+        "published_parsed": list(st[:6]) if st else None,
+    }
+
+
+class FeedStateStore:
+    def __init__(self, path: str = FEED_STATE_PATH, retention_hours: float = FEED_STATE_RETENTION_HOURS):
+        self.path = path
+        self.retention_seconds = retention_hours * 3600
+        self._lock = threading.Lock()
+        self._state: dict[str, dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                self._state = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+    def save(self) -> None:
+        dir_name = os.path.dirname(self.path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._state, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def stored(self, url: str) -> FeedPoll:
+        """The feed's stored entries, without polling (e.g. its poll missed the deadline)."""
+        with self._lock:
+            entries = list((self._state.get(url) or {}).get("entries") or [])
+        return FeedPoll(url, None, entries=entries)
+
+    def poll(self, url: str, timeout: float | None = None) -> FeedPoll:
+        """
+        Conditionally fetch one feed and merge it into the stored state. `timeout`
+        (e.g. the time left to the run deadline) caps FEED_TIMEOUT_SECONDS.
+        """
+        with self._lock:
+            prev = dict(self._state.get(url) or {})
+        stored = prev.get("entries") or []
+
+        headers = {}
+        if prev.get("etag"):
+            headers["If-None-Match"] = prev["etag"]
+        if prev.get("modified"):
+            headers["If-Modified-Since"] = prev["modified"]
+        timeout = max(MIN_TIMEOUT_SECONDS, FEED_TIMEOUT_SECONDS if timeout is None else min(FEED_TIMEOUT_SECONDS, timeout))
+        try:
+            r = get_session().get(url, headers=headers, timeout=(min(FETCH_CONNECT_TIMEOUT, timeout), timeout))
+            status = r.status_code
+            # 304: keep serving what we already have
+            if status == 304:
+                return FeedPoll(url, status, entries=stored)
+            r.raise_for_status()
+        except requests.RequestException:
+            return FeedPoll(url, None, entries=stored)
+
+        feed = feedparser.parse(r.content, response_headers={k.lower(): v for k, v in r.headers.items()})
+        if not feed.entries:
+            return FeedPoll(url, status, entries=stored)
+
+        now = time.time()
+        cutoff = now - self.retention_seconds
+        stored_by_id = {e["id"]: e for e in stored}
+        taken: set[str] = set()
+        current: list[dict[str, Any]] = []
+        new_entries: list[dict[str, Any]] = []
+        for raw in feed.entries:
+            entry_id = raw.get("id") or raw.get("link")
+            if not entry_id or entry_id in taken:
+                continue
+            taken.add(entry_id)
+            if entry_id in stored_by_id:
+                current.append(stored_by_id.pop(entry_id))
+                continue
+            entry = normalize_entry(raw)
+            ts = _entry_ts(entry)
+            if ts is not None and ts < cutoff:
+                continue
+            entry["seen_at"] = now
+            current.append(entry)
+            new_entries.append(entry)
+
+        # Feed order for entries still in the feed, then older ones that dropped off it
+        dropped = sorted(stored_by_id.values(), key=lambda e: _entry_ts(e) or 0.0, reverse=True)
+        merged = [e for e in current + dropped if (_entry_ts(e) or e["seen_at"]) >= cutoff]
+
+        with self._lock:
+            self._state[url] = {
+                "etag": r.headers.get("ETag"),
+                "modified": r.headers.get("Last-Modified"),
+                "entries": merged,
+            }
+        return FeedPoll(url, status, entries=merged, new_entries=new_entries)
@@ -1,15 +1,230 @@
+import random
+import re
+import threading
+import time
+
+import charset_normalizer
+import lxml.html
 import requests
 import trafilatura
+from requests.adapters import HTTPAdapter
+
+from config import (
+    EXTRACT_FAST_PATH,
+    FETCH_BACKOFF_SECONDS,
+    FETCH_CACHE_ENABLED,
+    FETCH_CONNECT_TIMEOUT,
+    FETCH_DEADLINE_SECONDS,
+    FETCH_MAX_BYTES,
+    FETCH_POOL_SIZE,
+    FETCH_READ_TIMEOUT,
+    FETCH_REPLAY_ONLY,
+    FETCH_RETRIES,
+)
+from http_cache import CachedPage, HttpCache, storable
+from metrics import metrics
+
+USER_AGENT = "Mozilla/5.0 (lrt-digest)"
+MIN_TEXT_CHARS = 200  # below this, extracted text is not trusted
+MIN_TIMEOUT_SECONDS = 0.1  # requests rejects a timeout <= 0; a nearly spent deadline still gets this much
+RETRY_STATUSES = {500, 502, 503, 504}
+RETRY_EXCEPTIONS = (
+    requests.Timeout,
+    requests.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.HTTPError,
+)
+
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_page_cache: HttpCache | None = None
+
+
+class ResponseTooLarge(requests.RequestException):
+    pass
+
+
+class NotInReplayCache(requests.RequestException):
+    """FETCH_REPLAY_ONLY is set and the page was never stored."""
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session (one connection pool per host, sized for the fetch stage)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=FETCH_POOL_SIZE, max_retries=0)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+            _session = s
+        return _session
+
+
+def get_page_cache() -> HttpCache | None:
+    """Shared on-disk page cache (None when FETCH_CACHE_ENABLED is off and not replaying)."""
+    global _page_cache
+    if not (FETCH_CACHE_ENABLED or FETCH_REPLAY_ONLY):
+        return None
+    with _session_lock:
+        if _page_cache is None:
+            _page_cache = HttpCache()
+        return _page_cache
+
+
+def _read_capped(r: requests.Response, max_bytes: int, deadline: float | None = None) -> bytes:
+    declared = r.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise ResponseTooLarge(f"{r.url}: {declared} bytes > {max_bytes}")
+    chunks: list[bytes] = []
+    size = 0
+    for chunk in r.iter_content(chunk_size=64 * 1024):
+        size += len(chunk)
+        if size > max_bytes:
+            raise ResponseTooLarge(f"{r.url}: body exceeds {max_bytes} bytes")
+        # The read timeout is per socket read; a slow trickle must not outlive the deadline
+        if deadline is not None and time.monotonic() > deadline:
+            raise requests.Timeout(f"{r.url}: deadline exceeded while reading body")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _decode(body: bytes, content_type: str) -> str:
+    """Use the declared charset when present; only fall back to detection if needed."""
+    m = _CHARSET_RE.search(content_type or "")
+    if m:
+        try:
+            return body.decode(m.group(1), errors="replace")
+        except LookupError:
+            pass
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        best = charset_normalizer.from_bytes(body).best()
+        return str(best) if best is not None else body.decode("utf-8", errors="replace")
 
 
 def fetch_html(url: str) -> str:
-    r = requests.get(url, timeout=30, headers={"User-Agent": "Mozilla/5.0 (lrt-digest)"})
-    r.raise_for_status()
-    r.encoding = r.apparent_encoding or "utf-8"
-    return r.text
+    """
+    GET through the on-disk page cache (http_cache): a fresh stored page is
+    returned as is, a stale one is revalidated (304 -> stored body) and served
+    stale if the site cannot be reached. With FETCH_REPLAY_ONLY the network is
+    never used.
 
+    Network requests use keep-alive pooling and compression. Timeouts,
+    connection errors and 5xx are retried with jittered exponential backoff;
+    the body is capped at FETCH_MAX_BYTES while streaming. The whole call,
+    retries included, gives up after FETCH_DEADLINE_SECONDS.
+    """
+    metrics.incr("fetch_requests")
+    cache = get_page_cache()
+    page = cache.get(url) if cache is not None else None
+    if FETCH_REPLAY_ONLY:
+        if page is None:
+            raise NotInReplayCache(f"{url}: not in the page cache (FETCH_REPLAY_ONLY)")
+        metrics.incr("fetch_cache_hits")
+        return _decode(page.body, page.headers.get("content-type", ""))
+    if page is not None and page.is_fresh():
+        metrics.incr("fetch_cache_hits")
+        return _decode(page.body, page.headers.get("content-type", ""))
 
-def extract_text(article_html: str) -> str:
+    try:
+        return _fetch_network(url, cache, page)
+    except RETRY_EXCEPTIONS as ex:
+        # RFC 9111 4.2.4: a stale page beats no page when the origin is unreachable
+        status = ex.response.status_code if getattr(ex, "response", None) is not None else None
+        if page is None or not page.may_serve_stale or (status is not None and status < 500):
+            raise
+        metrics.incr("fetch_cache_stale_served")
+        return _decode(page.body, page.headers.get("content-type", ""))
+
+
+def cached_html(url: str) -> str | None:
+    """The page cache's copy of `url`, whatever its age, without touching the network (None if not stored)."""
+    cache = get_page_cache()
+    page = cache.get(url) if cache is not None else None
+    return _decode(page.body, page.headers.get("content-type", "")) if page is not None else None
+
+
+def _fetch_network(url: str, cache: HttpCache | None, page: CachedPage | None) -> str:
+    session = get_session()
+    headers = page.validators() if page is not None else {}
+    deadline = time.monotonic() + FETCH_DEADLINE_SECONDS
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout(f"{url}: deadline exceeded before attempt {attempt + 1}")
+        timeout = (
+            max(MIN_TIMEOUT_SECONDS, min(FETCH_CONNECT_TIMEOUT, remaining)),
+            max(MIN_TIMEOUT_SECONDS, min(FETCH_READ_TIMEOUT, remaining)),
+        )
+        try:
+            with session.get(url, headers=headers, timeout=timeout, stream=True) as r:
+                if r.status_code == 304 and page is not None:
+                    page = cache.refresh(page, r.headers)
+                    metrics.incr("fetch_cache_revalidated")
+                    return _decode(page.body, page.headers.get("content-type", ""))
+                if r.status_code in RETRY_STATUSES and attempt < FETCH_RETRIES:
+                    raise requests.HTTPError(f"{r.status_code} Server Error for url: {url}", response=r)
+                r.raise_for_status()
+                body = _read_capped(r, FETCH_MAX_BYTES, deadline)
+                metrics.incr("fetch_bytes", len(body))
+                if cache is not None and storable(headers, r.status_code, r.headers):
+                    cache.put(url, r.headers, body)
+                return _decode(body, r.headers.get("Content-Type", ""))
+        except RETRY_EXCEPTIONS as ex:
+            status = ex.response.status_code if getattr(ex, "response", None) is not None else None
+            retryable = status is None or status in RETRY_STATUSES
+            if not retryable or attempt >= FETCH_RETRIES:
+                raise
+            # Full jitter: sleep somewhere in [0, base * 2^attempt]
+            backoff = random.uniform(0, FETCH_BACKOFF_SECONDS * (2 ** attempt))
+            if time.monotonic() + backoff >= deadline:
+                raise
+        time.sleep(backoff)
+        attempt += 1
+        metrics.incr("fetch_retries")
+
+
+# lrt.lt article template: body paragraphs live inside div.article-content
+# (newer pages wrap them in div.article-block__content)
+_LRT_BODY_XPATH = (
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' article-content ')"
+    " or contains(concat(' ', normalize-space(@class), ' '), ' article-block__content ')]"
+    "//p[not(ancestor::figure) and not(ancestor::aside)]"
+)
+
+
+def extract_text_lrt(article_html: str) -> str:
+    """Fast path for LRT article pages: paragraphs from the known body container."""
+    try:
+        doc = lxml.html.fromstring(article_html)
+    except (ValueError, lxml.etree.ParserError):
+        return ""
+    paragraphs: list[str] = []
+    for p in doc.xpath(_LRT_BODY_XPATH):
+        line = " ".join(p.text_content().split())
+        if line and line not in paragraphs:
+            paragraphs.append(line)
+    return "\n".join(paragraphs)
+
+
+def extract_text_trafilatura(article_html: str) -> str:
     text = trafilatura.extract(article_html, include_comments=False, include_tables=False)
     return (text or "").strip()
 
+
+def extract_text(article_html: str) -> str:
+    """
+    CPU-bound; runs in the pipeline's process pool. Tries the LRT fast path first
+    and falls back to trafilatura when it yields less than MIN_TEXT_CHARS.
+    """
+    if EXTRACT_FAST_PATH:
+        text = extract_text_lrt(article_html)
+        if len(text) >= MIN_TEXT_CHARS:
+            return text
+    return extract_text_trafilatura(article_html)
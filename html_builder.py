@@ -1,19 +1,21 @@
+from collections import Counter
 import html as html_lib
 import re
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable, Mapping
 
-from config import LOCAL_TZ
+from config import HTML_MAX_BYTES, HTML_RENDER_MODE, HTML_SHORT_SUMMARY_BULLETS, LOCAL_TZ
 
 
 def esc(s: str) -> str:
     return html_lib.escape(s or "", quote=True)
 
 
-def summary_to_html_list(summary: str) -> str:
+def summary_to_html_list(summary: str, max_bullets: int | None = None) -> str:
     lines = [l.strip("-• ").strip() for l in summary.splitlines() if l.strip()]
     if not lines:
         return esc(summary)
+    lines = lines[:max_bullets]
     items = "".join(f"<li style='margin-bottom: 6px;'>{esc(line)}</li>" for line in lines)
     return f"<ul style='margin: 8px 0 0 18px; padding: 0;'>{items}</ul>"
 
@@ -23,31 +25,26 @@ def link_domain(url: str) -> str:
     return m.group(1) if m else ""
 
 
-def build_html(
-    date_str: str,
-    header: str,
-    subtitle: str,
-    sections: dict[str, list[dict[str, Any]]],
-    top3: list[str],
-    weather_line: str | None,
-) -> str:
-    sections_html: list[str] = []
-    for topic, items in sections.items():
-        if not items:
-            continue
-        cards: list[str] = []
-        for it in items:
-            badge = ""
-            if it.get("is_breaking"):
-                badge = f"<span style='background: #0b3d91; color: #fff; padding: 3px 8px; font-size: 11px; font-weight: bold; border-radius: 999px; margin-right: 8px;'>NAUJA</span>"
-
-            published = esc(it.get("published_local_str", ""))
-            domain = esc(link_domain(it["url"]))
-            summary = summary_to_html_list(it["summary"])
-            
-            card_bg = "#ffffff"
-            cards.append(
-                f"""
+def render_card(topic: str, it: dict[str, Any], max_bullets: int | None = None) -> str:
+    """One article card (a pair of table rows) of a topic section; `max_bullets` shortens the summary."""
+    badge = ""
+    if it.get("is_breaking"):
+        badge = "<span style='background: #0b3d91; color: #fff; padding: 3px 8px; font-size: 11px; font-weight: bold; border-radius: 999px; margin-right: 8px;'>NAUJA</span>"
+
+    published = esc(it.get("published_local_str", ""))
+    domain = esc(link_domain(it["url"]))
+    summary = summary_to_html_list(it["summary"], max_bullets)
+
+    also_html = ""
+    if it.get("also"):
+        also_links = ", ".join(
+            f'<a href="{esc(a["url"])}" style="color: #6b7280;">{esc(a["topic"])}</a>'
+            for a in it["also"]
+        )
+        also_html = f'<div style="margin-top: 4px; color: #6b7280; font-size: 12px; line-height: 1.5;">Taip pat: {also_links}</div>'
+
+    card_bg = "#ffffff"
+    return f"""
                 <tr>
                   <td style="background: {card_bg}; border: 1px solid #e5e7eb; padding: 16px; vertical-align: top; border-radius:14px;">
                     <div style="margin: 0; font-size: 17px; font-weight: bold; color: #111827; line-height: 1.4;">
@@ -56,6 +53,7 @@ def build_html(
                     <div style="margin-top: 6px; color: #6b7280; font-size: 13px; line-height: 1.5;">
                       {published} &bull; {esc(topic)} &bull; <a href="{esc(it['url'])}" style="color: #6b7280; text-decoration: none; border-bottom: 1px dotted #6b7280;">Skaityti {domain}</a>
                     </div>
+                    {also_html}
                     <div style="margin-top: 10px; font-size: 15px; color: #111827; line-height: 1.6;">
                       {summary}
                     </div>
@@ -65,18 +63,19 @@ def build_html(
                   <td style="height: 10px; line-height: 10px; font-size: 10px;">&nbsp;</td>
                 </tr>
                 """
-            )
-        
-        cards_row = "".join(cards)
-        sections_html.append(
-            f"""
+
+
+def render_section(topic: str, cards: list[str], count: int | None = None) -> str:
+    """A topic heading with its already rendered cards (`count` overrides the number shown)."""
+    cards_row = "".join(cards)
+    return f"""
             <tr>
               <td style="padding: 16px 16px 0 16px;">
                 <table width="100%" cellpadding="0" cellspacing="0" border="0" >
                   <tr>
                     <td style="padding-bottom: 10px;">
                       <span style="font-size: 16px; font-weight: bold; color: #111827;">{esc(topic)}</span>
-                      <span style="color: #6b7280; font-size: 13px; margin-left: 8px;">{len(items)} vnt.</span>
+                      <span style="color: #6b7280; font-size: 13px; margin-left: 8px;">{len(cards) if count is None else count} vnt.</span>
                     </td>
                   </tr>
                   <tr>
@@ -90,8 +89,9 @@ def build_html(
               </td>
             </tr>
             """
-        )
 
+
+def render_top3(top3: list[str]) -> str:
     top3_html = ""
     if top3:
         top3_items = "".join(
@@ -124,7 +124,20 @@ def build_html(
           </td>
         </tr>
         """
+    return top3_html
+
 
+def render_document(
+    date_str: str,
+    header: str,
+    subtitle: str,
+    top3_html: str,
+    sections_html: list[str],
+    weather_line: str | None,
+    generated_at: str,
+    css: str = "",
+) -> str:
+    """The whole email around already rendered Top-3 and topic sections; `css` goes into a <style> block."""
     weather_td = ""
     if weather_line:
         weather_td = f"""<span style="display: inline-block; background: #fff; border: 1px solid #e5e7eb; padding: 6px 10px; border-radius: 999px; margin-top: 8px;">
@@ -142,8 +155,7 @@ def build_html(
         </tr>
         """
     )
-
-    generated_at = datetime.now(LOCAL_TZ).strftime("%Y-%m-%d %H:%M")
+    style_block = f'<style type="text/css">{css}</style>' if css else ""
 
     return f"""<!DOCTYPE html>
 <html lang="lt">
@@ -151,6 +163,7 @@ def build_html(
   <meta charset="utf-8">
   <meta name="viewport" content="width=device-width, initial-scale=1">
   <title>{esc(header)}</title>
+  {style_block}
   <!--[if mso]>
   <style type="text/css">
     body, table, td {{ font-family: Arial, Helvetica, sans-serif !important; }}
@@ -222,3 +235,239 @@ def build_html(
 </body>
 </html>
 """
+
+
+_STYLE_ATTR_RE = re.compile(r"""style=(["'])(.*?)\1""")
+_CSS_SPACE_RE = re.compile(r"\s*([:;,])\s*")
+_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+# Whitespace around these tags is not rendered
+_BLOCK_TAG_RE = re.compile(r" ?(</?(?:html|head|meta|title|style|body|table|tr|td|div|p|ul|li)\b[^>]*>) ?")
+
+
+def minify_html(doc: str) -> str:
+    """Drop comments (not Outlook's conditional ones) and whitespace that does not render."""
+    doc = _COMMENT_RE.sub("", doc)
+    doc = " ".join(doc.split())
+    return _BLOCK_TAG_RE.sub(_tag_only, doc)
+
+
+def _tag_only(m: re.Match) -> str:
+    return m.group(1)
+
+
+# Stands in for already finished fragments while a surrounding template is finished
+_SLOT = "\x00"
+
+
+def _size(fragment: str) -> int:
+    return len(fragment.encode("utf-8"))
+
+
+class DigestFragments:
+    """
+    One digest's HTML, rendered piecewise for per-recipient documents: every
+    article card and topic section is rendered once and cached; `document`
+    only concatenates the fragments a recipient subscribes to. Selections that
+    come out the same (e.g. a limit above the topic's article count) return
+    the same cached document.
+
+    mode "compact" replaces the fragments' inline styles with classes declared
+    once in the document's <style> block and minifies the whitespace. In mode
+    "inline" only a document over `max_bytes` is rendered compact (some mail
+    clients drop <style>). A compact document still over `max_bytes` is cut
+    down card by card from the lowest-ranked one (item "rank", 0 = best;
+    unranked cards go first): its summary is shortened to `short_bullets`
+    bullets and, if that is not enough, the card is dropped, so no card is
+    shortened while a lower-ranked one is still shown.
+    """
+
+    def __init__(
+        self,
+        date_str: str,
+        header: str,
+        subtitle: str,
+        sections: dict[str, list[dict[str, Any]]],
+        top3: list[str],
+        weather_line: str | None,
+        mode: str = HTML_RENDER_MODE,
+        max_bytes: int = HTML_MAX_BYTES,
+        short_bullets: int = HTML_SHORT_SUMMARY_BULLETS,
+    ):
+        self.date_str = date_str
+        self.header = header
+        self.subtitle = subtitle
+        self.sections = {topic: items for topic, items in sections.items() if items}
+        self.top3 = top3
+        self.weather_line = weather_line
+        self.compact = mode == "compact"
+        self.max_bytes = max_bytes
+        self.short_bullets = short_bullets
+        self._classes: dict[str, str] = {}  # style -> class name (compact mode)
+        self._class_attrs: dict[str, str] = {}  # style attribute as written -> class attribute
+        self.top3_html = self._finish(render_top3(top3))
+        self.generated_at = datetime.now(LOCAL_TZ).strftime("%Y-%m-%d %H:%M")
+        self._cards: dict[tuple[str, int, bool], str] = {}
+        self._sections: dict[tuple[str, tuple[tuple[int, bool], ...]], str] = {}
+        self._documents: dict[tuple[str | None, tuple[tuple[str, int], ...]], str] = {}
+        # Compact document per weather line, split around css / Top-3 / sections
+        self._shells: dict[str | None, list[str]] = {}
+        self._compact: DigestFragments | None = None  # mode "inline": renders the documents over budget
+        self.compacted = 0
+        self.shortened = 0
+        self.dropped = 0
+
+    def _finish(self, fragment: str) -> str:
+        if not self.compact:
+            return fragment
+
+        def to_class(m: re.Match) -> str:
+            raw = m.group(2)
+            if raw not in self._class_attrs:
+                style = _CSS_SPACE_RE.sub(r"\1", raw.strip()).rstrip(";")
+                cls = self._classes.setdefault(style, f"s{len(self._classes)}")
+                self._class_attrs[raw] = f'class="{cls}"'
+            return self._class_attrs[raw]
+
+        return minify_html(_STYLE_ATTR_RE.sub(to_class, fragment))
+
+    def card(self, topic: str, i: int, short: bool = False) -> str:
+        key = (topic, i, short)
+        if key not in self._cards:
+            bullets = self.short_bullets if short else None
+            self._cards[key] = self._finish(render_card(topic, self.sections[topic][i], bullets))
+        return self._cards[key]
+
+    def section(self, topic: str, cards: tuple[tuple[int, bool], ...]) -> str:
+        """Section of `topic` with the given (article index, shortened) cards."""
+        key = (topic, cards)
+        if key not in self._sections:
+            rendered = [self.card(topic, i, short) for i, short in cards]
+            if self.compact:
+                head, tail = self._finish(render_section(topic, [_SLOT], len(cards))).split(_SLOT)
+                self._sections[key] = head + "".join(rendered) + tail
+            else:
+                self._sections[key] = render_section(topic, rendered)
+        return self._sections[key]
+
+    def _assemble(self, cards: dict[tuple[str, int], bool], weather_line: str | None) -> str:
+        by_topic: dict[str, list[tuple[int, bool]]] = {}
+        for (topic, i), short in cards.items():
+            by_topic.setdefault(topic, []).append((i, short))
+        sections = [self.section(topic, tuple(chosen)) for topic, chosen in by_topic.items()]
+        if not self.compact or not sections:
+            doc = self._render_document(self.top3_html, sections, self._css(), weather_line)
+            return minify_html(doc) if self.compact else doc
+        if weather_line not in self._shells:
+            shell = self._render_document(_SLOT, [_SLOT], _SLOT, weather_line)
+            self._shells[weather_line] = minify_html(shell).split(_SLOT)
+        css_at, top3_at, sections_at, end = self._shells[weather_line]
+        return css_at + self._css() + top3_at + self.top3_html + sections_at + "".join(sections) + end
+
+    def _render_document(self, top3_html: str, sections: list[str], css: str, weather_line: str | None) -> str:
+        return render_document(
+            self.date_str, self.header, self.subtitle, top3_html, sections, weather_line, self.generated_at, css
+        )
+
+    def _css(self) -> str:
+        return "".join(f".{cls}{{{style}}}" for style, cls in self._classes.items())
+
+    def _fit(self, cards: dict[tuple[str, int], bool], size: int) -> None:
+        """Shorten, then drop the lowest-ranked card, and so on (in place) until `size` is within the budget."""
+        position = {c: n for n, c in enumerate(cards)}
+        worst_first = sorted(
+            cards, key=lambda c: (self.sections[c[0]][c[1]].get("rank", float("inf")), position[c]), reverse=True
+        )
+        per_topic = Counter(topic for topic, _ in cards)
+        for topic, i in worst_first:
+            if size <= self.max_bytes:
+                return
+            if not cards[(topic, i)]:
+                saved = _size(self.card(topic, i)) - _size(self.card(topic, i, short=True))
+                if saved > 0:
+                    cards[(topic, i)] = True
+                    size -= saved
+                    self.shortened += 1
+                    if size <= self.max_bytes:
+                        return
+            # Only cards left in the document count as shortened
+            short = cards.pop((topic, i))
+            if short:
+                self.shortened -= 1
+            size -= _size(self.card(topic, i, short))
+            per_topic[topic] -= 1
+            if not per_topic[topic]:
+                size -= _size(self.section(topic, ()))
+            self.dropped += 1
+
+    def _compact_document(
+        self, topics: Iterable[str] | None, limits: Mapping[str, int], weather_line: str | None
+    ) -> str:
+        if self._compact is None:
+            self._compact = DigestFragments(
+                self.date_str, self.header, self.subtitle, self.sections, self.top3, self.weather_line,
+                "compact", self.max_bytes, self.short_bullets,
+            )
+            self._compact.generated_at = self.generated_at
+        shortened, dropped = self._compact.shortened, self._compact.dropped
+        doc = self._compact.document(topics, limits, weather_line)
+        self.compacted += 1
+        self.shortened += self._compact.shortened - shortened
+        self.dropped += self._compact.dropped - dropped
+        return doc
+
+    def document(
+        self,
+        topics: Iterable[str] | None = None,
+        limits: Mapping[str, int] | None = None,
+        weather_line: str | None = None,
+    ) -> str:
+        """
+        Document with `topics` (all when None), in digest order, each cut to
+        `limits[topic]` articles (all when missing), within the byte budget.
+        `weather_line` replaces the digest's own (e.g. the recipient's city).
+        """
+        weather_line = weather_line or self.weather_line
+        wanted = None if topics is None else set(topics)
+        limits = limits or {}
+        selection = tuple(
+            (topic, min(len(items), limits.get(topic, len(items))))
+            for topic, items in self.sections.items()
+            if wanted is None or topic in wanted
+        )
+        selection = tuple((topic, n) for topic, n in selection if n > 0)
+        key = (weather_line, selection)
+        if key not in self._documents:
+            cards = {(topic, i): False for topic, n in selection for i in range(n)}
+            doc = self._assemble(cards, weather_line)
+            if self.max_bytes and _size(doc) > self.max_bytes and not self.compact:
+                self._documents[key] = self._compact_document(topics, limits, weather_line)
+                return self._documents[key]
+            # _fit works from fragment sizes (not the exact document, e.g. the "N vnt."
+            # counts change too): re-check, every pass shortens or drops at least one card
+            while self.max_bytes and _size(doc) > self.max_bytes and cards:
+                self._fit(cards, _size(doc))
+                doc = self._assemble(cards, weather_line)
+            self._documents[key] = doc
+        return self._documents[key]
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "cards": len(self._cards),
+            "sections": len(self._sections),
+            "documents": len(self._documents),
+            "compacted": self.compacted,
+            "shortened": self.shortened,
+            "dropped": self.dropped,
+        }
+
+
+def build_html(
+    date_str: str,
+    header: str,
+    subtitle: str,
+    sections: dict[str, list[dict[str, Any]]],
+    top3: list[str],
+    weather_line: str | None,
+) -> str:
+    return DigestFragments(date_str, header, subtitle, sections, top3, weather_line).document()
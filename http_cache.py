@@ -0,0 +1,207 @@
+"""
+On-disk HTTP cache for article pages (SQLite), used by fetcher.fetch_html.
+
+A private cache following RFC 9111:
+- 200 responses are stored unless the request or response says `no-store`;
+  bodies are kept zlib-compressed, with the headers needed to serve them again.
+- Freshness: `max-age`, else `Expires` - `Date`, else 10% of the time since
+  `Last-Modified` (capped at HEURISTIC_MAX_SECONDS); `Age` counts against it.
+  A fresh entry is served without touching the network.
+- Stale entries (and `no-cache` ones) are revalidated with If-None-Match /
+  If-Modified-Since; a 304 refreshes the stored headers and serves the body.
+- If revalidation fails outright, a stale body is still served unless the
+  response had `must-revalidate`.
+
+The cache is bounded by total compressed size; least recently used pages go
+first. In replay-only mode (FETCH_REPLAY_ONLY) stored pages are served
+regardless of freshness and the network is never used.
+"""
+
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Mapping
+import zlib
+
+from config import FETCH_CACHE_MAX_MB, FETCH_CACHE_PATH
+
+HEURISTIC_MAX_SECONDS = 24 * 3600
+
+# Response headers kept with the body (enough to decode, judge freshness and revalidate)
+_KEPT_HEADERS = ("content-type", "cache-control", "date", "expires", "age", "etag", "last-modified")
+
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    out: dict[str, str | None] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            out[name.lower()] = arg.strip().strip('"') or None
+    return out
+
+
+def _http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value: str | None) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+@dataclass
+class CachedPage:
+    url: str
+    headers: dict[str, str]
+    body: bytes
+    stored_at: float
+
+    @property
+    def cache_control(self) -> dict[str, str | None]:
+        return parse_cache_control(self.headers.get("cache-control"))
+
+    def freshness_lifetime(self) -> float:
+        cc = self.cache_control
+        max_age = _int(cc.get("max-age"))
+        if max_age is not None:
+            return float(max_age)
+        date = _http_date(self.headers.get("date")) or self.stored_at
+        expires = _http_date(self.headers.get("expires"))
+        if "expires" in self.headers:
+            return max(0.0, expires - date) if expires is not None else 0.0  # invalid Expires = already expired
+        last_modified = _http_date(self.headers.get("last-modified"))
+        if last_modified is not None:
+            return min(HEURISTIC_MAX_SECONDS, max(0.0, 0.1 * (date - last_modified)))
+        return 0.0
+
+    def age(self, now: float | None = None) -> float:
+        return max(0.0, (now or time.time()) - self.stored_at) + (_int(self.headers.get("age")) or 0)
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        return "no-cache" not in self.cache_control and self.age(now) < self.freshness_lifetime()
+
+    @property
+    def may_serve_stale(self) -> bool:
+        return "must-revalidate" not in self.cache_control
+
+    def validators(self) -> dict[str, str]:
+        headers = {}
+        if self.headers.get("etag"):
+            headers["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+def storable(request_headers: Mapping[str, str], status: int, response_headers: Mapping[str, str]) -> bool:
+    if status != 200:
+        return False
+    return "no-store" not in parse_cache_control(request_headers.get("Cache-Control")) and (
+        "no-store" not in parse_cache_control(response_headers.get("Cache-Control"))
+    )
+
+
+class HttpCache:
+    def __init__(self, path: str = FETCH_CACHE_PATH, max_mb: float = FETCH_CACHE_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages (accessed_at)")
+        self._db.commit()
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def urls(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT url FROM pages")]
+
+    def get(self, url: str) -> CachedPage | None:
+        with self._lock:
+            row = self._db.execute("SELECT headers, body, stored_at FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        return CachedPage(url, json.loads(row[0]), zlib.decompress(row[1]), row[2])
+
+    def put(self, url: str, response_headers: Mapping[str, str], body: bytes) -> None:
+        headers = {k: response_headers[k] for k in _KEPT_HEADERS if response_headers.get(k) is not None}
+        blob = zlib.compress(body, 6)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM pages WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (url, json.dumps(headers), blob, len(blob), now, now),
+            )
+            self._size += len(blob) - (old[0] if old else 0)
+            self._db.commit()
+        self.evict()
+
+    def refresh(self, page: CachedPage, response_headers: Mapping[str, str]) -> CachedPage:
+        """Apply a 304's headers (RFC 9111 4.3.4) and restart the entry's age."""
+        headers = dict(page.headers)
+        headers.update({
+            k: response_headers[k]
+            for k in _KEPT_HEADERS
+            if k != "content-type" and response_headers.get(k) is not None
+        })
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET headers = ?, stored_at = ?, accessed_at = ? WHERE url = ?",
+                (json.dumps(headers), now, now, page.url),
+            )
+            self._db.commit()
+        return CachedPage(page.url, headers, page.body, now)
+
+    def evict(self) -> None:
+        """Drop least recently used pages until the cache is back under 90% of its size bound."""
+        if self._size <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        with self._lock:
+            rows = self._db.execute("SELECT url, size FROM pages ORDER BY accessed_at").fetchall()
+            drop: list[tuple[str]] = []
+            for url, size in rows:
+                if self._size <= target:
+                    break
+                drop.append((url,))
+                self._size -= size
+            self._db.executemany("DELETE FROM pages WHERE url = ?", drop)
+            self._db.commit()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
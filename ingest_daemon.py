@@ -0,0 +1,139 @@
+"""
+Resident ingest service: keeps the article store warm between digests.
+
+Every INGEST_INTERVAL_MINUTES it polls the TOPICS feeds (conditional GET),
+and runs fetch -> extract -> summarize for entries that are not in the article
+store yet, then persists the results. After a pass that falls in a digest slot
+(07:00 / 12:00 / 18:00, time_utils.get_digest_type) it sends that digest itself
+(lrt_multi_digest.send_digest), which finds the summaries already stored and
+only assembles and sends. The day's checkpoint makes that once per digest,
+across restarts too.
+
+Deployment: run the daemon on a host with a persistent DIGEST_CACHE_DIR and
+disable the schedule of .github/workflows/lrt-digest.yml (whose runners keep
+their own .cache and would send a second copy). To keep the digest on a
+separate scheduler instead, set INGEST_SEND_DIGESTS=0 (or --no-send) and run
+lrt_multi_digest.py from cron on the same host / volume: the two must share
+DIGEST_CACHE_DIR, or the digest does all the work again.
+
+Usage:
+    python ingest_daemon.py             # run until SIGINT / SIGTERM
+    python ingest_daemon.py --no-send   # ingest only
+    python ingest_daemon.py --once      # one poll + ingest pass (e.g. from cron)
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import signal
+import threading
+import time
+
+from article_store import ArticleStore
+from config import (
+    BREAKING_MINUTES,
+    INGEST_INTERVAL_MINUTES,
+    INGEST_LOOKBACK_HOURS,
+    INGEST_SEND_DIGESTS,
+    LOCAL_TZ,
+    TOPICS,
+)
+from feed_state import FeedStateStore
+from llm_client import llm
+from lrt_multi_digest import max_articles_per_topic, send_digest
+from metrics import metrics
+from pipeline import DigestPipeline, poll_feeds, select_candidates
+from summary_cache import SummaryCache
+from time_utils import get_digest_type
+
+
+def ingest_once(store: ArticleStore, cache: SummaryCache) -> dict[str, int]:
+    """Poll all feeds once and summarize+store every new in-lookback entry."""
+    metrics.reset()
+    llm.reset_stats()
+    with FeedStateStore() as feed_state:
+        polls = poll_feeds(TOPICS, feed_state)
+
+    now_local = datetime.now(LOCAL_TZ)
+    entries_by_topic = {topic: p.entries for topic, p in polls.items()}
+    items = select_candidates(
+        entries_by_topic,
+        now_local - timedelta(hours=INGEST_LOOKBACK_HOURS),
+        now_local,
+        max_per_topic=None,
+        now_local=now_local,
+        breaking_delta=timedelta(minutes=BREAKING_MINUTES),
+    )
+    ready = store.get_ready([it["url"] for it in items])
+    todo = [it for it in items if it["url"] not in ready]
+    if todo:
+        with DigestPipeline(cache=cache) as pipeline:
+            # Stories stored by earlier passes: a republished one is marked as their duplicate
+            pipeline.seed(ready.values(), store.get_texts(list(ready)))
+            pipeline.run(todo)
+    saved = store.save_items(todo)
+    pruned = store.prune()
+
+    return {
+        "feeds_not_modified": sum(1 for p in polls.values() if p.not_modified),
+        "candidates": len(items),
+        "processed": len(todo),
+        "stored": saved,
+        "pruned": pruned,
+        "llm_calls": metrics.counters["llm_calls"],
+        "tpm_peak": llm.quota_report()["tpm_peak"],
+    }
+
+
+def send_if_due(sent: set[tuple[str, str]]) -> None:
+    """Send the digest whose slot it is, unless `sent` (date, digest type) already has it."""
+    digest_type = get_digest_type()
+    if max_articles_per_topic(digest_type) is None:
+        return
+    key = (datetime.now(LOCAL_TZ).strftime("%Y-%m-%d"), digest_type)
+    if key in sent:
+        return
+    # A failed send is retried after the next pass while the slot lasts (resuming from its checkpoint)
+    send_digest(digest_type)
+    sent.add(key)
+
+
+def run_forever(interval_minutes: float = INGEST_INTERVAL_MINUTES, send: bool = INGEST_SEND_DIGESTS) -> None:
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    sent: set[tuple[str, str]] = set()
+    with ArticleStore() as store, SummaryCache() as cache:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                stats = ingest_once(store, cache)
+                took = time.perf_counter() - t0
+                now = datetime.now(LOCAL_TZ).strftime("%H:%M:%S")
+                print(f"[{now}] ingest: " + ", ".join(f"{k}={v}" for k, v in stats.items()) + f" ({took:.1f}s)")
+            except Exception as ex:
+                print(f"⚠️ ingest failed: {ex}")
+            if send:
+                try:
+                    send_if_due(sent)
+                except Exception as ex:
+                    print(f"⚠️ digest failed: {ex}")
+            stop.wait(max(0.0, interval_minutes * 60 - (time.perf_counter() - t0)))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="LRT ingest daemon")
+    ap.add_argument("--once", action="store_true", help="single poll + ingest pass, then exit")
+    ap.add_argument("--interval", type=float, default=INGEST_INTERVAL_MINUTES, help="minutes between polls")
+    ap.add_argument("--no-send", action="store_true", help="ingest only; never send the digests")
+    args = ap.parse_args()
+
+    if args.once:
+        with ArticleStore() as store, SummaryCache() as cache:
+            print(ingest_once(store, cache))
+    else:
+        run_forever(args.interval, INGEST_SEND_DIGESTS and not args.no_send)
+
+
+if __name__ == "__main__":
+    main()
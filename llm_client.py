@@ -0,0 +1,319 @@
+"""
+Rate-limit-aware wrapper around the OpenAI responses API.
+
+Every request goes through:
+
+    request bucket (RPM) + token bucket (TPM)   refilled continuously; the token
+                                                cost is estimated up-front and
+                                                corrected from the response usage
+    AIMD concurrency limit                      +1/limit per fast success, halved
+                                                on a 429 or a slow / timed-out call
+    retries                                     429 / 5xx / connection errors, waiting
+                                                for retry-after(-ms) when the server
+                                                sends it, else jittered backoff
+
+Limits start at OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT and follow the
+x-ratelimit-* response headers once the API reports them. `quota_report()`
+says how close to the quota the run got (peak per-minute usage vs. limits).
+"""
+
+from collections import deque
+import random
+import threading
+import time
+from typing import Any
+
+import openai
+
+from config import (
+    LLM_EXPECTED_OUTPUT_TOKENS,
+    LLM_LATENCY_TARGET_SECONDS,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_START_CONCURRENCY,
+    LLM_TIMEOUT_SECONDS,
+    OPENAI_RPM_LIMIT,
+    OPENAI_TPM_LIMIT,
+    client,
+)
+from metrics import metrics
+from text_reduce import estimate_tokens
+
+BACKOFF_SECONDS = 1.0
+DECREASE_COOLDOWN_SECONDS = 2.0  # one halving per burst of 429s, not one per request
+
+
+class RateLimitWaitTimeout(openai.OpenAIError):
+    """No request / token / concurrency capacity within the call's timeout."""
+
+
+class TokenBucket:
+    """
+    Continuously refilled bucket; the level may go negative (debt) after
+    corrections. A `per_minute` of 0 means unlimited (until the API reports a limit).
+    """
+
+    def __init__(self, per_minute: float):
+        self._cond = threading.Condition()
+        self.per_minute = float(per_minute)
+        self.level = self.per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.per_minute <= 0:
+            self._updated = now
+            return
+        self.level = min(self.per_minute, self.level + (now - self._updated) * self.per_minute / 60.0)
+        self._updated = now
+
+    def acquire(self, n: float, max_wait: float) -> bool:
+        deadline = time.monotonic() + max_wait
+        with self._cond:
+            while True:
+                if self.per_minute <= 0:
+                    return True
+                n = min(n, self.per_minute)  # the limit may have changed while waiting
+                self._refill()
+                if self.level >= n:
+                    self.level -= n
+                    return True
+                wait = (n - self.level) * 60.0 / self.per_minute
+                if time.monotonic() + wait > deadline:
+                    return False
+                self._cond.wait(wait)
+
+    def adjust(self, n: float) -> None:
+        """Take (n > 0) or give back (n < 0) capacity after the fact."""
+        with self._cond:
+            self._refill()
+            if self.per_minute > 0:
+                self.level -= n
+            self._cond.notify_all()
+
+    def observe(self, limit: float | None, remaining: float | None) -> None:
+        """Follow the server's view: its limit, and never more than it says is left."""
+        with self._cond:
+            self._refill()
+            if limit:
+                if self.per_minute <= 0:
+                    self.level = limit  # was unlimited: start full
+                self.per_minute = limit
+            if remaining is not None:
+                self.level = min(self.level, remaining)
+
+
+class AIMDLimiter:
+    """Concurrency limit: additive increase on fast successes, multiplicative decrease on pressure."""
+
+    def __init__(self, start: int, maximum: int, latency_target: float):
+        self._cond = threading.Condition()
+        self.limit = float(max(1, min(start, maximum)))
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.low = self.limit
+        self._last_decrease = 0.0
+
+    def acquire(self, max_wait: float) -> bool:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < int(self.limit), timeout=max_wait):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: float | None, pressure: bool) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if pressure or (latency is not None and latency > self.latency_target):
+                if now - self._last_decrease > DECREASE_COOLDOWN_SECONDS:
+                    self.limit = max(1.0, self.limit / 2)
+                    self.low = min(self.low, self.limit)
+                    self._last_decrease = now
+                    metrics.incr("llm_concurrency_decreases")
+            elif latency is not None:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+def _header_float(headers: Any, name: str) -> float | None:
+    value = headers.get(name) if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def retry_after_seconds(headers: Any) -> float | None:
+    ms = _header_float(headers, "retry-after-ms")
+    if ms is not None:
+        return ms / 1000.0
+    return _header_float(headers, "retry-after")  # HTTP-date form is not used by the API
+
+
+class RateLimitedResponses:
+    def __init__(
+        self,
+        openai_client: openai.OpenAI = client,
+        rpm: float = OPENAI_RPM_LIMIT,
+        tpm: float = OPENAI_TPM_LIMIT,
+        start_concurrency: int = LLM_START_CONCURRENCY,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        latency_target: float = LLM_LATENCY_TARGET_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+    ):
+        # Retries are done here (retry-after aware, counted against the buckets)
+        self._client = openai_client.with_options(max_retries=0)
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._concurrency = AIMDLimiter(start_concurrency, max_concurrency, latency_target)
+        self._max_retries = max_retries
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._window: deque[tuple[float, int]] = deque()  # (time, tokens) of the last minute
+            self._window_tokens = 0
+            self.rpm_peak = 0
+            self.tpm_peak = 0
+            self.throttled = 0
+            self.min_remaining: dict[str, float] = {}
+
+    def create(
+        self,
+        model: str,
+        prompt: str,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        expected_output_tokens: int = LLM_EXPECTED_OUTPUT_TOKENS,
+    ) -> Any:
+        """responses.create through the limiters, with retries. Raises the last error."""
+        estimate = estimate_tokens(prompt) + expected_output_tokens
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            if not self._requests.acquire(1, timeout):
+                raise RateLimitWaitTimeout("no request capacity within the timeout")
+            if not self._tokens.acquire(estimate, timeout):
+                self._requests.adjust(-1)
+                raise RateLimitWaitTimeout("no token capacity within the timeout")
+            if not self._concurrency.acquire(timeout):
+                self._requests.adjust(-1)
+                self._tokens.adjust(-estimate)
+                raise RateLimitWaitTimeout("no concurrency capacity within the timeout")
+
+            t0 = time.monotonic()
+            latency, pressure, wait = None, False, None
+            try:
+                raw = self._client.responses.with_raw_response.create(model=model, input=prompt, timeout=timeout)
+                resp = raw.parse()
+                latency = time.monotonic() - t0
+            except openai.APIStatusError as ex:
+                pressure = ex.status_code == 429
+                self._observe_headers(ex.response.headers)
+                if pressure:
+                    with self._lock:
+                        self.throttled += 1
+                    metrics.incr("llm_throttled")
+                else:
+                    self._tokens.adjust(-estimate)  # not processed; a 429 keeps the charge
+                retryable = (pressure and getattr(ex, "code", None) != "insufficient_quota") or ex.status_code >= 500
+                if not retryable or attempt > self._max_retries:
+                    raise
+                wait = retry_after_seconds(ex.response.headers)
+            except openai.APIConnectionError:  # includes timeouts
+                pressure = True
+                self._tokens.adjust(-estimate)
+                if attempt > self._max_retries:
+                    raise
+            finally:
+                self._concurrency.release(latency, pressure)
+
+            if latency is not None:
+                return self._account(raw, resp, model, estimate, latency, attempt, time.monotonic() - started)
+
+            if wait is None:
+                wait = random.uniform(0, BACKOFF_SECONDS * (2 ** (attempt - 1)))
+            metrics.incr("llm_retries")
+            time.sleep(wait)
+
+    def _account(self, raw: Any, resp: Any, model: str, estimate: int, latency: float, attempts: int, total: float):
+        self._observe_headers(raw.headers)
+        usage = resp.usage
+        get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, 0)
+        input_tokens = (get("input_tokens") or 0) if usage is not None else 0
+        output_tokens = (get("output_tokens") or 0) if usage is not None else 0
+        actual = input_tokens + output_tokens if usage is not None else estimate
+        self._tokens.adjust(actual - estimate)
+
+        now = time.monotonic()
+        with self._lock:
+            self._window.append((now, actual))
+            self._window_tokens += actual
+            while self._window and self._window[0][0] < now - 60.0:
+                self._window_tokens -= self._window.popleft()[1]
+            self.rpm_peak = max(self.rpm_peak, len(self._window))
+            self.tpm_peak = max(self.tpm_peak, self._window_tokens)
+
+        metrics.incr("llm_calls")
+        metrics.incr("llm_input_tokens", input_tokens)
+        metrics.incr("llm_output_tokens", output_tokens)
+        metrics.add_time("llm_call", latency)
+        metrics.record_llm_call({
+            "model": model,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "estimated_tokens": estimate,
+            "seconds": round(latency, 3),
+            "total_seconds": round(total, 3),
+            "attempts": attempts,
+        })
+        return resp
+
+    def _observe_headers(self, headers: Any) -> None:
+        for kind, bucket in (("requests", self._requests), ("tokens", self._tokens)):
+            limit = _header_float(headers, f"x-ratelimit-limit-{kind}")
+            remaining = _header_float(headers, f"x-ratelimit-remaining-{kind}")
+            if limit is None and remaining is None:
+                continue
+            bucket.observe(limit, remaining)
+            if remaining is not None:
+                with self._lock:
+                    self.min_remaining[kind] = min(self.min_remaining.get(kind, remaining), remaining)
+
+    def quota_report(self) -> dict[str, Any]:
+        """Peak one-minute usage against the (last known) limits."""
+        with self._lock:
+            rpm_limit, tpm_limit = self._requests.per_minute, self._tokens.per_minute
+            return {
+                "rpm_limit": rpm_limit,
+                "tpm_limit": tpm_limit,
+                "rpm_peak": self.rpm_peak,
+                "tpm_peak": self.tpm_peak,
+                "rpm_utilization": round(self.rpm_peak / rpm_limit, 3) if rpm_limit else None,
+                "tpm_utilization": round(self.tpm_peak / tpm_limit, 3) if tpm_limit else None,
+                "throttled_429": self.throttled,
+                "min_remaining_requests": self.min_remaining.get("requests"),
+                "min_remaining_tokens": self.min_remaining.get("tokens"),
+                "concurrency_limit": round(self._concurrency.limit, 2),
+                "concurrency_low": round(self._concurrency.low, 2),
+            }
+
+    def quota_line(self) -> str:
+        q = self.quota_report()
+
+        def usage(kind: str) -> str:
+            peak, limit, utilization = q[f"{kind}_peak"], q[f"{kind}_limit"], q[f"{kind}_utilization"]
+            if not limit:
+                return f"{peak}/unlimited {kind.upper()}"
+            return f"{peak}/{limit:.0f} {kind.upper()} ({utilization:.0%})"
+
+        return (
+            f"OpenAI quota: peak {usage('rpm')}, {usage('tpm')}, "
+            f"{q['throttled_429']}× 429, concurrency {q['concurrency_limit']} (low {q['concurrency_low']})"
+        )
+
+
+llm = RateLimitedResponses()
@@ -6,33 +6,122 @@ Sends separate emails to each recipient (Option 3).
 Schedule idea (GitHub Actions, UTC):
 - For 07:00 & 12:00 Vilnius with DST safe triggers run at: 04,05,09,10 UTC
   and this script will auto-decide whether it's "morning" (07) or "midday" (12).
+
+Most cron invocations are not due and exit right away, so this module only
+imports what deciding that needs; the run itself (digest_run.py) and the
+OpenAI client are loaded after. benchmarks/bench_import.py tracks the cost.
+
+--prepare (from an earlier cron entry) submits the Batch API job of the
+SUMMARY_BATCH_JOB_DIGESTS digest due in SUMMARY_BATCH_JOB_LEAD_MINUTES; that
+digest then only collects the finished results (batch_jobs.py).
 """
 
+import argparse
 from datetime import datetime, timedelta
 import os
 
-import feedparser
-
 from config import (
-    BREAKING_MINUTES,
+    DIGEST_PROFILE,
     LOCAL_TZ,
     MAX_ARTICLES_PER_TOPIC_EVENING,
     MAX_ARTICLES_PER_TOPIC_MIDDAY,
     MAX_ARTICLES_PER_TOPIC_MORNING,
-    TOPICS,
+    RUN_DEADLINE_SECONDS,
+    RUN_REPORT_DIR,
+    RUN_REPORT_PATH,
+    SUMMARY_BATCH_JOB_DIGESTS,
+    SUMMARY_BATCH_JOB_LEAD_MINUTES,
 )
-from email_sender import send_html_email_individual
-from fetcher import extract_text, fetch_html
-from html_builder import build_html
-from openai_helpers import pick_top3_highlights, summarize_lt
-from time_utils import get_digest_type, get_time_window_local, titles_and_subject, to_local_dt
-from weather import get_vilnius_weather_summary
+from metrics import metrics, profiled
+from time_utils import Deadline, get_digest_type, get_time_window_local, titles_and_subject
+
+
+def max_articles_per_topic(digest_type: str | None) -> int | None:
+    """Per-topic article limit of a scheduled digest type; None if `digest_type` is not one."""
+    match digest_type:
+        case "morning":
+            return MAX_ARTICLES_PER_TOPIC_MORNING
+        case "midday":
+            return MAX_ARTICLES_PER_TOPIC_MIDDAY
+        case "evening":
+            return MAX_ARTICLES_PER_TOPIC_EVENING
+        case _:
+            return None
+
+
+def send_digest(digest_type: str, deadline: Deadline | None = None) -> None:
+    """
+    Build and send today's `digest_type` digest and write its run report.
+    Resumes (or skips, once sent) through the day's checkpoint, so calling it
+    again for the same digest does not send twice. Also used by ingest_daemon.
+    """
+    deadline = deadline or Deadline(RUN_DEADLINE_SECONDS)
+    max_per_topic = max_articles_per_topic(digest_type)
+
+    # Due: load the pipeline, the OpenAI client and friends only now
+    from checkpoint import RunCheckpoint, prune_checkpoints
+    from digest_run import run_digest
+    from llm_client import llm
+
+    window_start, window_end = get_time_window_local(digest_type)
+    date_str = datetime.now(LOCAL_TZ).strftime("%Y-%m-%d")
+    subject, header, subtitle = titles_and_subject(date_str, digest_type)
+
+    metrics.reset()
+    llm.reset_stats()
+    metrics.set("digest_type", digest_type)
+    metrics.set("date", date_str)
+
+    # A re-run of the same digest (retried / killed job) resumes from its checkpoint
+    prune_checkpoints()
+    checkpoint = RunCheckpoint(date_str, digest_type)
+    metrics.set("checkpoint_resumed", checkpoint.resumed)
+    if checkpoint.resumed:
+        print(f"ℹ️ Resuming from checkpoint {checkpoint.path}")
+    try:
+        run_digest(
+            digest_type, date_str, subject, header, subtitle, window_start, window_end, max_per_topic, deadline,
+            checkpoint,
+        )
+    finally:
+        metrics.set("llm_quota", llm.quota_report())
+        print(f"ℹ️ {llm.quota_line()}")
+        report_path = RUN_REPORT_PATH or os.path.join(
+            RUN_REPORT_DIR, f"run_{digest_type}_{datetime.now(LOCAL_TZ).strftime('%Y-%m-%d_%H%M%S')}.json"
+        )
+        report = metrics.write_report(report_path)
+        print(f"ℹ️ Run report: {report_path} ({report['wall_seconds']:.1f}s)")
+        metrics.log_summary(report)
+        metrics.push(report)
 
 
 # -------------------------
 # MAIN
 # -------------------------
+def prepare_batch_job(deadline: Deadline) -> None:
+    """Submit the Batch API job of the SUMMARY_BATCH_JOB_DIGESTS digest due next, if any."""
+    digest_type = get_digest_type(datetime.now(LOCAL_TZ) + timedelta(minutes=SUMMARY_BATCH_JOB_LEAD_MINUTES))
+    if digest_type not in SUMMARY_BATCH_JOB_DIGESTS or max_articles_per_topic(digest_type) is None:
+        print(f"No Batch API digest due in {SUMMARY_BATCH_JOB_LEAD_MINUTES:.0f} min — exiting.")
+        return
+
+    from digest_run import prepare_batch_job as prepare
+
+    window_start, window_end = get_time_window_local(digest_type)
+    prepare(digest_type, window_start, window_end, max_articles_per_topic(digest_type), deadline)
+
+
 def main():
+    ap = argparse.ArgumentParser(description="LRT multi-topic digest")
+    ap.add_argument(
+        "--prepare", action="store_true", help="submit the Batch API job of the digest due next, then exit"
+    )
+    args = ap.parse_args()
+
+    deadline = Deadline(RUN_DEADLINE_SECONDS)
+    if args.prepare:
+        prepare_batch_job(deadline)
+        return
     debug = os.getenv("DIGEST_DEBUG", "").strip().lower() not in ("", "0", "false", "no", "off")
 
     digest_type = get_digest_type()
@@ -46,103 +135,15 @@ def main():
     #     print("Not scheduled digest time (Vilnius 07:00 / 12:00) — exiting.")
     #     return
 
-    window_start, window_end = get_time_window_local(digest_type)
-    date_str = datetime.now(LOCAL_TZ).strftime("%Y-%m-%d")
-    subject, header, subtitle = titles_and_subject(date_str, digest_type)
+    if max_articles_per_topic(digest_type) is None:
+        print("Not scheduled digest time (Vilnius 07:00 / 12:00) — exiting.")
+        return
 
-    match digest_type:
-        case "morning":
-            max_per_topic = MAX_ARTICLES_PER_TOPIC_MORNING
-        case "midday":
-            max_per_topic = MAX_ARTICLES_PER_TOPIC_MIDDAY
-        case "evening":
-            max_per_topic = MAX_ARTICLES_PER_TOPIC_EVENING
-        case _:
-            print("Not scheduled digest time (Vilnius 07:00 / 12:00) — exiting.")
-            return
-
-    # Collect items per topic with time-window filtering + de-dup across topics
-    sections: dict[str, list[dict]] = {t: [] for t in TOPICS.keys()}
-    global_seen_urls: set[str] = set()
-    flat_items: list[dict] = []
-
-    now_local = datetime.now(LOCAL_TZ)
-    breaking_delta = timedelta(minutes=BREAKING_MINUTES)
-
-    for topic_name, rss_url in TOPICS.items():
-        feed = feedparser.parse(rss_url)
-        count = 0
-
-        for e in feed.entries:
-            title = getattr(e, "title", None) or getattr(e, "link", "")
-            url = getattr(e, "link", None)
-            if not url:
-                continue
-
-            # Deduplicate across topics
-            if url in global_seen_urls:
-                continue
-
-            st = getattr(e, "published_parsed", None) or getattr(e, "updated_parsed", None)
-            published_local = to_local_dt(st)
-
-            # Filter by time window if we have dates; if missing, include (conservative)
-            if published_local is not None:
-                if not (window_start <= published_local <= window_end):
-                    continue
-
-            # Fetch + extract + summarize
-            try:
-                article_html = fetch_html(url)
-                text = extract_text(article_html)
-
-                if len(text) < 200:
-                    summary = "Nepavyko patikimai ištraukti teksto."
-                else:
-                    summary = summarize_lt(title, text)
-            except Exception as ex:
-                summary = f"Klaida: {ex}"
-
-            published_str = published_local.strftime("%H:%M") if published_local else ""
-            is_breaking = bool(published_local and (now_local - published_local) <= breaking_delta)
-
-            item = {
-                "topic": topic_name,
-                "title": title,
-                "url": url,
-                "summary": summary,
-                "published_local": published_local,
-                "published_local_str": published_str,
-                "is_breaking": is_breaking,
-            }
-
-            sections[topic_name].append(item)
-            flat_items.append(item)
-            global_seen_urls.add(url)
-
-            count += 1
-            if count >= max_per_topic:
-                break
-
-    # Top 3 highlights (based on list of collected items)
-    # For midday, this will reflect "new since 07:00".
-    top3 = pick_top3_highlights(flat_items, digest_type)
-
-    # Optional weather
-    weather_line = get_vilnius_weather_summary()
-
-    # Build HTML + save
-    html_doc = build_html(date_str, header, subtitle, sections, top3, weather_line)
-
-    # file_name = f"lrt_digest_{digest_type}_{date_str}.html"
-    # with open(file_name, "w", encoding="utf-8") as f:
-    #     f.write(html_doc)
-    # print(f"✅ Saved HTML: {file_name}")
-
-    # Send (individual)
-    send_html_email_individual(subject, html_doc)
-    # print("✅ Done.")
+    send_digest(digest_type, deadline)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if DIGEST_PROFILE:
+        profiled(main)
+    else:
+        main()
\ No newline at end of file
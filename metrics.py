@@ -0,0 +1,179 @@
+"""
+Run instrumentation: stage timings, per-article records and counters
+(bytes downloaded, LLM tokens / retries, cache hits, ...), written out as a
+machine-readable JSON run report at the end of a digest run.
+
+Modules record into the process-wide `metrics` object:
+
+    with metrics.stage("feeds"):
+        ...
+    metrics.incr("fetch_bytes", len(body))
+
+Optional outputs: a one-line log summary (METRICS_LOG_FORMAT=logfmt|json) and a
+push to a Prometheus Pushgateway-compatible endpoint (METRICS_PUSH_URL).
+DIGEST_PROFILE=1 wraps the run in cProfile (see `profiled`).
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+import os
+import threading
+import time
+from typing import Any
+
+from config import METRICS_LOG_FORMAT, METRICS_PUSH_URL, PROFILE_PATH
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    v = sorted(values)
+
+    def pct(p: float) -> float:
+        return v[min(len(v) - 1, int(round((len(v) - 1) * p / 100)))]
+
+    return {
+        "count": len(v),
+        "total": sum(v),
+        "p50": pct(50),
+        "p90": pct(90),
+        "p99": pct(99),
+        "max": v[-1],
+    }
+
+
+class RunMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = datetime.now(timezone.utc)
+            self._t0 = time.perf_counter()
+            self.stage_times: dict[str, list[float]] = {}
+            self.counters: Counter = Counter()
+            self.info: dict[str, Any] = {}
+            self.articles: list[dict[str, Any]] = []
+            self.llm_calls: list[dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stage_times.setdefault(name, []).append(seconds)
+
+    def incr(self, name: str, n: int | float = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def set(self, name: str, value: Any) -> None:
+        """Run-level facts (digest type, gauges, ...)."""
+        with self._lock:
+            self.info[name] = value
+
+    def record_article(self, item: dict[str, Any]) -> None:
+        timings = item.get("timings") or {}
+        for stage, secs in timings.items():
+            self.add_time(stage, secs)
+        with self._lock:
+            self.articles.append({
+                "url": item.get("url"),
+                "topic": item.get("topic"),
+                "status": item.get("status", ""),
+                "tier": item.get("summary_tier"),
+                "timings": timings,
+            })
+
+    def record_llm_call(self, call: dict[str, Any]) -> None:
+        """Per-request token accounting (model, tokens, latency, attempts)."""
+        with self._lock:
+            self.llm_calls.append(call)
+
+    def report(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "started_at": self.started_at.isoformat(),
+                "wall_seconds": time.perf_counter() - self._t0,
+                "info": dict(self.info),
+                "counters": dict(self.counters),
+                "stages": {name: _percentiles(v) for name, v in self.stage_times.items()},
+                "articles": list(self.articles),
+                "llm_calls": list(self.llm_calls),
+            }
+
+    def write_report(self, path: str) -> dict[str, Any]:
+        report = self.report()
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        return report
+
+    def flat(self, report: dict[str, Any] | None = None) -> dict[str, float]:
+        """Numeric summary: counters, numeric run facts (one level deep) plus total/p90 per stage."""
+        report = report or self.report()
+        out: dict[str, float] = {"wall_seconds": round(report["wall_seconds"], 3)}
+        out.update(report["counters"])
+        for k, v in report["info"].items():
+            values = v.items() if isinstance(v, dict) else [("", v)]
+            for sub, x in values:
+                if isinstance(x, (int, float)) and not isinstance(x, bool):
+                    out[f"{k}_{sub}" if sub else k] = x
+        for name, s in report["stages"].items():
+            out[f"{name}_seconds_total"] = round(s["total"], 3)
+            out[f"{name}_seconds_p90"] = round(s["p90"], 3)
+        return out
+
+    def log_summary(self, report: dict[str, Any] | None = None, fmt: str = METRICS_LOG_FORMAT) -> None:
+        if not fmt:
+            return
+        values = self.flat(report)
+        if fmt == "json":
+            print(json.dumps({"metric": "digest_run", **values}))
+        else:
+            print("digest_run " + " ".join(f"{k}={v}" for k, v in values.items()))
+
+    def push(self, report: dict[str, Any] | None = None, url: str = METRICS_PUSH_URL) -> None:
+        """POST the numeric summary in Prometheus text format (e.g. to a Pushgateway job URL)."""
+        if not url:
+            return
+        import requests  # only needed when pushing; keeps the entry point's imports light
+
+        lines = [f"lrt_digest_{k} {v}" for k, v in self.flat(report).items()]
+        try:
+            requests.post(url, data="\n".join(lines) + "\n", timeout=10)
+        except requests.RequestException as ex:
+            print(f"⚠️ Metrics push failed: {ex}")
+
+
+metrics = RunMetrics()
+
+
+def profiled(fn, path: str = PROFILE_PATH):
+    """Run fn() under cProfile; dump stats to `path` and print the top functions."""
+    import cProfile
+    import io
+    import pstats
+
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(fn)
+    finally:
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        prof.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(25)
+        print(out.getvalue())
+        print(f"ℹ️ Profile saved: {path}")
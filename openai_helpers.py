@@ -1,43 +1,236 @@
+import io
+import json
+import re
 from typing import Any
 
-from config import MODEL, client
+from config import (
+    LLM_TIMEOUT_SECONDS,
+    MODEL,
+    SUMMARY_BATCH_MAX_ITEMS,
+    SUMMARY_BATCH_TOKENS,
+    SUMMARY_FULL_MIN_CHARS,
+    SUMMARY_LOCAL_MAX_CHARS,
+    SUMMARY_ROUTING,
+    SUMMARY_SMALL_MODEL,
+    client,
+)
+from llm_client import llm
+from metrics import metrics
+from text_reduce import estimate_tokens
 
+# Hard safety cap; text is normally already reduced to SUMMARY_INPUT_TOKENS (text_reduce)
+MAX_INPUT_CHARS = 12000
 
-def summarize_lt(title: str, text: str) -> str:
-    text = text[:12000]
-    prompt = f"""
-    Tu esi profesionalus naujienų redaktorius Lietuvoje.
-
-    Užduotis: pateik šio straipsnio santrauką lietuvių kalba.
-
+SUMMARY_RULES = """
     Reikalavimai:
     - Rašyk tik lietuviškai.
     - 3–5 punktai.
     - 1 sakinys: "Kodėl tai svarbu Lietuvai?"
     - Jokio clickbait.
     - Jei trūksta faktų: "Neaišku iš straipsnio."
+"""
+
 
+def summary_prompt(title: str, text: str) -> str:
+    text = text[:MAX_INPUT_CHARS]
+    return f"""
+    Tu esi profesionalus naujienų redaktorius Lietuvoje.
+
+    Užduotis: pateik šio straipsnio santrauką lietuvių kalba.
+    {SUMMARY_RULES}
     Pavadinimas: {title}
 
     Straipsnio tekstas:
     {text}
     """.strip()
 
-    resp = client.responses.create(model=MODEL, input=prompt)
+
+def _record_usage(usage: Any) -> None:
+    if usage is None:
+        return
+    get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, 0)
+    metrics.incr("llm_input_tokens", get("input_tokens") or 0)
+    metrics.incr("llm_output_tokens", get("output_tokens") or 0)
+
+
+def create_response(prompt: str, model: str = MODEL, timeout: float = LLM_TIMEOUT_SECONDS) -> Any:
+    """responses.create through the rate limiter (llm_client), with a per-attempt timeout."""
+    return llm.create(model, prompt, timeout=timeout)
+
+
+def summarize_lt(title: str, text: str, model: str = MODEL) -> str:
+    prompt = summary_prompt(title, text)
+    resp = create_response(prompt, model)
     return resp.output_text.strip()
 
 
-def pick_top3_highlights(items: list[dict[str, Any]], digest_type: str) -> list[str]:
+# -------------------------
+# Routing: which summarizer an article gets
+# -------------------------
+SUMMARY_TIERS = ("local", "small", "full")
+
+
+def route_summary(item: dict[str, Any], text: str) -> tuple[str, str | None]:
+    """
+    (tier, model) for an extracted article, by length of the full text and
+    importance: "local" (no model; text_reduce.extractive_summary) below
+    SUMMARY_LOCAL_MAX_CHARS, "small" (SUMMARY_SMALL_MODEL) below
+    SUMMARY_FULL_MIN_CHARS, else "full" (MODEL). BREAKING and Top-3
+    candidate articles always get the full model.
+    """
+    if not SUMMARY_ROUTING or item.get("is_breaking") or item.get("top3_candidate"):
+        return "full", MODEL
+    if len(text) < SUMMARY_LOCAL_MAX_CHARS:
+        return "local", None
+    if len(text) < SUMMARY_FULL_MIN_CHARS:
+        return "small", SUMMARY_SMALL_MODEL
+    return "full", MODEL
+
+
+# -------------------------
+# Batch mode: several articles per request
+# -------------------------
+_BATCH_HEADER_RE = re.compile(r"^\s*#{2,}\s*(\d+)\s*$", re.MULTILINE)
+
+
+def pack_batches(
+    articles: list[tuple[str, str]],
+    token_budget: int = SUMMARY_BATCH_TOKENS,
+    max_items: int = SUMMARY_BATCH_MAX_ITEMS,
+) -> list[list[int]]:
+    """Group article indexes so each batch stays under `token_budget` input tokens."""
+    batches: list[list[int]] = []
+    current: list[int] = []
+    used = 0
+    for i, (title, text) in enumerate(articles):
+        cost = estimate_tokens(title) + estimate_tokens(text[:MAX_INPUT_CHARS])
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_summary_prompt(articles: list[tuple[str, str]]) -> str:
+    blocks = "\n\n".join(
+        f"=== STRAIPSNIS {i} ===\nPavadinimas: {title}\n\nStraipsnio tekstas:\n{text[:MAX_INPUT_CHARS]}"
+        for i, (title, text) in enumerate(articles, 1)
+    )
+    return f"""
+    Tu esi profesionalus naujienų redaktorius Lietuvoje.
+
+    Užduotis: pateik kiekvieno iš {len(articles)} straipsnių santrauką lietuvių kalba.
+    Kiekvieną straipsnį apibendrink atskirai.
+    {SUMMARY_RULES}
+    Atsakymo formatas (griežtai): kiekvienam straipsniui eilutė "### <numeris>",
+    po jos to straipsnio santraukos punktai. Nieko daugiau nerašyk.
+
+    {blocks}
+    """.strip()
+
+
+def parse_batch_summaries(output: str, n: int) -> list[str | None]:
+    """Split a batch answer into per-article summaries; None where one is missing or empty."""
+    results: list[str | None] = [None] * n
+    parts = _BATCH_HEADER_RE.split(output)
+    # parts = [preamble, num, body, num, body, ...]
+    for num, body in zip(parts[1::2], parts[2::2]):
+        idx = int(num) - 1
+        body = body.strip()
+        if 0 <= idx < n and body and results[idx] is None:
+            results[idx] = body
+    return results
+
+
+def summarize_batch_lt(articles: list[tuple[str, str]], model: str = MODEL) -> list[str | None]:
+    """
+    One request for several (title, text) articles. Returns one summary per
+    article, or None for articles whose part of the answer could not be parsed
+    (callers fall back to `summarize_lt` for those).
+    """
+    if len(articles) == 1:
+        return [summarize_lt(*articles[0], model=model)]
+    resp = create_response(batch_summary_prompt(articles), model)
+    return parse_batch_summaries(resp.output_text, len(articles))
+
+
+# -------------------------
+# Offline batch job (Batch API): for non-urgent digests
+# -------------------------
+def submit_summary_batch_job(articles: list[tuple[str, str]], model: str = MODEL) -> str:
+    """Upload one /v1/responses request per article as a Batch API job. Returns the batch id."""
+    lines = [
+        json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/responses",
+            "body": {"model": model, "input": summary_prompt(title, text)},
+        }, ensure_ascii=False)
+        for i, (title, text) in enumerate(articles)
+    ]
+    upload = io.BytesIO("\n".join(lines).encode("utf-8"))
+    upload.name = "summaries.jsonl"
+    batch_file = client.files.create(file=upload, purpose="batch")
+    batch = client.batches.create(input_file_id=batch_file.id, endpoint="/v1/responses", completion_window="24h")
+    return batch.id
+
+
+def _response_output_text(body: dict[str, Any]) -> str:
+    parts = [
+        c.get("text", "")
+        for item in body.get("output", [])
+        if item.get("type") == "message"
+        for c in item.get("content", [])
+        if c.get("type") == "output_text"
+    ]
+    return "".join(parts).strip()
+
+
+def poll_summary_batch_job(batch_id: str, n: int) -> list[str | None] | None:
+    """
+    One status check of a batch job, without waiting. None while it is still
+    running; once it has ended, per-article summaries (None for articles it did
+    not answer).
+    """
+    batch = client.batches.retrieve(batch_id)
+    if batch.status not in ("completed", "failed", "expired", "cancelled"):
+        return None
+
+    results: list[str | None] = [None] * n
+    if not batch.output_file_id:
+        return results
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        resp = row.get("response") or {}
+        if resp.get("status_code") == 200:
+            metrics.incr("llm_batch_job_calls")
+            _record_usage((resp.get("body") or {}).get("usage"))
+            idx = int(row["custom_id"])
+            if 0 <= idx < n:
+                results[idx] = _response_output_text(resp.get("body") or {}) or None
+    return results
+
+
+_RERANK_LINE_RE = re.compile(r"^\s*(\d+)[).]?\s*[—–-]\s*(.+)$")
+
+
+def rerank_top3(
+    shortlist: list[dict[str, Any]], digest_type: str, timeout: float = LLM_TIMEOUT_SECONDS
+) -> list[tuple[str, str]]:
     """
-    One extra OpenAI call: select top 3 by importance.
-    Returns 3 bullet strings.
+    Optional LLM re-ranking of the local short list (ranking.shortlist).
+    Returns up to 3 (url, reason) pairs, best first ([] on failure or timeout).
     """
-    if not items:
+    if not shortlist:
         return []
 
-    # Keep it compact
     lines = []
-    for i, it in enumerate(items[:30], 1):
+    for i, it in enumerate(shortlist, 1):
         published = it.get("published_local_str", "")
         topic = it.get("topic", "")
         lines.append(f"{i}) [{topic}] {it['title']} ({published})")
@@ -48,8 +241,8 @@ def pick_top3_highlights(items: list[dict[str, Any]], digest_type: str) -> list[
     Iš pateikto sąrašo parink 3 svarbiausias naujienas.
 
     Taisyklės:
-    - Atsakyk tik 3 eilutėmis.
-    - Kiekviena eilutė: "• <antraštė> — <kodėl svarbu (iki 12 žodžių)>"
+    - Atsakyk tik 3 eilutėmis, svarbiausia pirma.
+    - Kiekviena eilutė: "<numeris iš sąrašo> — <kodėl svarbu (iki 12 žodžių)>"
     - Lietuviškai.
 
     Sąrašas:
@@ -57,10 +250,12 @@ def pick_top3_highlights(items: list[dict[str, Any]], digest_type: str) -> list[
     """.strip()
 
     try:
-        resp = client.responses.create(model=MODEL, input=prompt)
-        out = resp.output_text.strip()
-        bullets = [ln.strip() for ln in out.splitlines() if ln.strip()]
-        return bullets[:3]
+        resp = create_response(prompt, timeout=timeout)
     except Exception:
         return []
-
+    picks: list[tuple[str, str]] = []
+    for ln in resp.output_text.splitlines():
+        m = _RERANK_LINE_RE.match(ln.lstrip("•* "))
+        if m and 1 <= int(m.group(1)) <= len(shortlist):
+            picks.append((shortlist[int(m.group(1)) - 1]["url"], m.group(2).strip()))
+    return picks[:3]
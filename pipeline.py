@@ -0,0 +1,646 @@
+"""
+Staged, concurrent digest pipeline:
+
+    feeds (parallel conditional poll) -> candidates -> plan -> fetch -> extract -> summarize
+
+Planning happens before any article is fetched: all in-window entries are
+de-duplicated across topics and ranked by recency, then only the articles a
+topic still needs (`max_per_topic` minus those already in the article store)
+are scheduled; the rest are kept as spares. An article that fails, is too
+short or turns out to be a near-duplicate is replaced by the next spare of
+its topic while the run is in flight. Each stage runs on its own bounded pool
+and articles flow from one stage to the next as soon as they are ready, so
+network fetches, extraction and LLM calls overlap.
+"""
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import multiprocessing
+import threading
+import time
+from typing import Any, Callable, Iterable, Mapping
+
+from article_store import STORED_STATUSES
+from batch_jobs import BatchJobStore
+from config import (
+    EXTRACT_IN_PROCESSES,
+    EXTRACT_WORKERS,
+    FEED_WORKERS,
+    FETCH_WORKERS,
+    NEAR_DUP_ENABLED,
+    SUMMARY_BATCH_MAX_ITEMS,
+    SUMMARY_BATCH_TOKENS,
+    SUMMARY_HEDGE_BUDGET,
+    SUMMARY_HEDGE_MIN_SAMPLES,
+    SUMMARY_HEDGE_PERCENTILE,
+    SUMMARY_MODE,
+    SUMMARY_WORKERS,
+)
+from dedup import NearDupIndex
+from feed_state import FeedPoll, FeedStateStore
+from metrics import metrics
+from fetcher import MIN_TEXT_CHARS, extract_text, fetch_html
+from openai_helpers import (
+    pack_batches,
+    route_summary,
+    submit_summary_batch_job,
+    summarize_batch_lt,
+    summarize_lt,
+)
+from summary_cache import SummaryCache
+from text_reduce import estimate_tokens, extractive_summary, reduce_text, strip_html
+from time_utils import Deadline, to_local_dt
+
+
+# Outcomes that leave a topic slot empty (not shown as a card of its own)
+BACKFILL_STATUSES = ("fetch_error", "extract_error", "too_short", "duplicate", "summary_error")
+
+FALLBACK_SUMMARY_CHARS = 400
+
+
+def fallback_summary(item: dict[str, Any]) -> str:
+    """Card text when the summary did not make the deadline: the RSS entry's own description."""
+    return strip_html(item.get("description", ""), FALLBACK_SUMMARY_CHARS)
+
+
+@dataclass
+class _Race:
+    """Attempts (original + hedge) racing to summarize one article."""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    left: int = 1
+    settled: bool = False
+
+
+def timed(fn, *args):
+    """Run fn(*args) and return (result, seconds). Module-level so process pools can pickle it."""
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def poll_feeds(
+    topics: dict[str, str], feed_state: FeedStateStore, deadline: Deadline | None = None
+) -> dict[str, FeedPoll]:
+    """
+    Conditionally poll all topic feeds in parallel. Returns {topic: poll} in topic
+    order. Each request's timeout is capped by the `deadline`; a feed still not
+    back when it passes is served from its stored entries.
+    """
+    deadline = deadline or Deadline(None)
+    pool = ThreadPoolExecutor(max_workers=FEED_WORKERS, thread_name_prefix="feeds")
+    futures = {url: pool.submit(feed_state.poll, url, deadline.remaining()) for url in topics.values()}
+    wait(futures.values(), timeout=deadline.remaining())
+    pool.shutdown(wait=False, cancel_futures=True)
+    polls = {}
+    for topic, url in topics.items():
+        f = futures[url]
+        polls[topic] = f.result() if f.done() and not f.cancelled() else feed_state.stored(url)
+    late = [url for url, f in futures.items() if not f.done() or f.cancelled()]
+    if late:
+        metrics.incr("feeds_timed_out", len(late))
+        print(f"⚠️ Deadline reached: {len(late)} feed(s) served from the feed state")
+    return polls
+
+
+def select_candidates(
+    entries_by_topic: dict[str, list[dict[str, Any]]],
+    window_start: datetime,
+    window_end: datetime,
+    max_per_topic: int | None,
+    now_local: datetime,
+    breaking_delta: timedelta,
+) -> list[dict[str, Any]]:
+    """
+    Candidate entries: time-window filter + de-dup across topics (in topic
+    order; later topics carrying the same URL are listed in "cross_topics"),
+    newest first within each topic, at most `max_per_topic` per topic
+    (None = all). Undated entries rank as newest.
+    """
+    seen_urls: dict[str, dict[str, Any]] = {}
+    items: list[dict[str, Any]] = []
+
+    for topic_name, entries in entries_by_topic.items():
+        topic_items: list[dict[str, Any]] = []
+        for e in entries:
+            title = e["title"]
+            url = e["link"]
+            if not url:
+                continue
+
+            # Deduplicate across topics (remember which other topics carry the story)
+            if url in seen_urls:
+                first = seen_urls[url]
+                if topic_name != first["topic"] and topic_name not in first["cross_topics"]:
+                    first["cross_topics"].append(topic_name)
+                continue
+
+            published_local = to_local_dt(e["published_parsed"])
+
+            # Filter by time window if we have dates; if missing, include (conservative)
+            if published_local is not None:
+                if not (window_start <= published_local <= window_end):
+                    continue
+
+            published_str = published_local.strftime("%H:%M") if published_local else ""
+            is_breaking = bool(published_local and (now_local - published_local) <= breaking_delta)
+
+            item = {
+                "topic": topic_name,
+                "title": title,
+                "url": url,
+                "summary": "",
+                "description": e.get("description", ""),
+                "published_local": published_local,
+                "published_local_str": published_str,
+                "is_breaking": is_breaking,
+                "cross_topics": [],
+            }
+            topic_items.append(item)
+            seen_urls[url] = item
+
+        # Stable sort: feed order breaks ties
+        topic_items.sort(key=lambda it: it["published_local"] or now_local, reverse=True)
+        items.extend(topic_items if max_per_topic is None else topic_items[:max_per_topic])
+
+    return items
+
+
+def plan_work(
+    candidates: list[dict[str, Any]],
+    stored: dict[str, dict[str, Any]],
+    max_per_topic: int,
+) -> tuple[list[dict[str, Any]], dict[str, list[dict[str, Any]]]]:
+    """
+    Split ranked `candidates` (select_candidates order) into the articles to
+    process now and per-topic spares for backfill. Articles in `stored` (the
+    article store's rows by URL) fill their slot without any work, except
+    stored near-duplicates, which are never shown on their own.
+    """
+    work: list[dict[str, Any]] = []
+    spares: dict[str, list[dict[str, Any]]] = {}
+    filled: dict[str, int] = {}
+    for it in candidates:
+        topic = it["topic"]
+        row = stored.get(it["url"])
+        if row is not None:
+            if row["status"] != "duplicate":
+                filled[topic] = filled.get(topic, 0) + 1
+            continue
+        if filled.get(topic, 0) < max_per_topic:
+            filled[topic] = filled.get(topic, 0) + 1
+            work.append(it)
+        else:
+            spares.setdefault(topic, []).append(it)
+    return work, spares
+
+
+class DigestPipeline:
+    """
+    Runs fetch -> extract -> summarize for each item on separate bounded pools.
+    Stages are chained with future callbacks, so no worker sits idle waiting
+    on another stage. Extraction is CPU-bound and runs in worker processes
+    (EXTRACT_IN_PROCESSES), so it uses more than one core and never holds the
+    GIL against the I/O stages. If a `cache` is given, it is checked before
+    every LLM call. Text sent to the LLM is first reduced to the input token
+    budget (text_reduce); the cache is keyed on the full extracted text.
+
+    With `near_dup` on, every extracted article is checked against the stories
+    already seen in this run (dedup.NearDupIndex) before any LLM call, and
+    against the stored ones passed to `seed`. A near-duplicate is not
+    summarized: its URL is attached to the representative's item["also"] and it
+    finishes with status "duplicate" (duplicate_of the representative's URL)
+    once the representative is stored. If the representative fails (e.g.
+    summary_error), its first duplicate is summarized instead and becomes the
+    cluster's representative for the others.
+
+    summary_mode:
+      "single"    one LLM request per article
+      "batch"     articles are packed into shared requests under the token budget,
+                  flushed as soon as a batch is full
+      "batch_job" all articles go into one offline Batch API job once extraction
+                  is finished. The job is recorded in `batch_jobs` and its articles
+                  finish with status "submitted" (no summary): a later run collects
+                  the results (BatchJobStore.collect)
+    In batch mode, articles whose summary cannot be parsed back out of the
+    batch answer fall back to a single per-article request.
+
+    Each article is routed by openai_helpers.route_summary before the cache
+    lookup: very short ones get a local extractive summary (no LLM call), the
+    rest the small or the full model (item["summary_tier"], item["summary_model"]);
+    the cache is keyed by the routed model and batches never mix models.
+
+    A single-article request still running past SUMMARY_HEDGE_PERCENTILE of this
+    run's summary latencies is hedged: a duplicate request is sent and the
+    first answer wins (at most SUMMARY_HEDGE_BUDGET of requests). When the
+    `deadline` passes, `run` stops waiting: unfinished articles get their RSS
+    description as summary (status "fallback"); late summaries are only cached.
+
+    Per-stage wall times are recorded in item["timings"] (seconds) and the
+    outcome in item["status"] (summarized, cached, duplicate, submitted, too_short, fallback, *_error).
+    The extracted text is kept in item["text"] for the article store.
+    """
+
+    def __init__(
+        self,
+        fetch_workers: int = FETCH_WORKERS,
+        extract_workers: int = EXTRACT_WORKERS,
+        summary_workers: int = SUMMARY_WORKERS,
+        cache: SummaryCache | None = None,
+        extract_in_processes: bool = EXTRACT_IN_PROCESSES,
+        summary_mode: str = SUMMARY_MODE,
+        near_dup: bool = NEAR_DUP_ENABLED,
+        deadline: Deadline | None = None,
+        batch_jobs: BatchJobStore | None = None,
+    ):
+        if summary_mode == "batch_job" and batch_jobs is None:
+            raise ValueError('summary_mode "batch_job" needs a BatchJobStore')
+        self._cache = cache
+        self._batch_jobs = batch_jobs
+        self._deadline = deadline or Deadline(None)
+        self._near_dup = NearDupIndex() if near_dup else None
+        self._mode = summary_mode
+        self._fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="fetch")
+        self._extract_pool: Executor
+        if extract_in_processes:
+            # spawn: forking a process that already runs fetch/summary threads is unsafe
+            self._extract_pool = ProcessPoolExecutor(
+                max_workers=extract_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._extract_pool = ThreadPoolExecutor(max_workers=extract_workers, thread_name_prefix="extract")
+        self._summary_pool = ThreadPoolExecutor(max_workers=summary_workers, thread_name_prefix="summary")
+
+        # Batch modes: extracted articles waiting for a batch, and how many items
+        # have not yet left the fetch/extract stages (the last one flushes the rest)
+        self._lock = threading.Lock()
+        # (item, full extracted text, reduced LLM input, done)
+        self._pending: list[tuple[dict[str, Any], str, str, Future]] = []
+        self._pending_tokens = 0
+        self._upstream = 0
+
+        # Near-dup clusters: done future per representative of this run (by URL),
+        # and the duplicate promoted in place of a failed representative
+        self._rep_done: dict[str, Future] = {}
+        self._heirs: dict[str, dict[str, Any]] = {}
+
+        # Each item finishes exactly once (a late result after the deadline is dropped)
+        self._finish_lock = threading.Lock()
+        self._settled: set[Future] = set()
+        self._expired = False
+
+        # Hedging: latencies of finished single-article requests
+        self._latencies: list[float] = []
+        self._requests = 0
+        self._hedges = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        # Past the deadline, queued work is dropped and stragglers are not waited for
+        wait = not self._expired
+        self._fetch_pool.shutdown(wait=wait, cancel_futures=not wait)
+        self._extract_pool.shutdown(wait=wait, cancel_futures=not wait)
+        self._summary_pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def seed(self, rows: Iterable[dict[str, Any]], texts: Mapping[str, str]) -> int:
+        """
+        Register already stored articles (article store rows + their extracted
+        text) as near-dup representatives, so a story republished under a new URL
+        is not summarized again. Returns how many were registered.
+        """
+        if self._near_dup is None:
+            return 0
+        n = 0
+        for row in rows:
+            text = texts.get(row["url"])
+            if text and row["status"] != "duplicate":
+                self._near_dup.add(row, text)
+                n += 1
+        return n
+
+    def run(
+        self,
+        items: list[dict[str, Any]],
+        spares: dict[str, list[dict[str, Any]]] | None = None,
+        on_result: Callable[[dict[str, Any]], None] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Fill item["summary"] for every item (in place). Blocks until all are done
+        or the deadline passes. An item that ends with a BACKFILL_STATUSES status
+        is replaced by the next entry of spares[topic], if any. Returns every
+        item processed, backfills included. `on_result(item)` is called as each
+        item finishes (from a worker thread), e.g. to persist it right away.
+        """
+        spares = spares or {}
+        started: list[tuple[dict[str, Any], Future]] = []
+        cond = threading.Condition()
+        outstanding = len(items)
+
+        def start(item: dict[str, Any]) -> None:
+            done = self.submit(item)
+            started.append((item, done))
+            done.add_done_callback(on_done)
+
+        def on_done(f: Future) -> None:
+            nonlocal outstanding
+            item = f.result()
+            if on_result is not None:
+                try:
+                    on_result(item)
+                except Exception as ex:  # must not leave the item outstanding
+                    print(f"⚠️ Saving result failed ({item['url']}): {ex}")
+            replacement = None
+            with cond:
+                if item["status"] in BACKFILL_STATUSES and spares.get(item["topic"]) and not self._expired:
+                    replacement = spares[item["topic"]].pop(0)
+                    outstanding += 1
+            # Submitted before this item leaves upstream, so batches are not flushed early
+            if replacement is not None:
+                metrics.incr("plan_backfilled")
+                start(replacement)
+            with cond:
+                outstanding -= 1
+                cond.notify_all()
+
+        # Hold the upstream count open while submitting, so batches are not flushed early
+        with self._lock:
+            self._upstream += 1
+        for it in items:
+            start(it)
+        self._left_upstream()
+        with cond:
+            finished = cond.wait_for(lambda: outstanding == 0, timeout=self._deadline.remaining())
+        if not finished:
+            self._expire(started)
+        return [item for item, _ in started]
+
+    def _expire(self, started: list[tuple[dict[str, Any], Future]]) -> None:
+        self._expired = True
+        late = [(item, done) for item, done in list(started) if not done.done()]
+        print(f"⚠️ Deadline reached: {len(late)} article(s) use the RSS description")
+        for item, done in late:
+            self._finish(item, fallback_summary(item), done, "fallback")
+
+    def submit(self, item: dict[str, Any]) -> Future:
+        done: Future = Future()
+        item["timings"] = {}
+        with self._lock:
+            self._upstream += 1
+        f = self._fetch_pool.submit(timed, fetch_html, item["url"])
+        f.add_done_callback(lambda f: self._after_fetch(item, f, done))
+        return done
+
+    def _after_fetch(self, item: dict[str, Any], f: Future, done: Future) -> None:
+        try:
+            article_html, item["timings"]["fetch"] = f.result()
+        except Exception as ex:
+            self._finish(item, f"Klaida: {ex}", done, "fetch_error")
+            self._left_upstream()
+            return
+        nf = self._extract_pool.submit(timed, extract_text, article_html)
+        nf.add_done_callback(lambda nf: self._after_extract(item, nf, done))
+
+    def _after_extract(self, item: dict[str, Any], f: Future, done: Future) -> None:
+        try:
+            self._route_extracted(item, f, done)
+        finally:
+            self._left_upstream()
+
+    def _route_extracted(self, item: dict[str, Any], f: Future, done: Future) -> None:
+        # Past the deadline the item already got its fallback, and the cache and pools may be closed
+        if self._expired:
+            return
+        try:
+            text, item["timings"]["extract"] = f.result()
+        except Exception as ex:
+            self._finish(item, f"Klaida: {ex}", done, "extract_error")
+            return
+        if len(text) < MIN_TEXT_CHARS:
+            self._finish(item, "Nepavyko patikimai ištraukti teksto.", done, "too_short")
+            return
+        item["text"] = text
+        if self._near_dup is not None:
+            rep = self._near_dup.find_or_add(item, text)
+            if rep is not None:
+                self._follow(item, text, done, rep)
+                return
+            with self._lock:
+                self._rep_done[item["url"]] = done
+        self._route_summary(item, text, done)
+
+    def _follow(self, item: dict[str, Any], text: str, done: Future, rep: dict[str, Any]) -> None:
+        """Settle a near-duplicate once its representative has (a stored one already has)."""
+        with self._lock:
+            rep_done = self._rep_done.get(rep["url"])
+        if rep_done is None:
+            item["duplicate_of"] = rep["url"]
+            self._finish(item, "", done, "duplicate")
+            return
+        rep_done.add_done_callback(lambda _: self._after_rep(item, text, done, rep))
+
+    def _after_rep(self, item: dict[str, Any], text: str, done: Future, rep: dict[str, Any]) -> None:
+        # A submitted representative is summarized by its batch job
+        if rep["status"] in STORED_STATUSES or rep["status"] == "submitted":
+            item["duplicate_of"] = rep["url"]
+            self._finish(item, "", done, "duplicate")
+            return
+        # The representative is not stored, so the story would vanish with it:
+        # the first duplicate takes its place, later ones follow that one
+        if self._expired:
+            return
+        with self._lock:
+            heir = self._heirs.setdefault(rep["url"], item)
+            if heir is item:
+                self._rep_done[item["url"]] = done
+                # Held like an item still upstream, so a batch is not flushed without it
+                self._upstream += 1
+        if heir is not item:
+            self._follow(item, text, done, heir)
+            return
+        metrics.incr("near_dup_promoted")
+        try:
+            self._route_summary(item, text, done)
+        finally:
+            self._left_upstream()
+
+    def _route_summary(self, item: dict[str, Any], text: str, done: Future) -> None:
+        tier, model = route_summary(item, text)
+        item["summary_tier"] = tier
+        metrics.incr(f"summary_tier_{tier}")
+        if model is None:
+            summary, seconds = timed(extractive_summary, text)
+            item["timings"]["summary"] = seconds
+            metrics.add_time(f"summary_{tier}", seconds)
+            self._finish(item, summary, done, "summarized")
+            return
+        item["summary_model"] = model
+        if self._cache is not None:
+            cached = self._cache.get(item["url"], text, model)
+            if cached is not None:
+                self._finish(item, cached, done, "cached")
+                return
+
+        llm_text = reduce_text(item["title"], text)
+        metrics.incr("reduce_tokens_before", estimate_tokens(text))
+        metrics.incr("reduce_tokens_after", estimate_tokens(llm_text))
+
+        if self._mode == "single":
+            self._summarize_single(item, text, llm_text, done)
+            return
+
+        with self._lock:
+            self._pending.append((item, text, llm_text, done))
+            self._pending_tokens += estimate_tokens(item["title"]) + estimate_tokens(llm_text)
+            full = self._mode == "batch" and (
+                self._pending_tokens >= SUMMARY_BATCH_TOKENS or len(self._pending) >= SUMMARY_BATCH_MAX_ITEMS
+            )
+        if full:
+            self._flush()
+
+    def _left_upstream(self) -> None:
+        with self._lock:
+            self._upstream -= 1
+            last = self._upstream == 0
+        if last:
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._lock:
+            pending, self._pending, self._pending_tokens = self._pending, [], 0
+        if not pending:
+            return
+        # A request (or batch job) serves one model
+        by_model: dict[str, list[tuple[dict[str, Any], str, str, Future]]] = {}
+        for entry in pending:
+            by_model.setdefault(entry[0]["summary_model"], []).append(entry)
+        groups = []
+        for entries in by_model.values():
+            if self._mode == "batch_job":
+                groups.append(entries)
+            else:
+                articles = [(it["title"], llm_text) for it, _, llm_text, _ in entries]
+                groups += [[entries[i] for i in idx] for idx in pack_batches(articles)]
+        for group in groups:
+            self._summary_pool.submit(self._summarize_group, group)
+
+    def _summarize_group(self, group: list[tuple[dict[str, Any], str, str, Future]]) -> None:
+        articles = [(it["title"], llm_text) for it, _, llm_text, _ in group]
+        model = group[0][0]["summary_model"]
+        if self._mode == "batch_job":
+            self._submit_batch_job(group, articles, model)
+            return
+        t0 = time.perf_counter()
+        try:
+            results = summarize_batch_lt(articles, model)
+        except Exception:
+            results = [None] * len(group)
+        elapsed = time.perf_counter() - t0
+        metrics.add_time(f"summary_{group[0][0]['summary_tier']}", elapsed)
+
+        for (item, text, llm_text, done), summary in zip(group, results):
+            item["timings"]["summary"] = elapsed
+            if summary is None:
+                self._summarize_single(item, text, llm_text, done)
+            else:
+                self._complete(item, text, summary, done)
+
+    def _submit_batch_job(
+        self, group: list[tuple[dict[str, Any], str, str, Future]], articles: list[tuple[str, str]], model: str
+    ) -> None:
+        try:
+            batch_id = submit_summary_batch_job(articles, model)
+        except Exception as ex:
+            for item, _, _, done in group:
+                self._finish(item, f"Klaida: {ex}", done, "summary_error")
+            return
+        # Keyed by the full extracted text, like the summary cache the results go into
+        self._batch_jobs.add(batch_id, model, [(item["url"], text) for item, text, _, _ in group])
+        metrics.incr("summary_batch_jobs_submitted")
+        for item, _, _, done in group:
+            self._finish(item, "", done, "submitted")
+
+    def _summarize_single(self, item: dict[str, Any], text: str, llm_text: str, done: Future) -> None:
+        if self._expired:  # the summary pool no longer takes work
+            return
+        self._summary_pool.submit(self._summary_attempt, item, text, llm_text, done, _Race())
+
+    def _summary_attempt(
+        self, item: dict[str, Any], text: str, llm_text: str, done: Future, race: _Race, hedge: bool = False
+    ) -> None:
+        timer = None
+        threshold = None if hedge else self._hedge_threshold()
+        if threshold is not None:
+            timer = threading.Timer(threshold, self._hedge, (item, text, llm_text, done, race))
+            timer.daemon = True
+            timer.start()
+        try:
+            (summary, seconds), error = timed(summarize_lt, item["title"], llm_text, item["summary_model"]), None
+        except Exception as ex:
+            summary, seconds, error = None, 0.0, ex
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        with race.lock:
+            race.left -= 1
+            # A failed attempt waits for the other one, if still running
+            if race.settled or (error is not None and race.left > 0):
+                return
+            race.settled = True
+        if error is not None:
+            self._finish(item, f"Klaida: {error}", done, "summary_error")
+            return
+        with self._lock:
+            self._latencies.append(seconds)
+        metrics.add_time(f"summary_{item['summary_tier']}", seconds)
+        if hedge:
+            metrics.incr("summary_hedge_wins")
+        # A per-article fallback after a batch adds to the batch time
+        item["timings"]["summary"] = item["timings"].get("summary", 0.0) + seconds
+        self._complete(item, text, summary, done)
+
+    def _hedge_threshold(self) -> float | None:
+        """Seconds after which a running request gets hedged, or None (no hedge)."""
+        with self._lock:
+            self._requests += 1
+            if SUMMARY_HEDGE_PERCENTILE <= 0 or len(self._latencies) < SUMMARY_HEDGE_MIN_SAMPLES:
+                return None
+            v = sorted(self._latencies)
+        return v[min(len(v) - 1, int(len(v) * SUMMARY_HEDGE_PERCENTILE / 100))]
+
+    def _hedge(self, item: dict[str, Any], text: str, llm_text: str, done: Future, race: _Race) -> None:
+        # Runs on the timer's own thread, so the duplicate does not queue behind the summary pool
+        with self._lock:
+            if self._expired or self._hedges >= int(self._requests * SUMMARY_HEDGE_BUDGET):
+                return
+            self._hedges += 1
+        with race.lock:
+            if race.settled:
+                return
+            race.left += 1
+        metrics.incr("summary_hedges")
+        self._summary_attempt(item, text, llm_text, done, race, hedge=True)
+
+    def _complete(self, item: dict[str, Any], text: str, summary: str, done: Future) -> None:
+        # A result that missed the deadline is still paid for: cache it for the next run
+        # (SummaryCache.put keeps working after the caller closed it)
+        if self._cache is not None:
+            if self._expired:
+                metrics.incr("summary_cache_late_writes")
+            self._cache.put(item["url"], text, item["summary_model"], summary)
+        self._finish(item, summary, done, "summarized")
+
+    def _finish(self, item: dict[str, Any], summary: str, done: Future, status: str) -> None:
+        with self._finish_lock:
+            if done in self._settled:
+                return
+            self._settled.add(done)
+            item["summary"] = summary
+            item["status"] = status
+        metrics.incr(f"articles_{status}")
+        done.set_result(item)
@@ -0,0 +1,142 @@
+"""
+Local Top-3 ranking (no network call).
+
+Every collected item is scored with vectorized features:
+
+    recency     exp decay with RANK_RECENCY_HALF_LIFE_HOURS
+    breaking    the BREAKING flag
+    coverage    how many near-duplicates and other topics carry the story
+    salience    TF-IDF cosine similarity to the centroid of all items, i.e. how
+                central the story is to everything published in the window
+
+Each feature is scaled to [0, 1] and combined with WEIGHTS. With TOP3_MODE=llm
+a short list from this ranking is re-ranked by the LLM (openai_helpers.rerank_top3),
+started while summaries are still in flight; the local order fills any gaps.
+"""
+
+from datetime import datetime
+import math
+from typing import Any
+
+import numpy as np
+
+from config import RANK_RECENCY_HALF_LIFE_HOURS, TOP3_SHORTLIST
+from text_reduce import content_words, split_sentences, strip_html
+
+FEATURES = ("recency", "breaking", "coverage", "salience")
+WEIGHTS = np.array([1.0, 0.75, 1.0, 1.5])
+
+REASON_WORDS = 12
+
+
+def _item_text(it: dict[str, Any]) -> str:
+    body = it.get("summary") or strip_html(it.get("description", ""))
+    return f"{it['title']} {it['title']} {body}"  # title counted twice: it carries the story
+
+
+def tfidf_salience(docs: list[list[str]]) -> np.ndarray:
+    """
+    Cosine similarity of each document's TF-IDF vector to the mean of all
+    (L2-normalized) vectors. Sparse: only (doc, term) pairs are materialized.
+    """
+    n = len(docs)
+    if n == 0:
+        return np.zeros(0)
+    vocab: dict[str, int] = {}
+    doc_idx: list[int] = []
+    term_idx: list[int] = []
+    for d, words in enumerate(docs):
+        for w in words:
+            doc_idx.append(d)
+            term_idx.append(vocab.setdefault(w, len(vocab)))
+    if not vocab:
+        return np.zeros(n)
+
+    # Collapse repeated (doc, term) pairs into term frequencies
+    pairs = np.array(doc_idx, dtype=np.int64) * len(vocab) + np.array(term_idx, dtype=np.int64)
+    uniq, tf = np.unique(pairs, return_counts=True)
+    d_idx, t_idx = uniq // len(vocab), uniq % len(vocab)
+
+    df = np.bincount(t_idx, minlength=len(vocab))
+    idf = np.log((1 + n) / (1 + df)) + 1.0
+    w = (1.0 + np.log(tf)) * idf[t_idx]
+    norms = np.sqrt(np.bincount(d_idx, weights=w * w, minlength=n))
+    w = w / np.where(norms > 0, norms, 1.0)[d_idx]
+
+    centroid = np.bincount(t_idx, weights=w, minlength=len(vocab)) / n
+    c_norm = np.linalg.norm(centroid)
+    if c_norm == 0:
+        return np.zeros(n)
+    return np.bincount(d_idx, weights=w * centroid[t_idx], minlength=n) / c_norm
+
+
+def feature_matrix(items: list[dict[str, Any]], now_local: datetime) -> np.ndarray:
+    """(len(items), len(FEATURES)) matrix, each column scaled to [0, 1]; items must be non-empty."""
+    published = np.array(
+        [it["published_local"].timestamp() if it.get("published_local") else np.nan for it in items], dtype=float
+    )
+    age_hours = np.clip((now_local.timestamp() - published) / 3600.0, 0.0, None)
+    recency = np.where(np.isnan(age_hours), 1.0, np.exp(-math.log(2) * age_hours / RANK_RECENCY_HALF_LIFE_HOURS))
+    breaking = np.array([1.0 if it.get("is_breaking") else 0.0 for it in items])
+
+    also = np.array([len(it.get("also") or []) for it in items], dtype=float)
+    topics = np.array(
+        [
+            len({it["topic"], *it.get("cross_topics", []), *(a.get("topic") for a in it.get("also") or [])})
+            for it in items
+        ],
+        dtype=float,
+    )
+    coverage = np.log1p(also) + np.log1p(topics - 1)
+
+    salience = tfidf_salience([content_words(_item_text(it)) for it in items])
+
+    m = np.column_stack([recency, breaking, coverage, salience])
+    col_max = m.max(axis=0)
+    return m / np.where(col_max > 0, col_max, 1.0)
+
+
+def rank_items(items: list[dict[str, Any]], now_local: datetime) -> list[int]:
+    """Item indexes, best first (ties keep the input order)."""
+    if not items:
+        return []
+    scores = feature_matrix(items, now_local) @ WEIGHTS
+    return list(np.argsort(-scores, kind="stable"))
+
+
+def shortlist(items: list[dict[str, Any]], now_local: datetime, k: int = TOP3_SHORTLIST) -> list[dict[str, Any]]:
+    return [items[i] for i in rank_items(items, now_local)[:k]]
+
+
+def _reason(it: dict[str, Any]) -> str:
+    """First sentence of the summary (bullets stripped), cut to REASON_WORDS words."""
+    body = it.get("summary") or strip_html(it.get("description", ""))
+    lines = [ln.lstrip("-•* ").strip() for ln in body.splitlines() if ln.strip()]
+    sentences = split_sentences(lines[0]) if lines else []
+    if not sentences:
+        return it["topic"]
+    words = sentences[0].rstrip(".").split()
+    return " ".join(words[:REASON_WORDS]) + ("…" if len(words) > REASON_WORDS else "")
+
+
+def top3_highlights(
+    items: list[dict[str, Any]],
+    now_local: datetime,
+    reranked: list[tuple[str, str]] | None = None,
+) -> list[str]:
+    """
+    Three bullet strings ("• <title> — <why>"). `reranked` is the LLM's
+    [(url, reason), ...] for the short list; its picks come first if they are
+    still in `items`, the local ranking fills the rest.
+    """
+    by_url = {it["url"]: it for it in items}
+    picks: list[tuple[dict[str, Any], str]] = []
+    for url, reason in reranked or []:
+        if url in by_url and all(url != p["url"] for p, _ in picks):
+            picks.append((by_url[url], reason))
+    for i in rank_items(items, now_local):
+        if len(picks) >= 3:
+            break
+        if all(items[i]["url"] != p["url"] for p, _ in picks):
+            picks.append((items[i], _reason(items[i])))
+    return [f"• {it['title']} — {reason}" for it, reason in picks[:3]]
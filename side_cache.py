@@ -0,0 +1,50 @@
+"""
+Small on-disk TTL cache (JSON) for side data that does not need fetching on
+every run, e.g. weather. Each entry carries its own expiry time; expired
+entries are dropped when the cache is saved.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any
+
+from config import SIDE_CACHE_PATH
+
+
+class SideDataCache:
+    def __init__(self, path: str = SIDE_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def get(self, key: str) -> Any | None:
+        """Value stored under `key`, if it has not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry["expires_at"] <= time.time():
+            return None
+        return entry["value"]
+
+    def put(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = {"value": value, "expires_at": time.time() + ttl_seconds}
+
+    def save(self) -> None:
+        dir_name = os.path.dirname(self.path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        now = time.time()
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            self._entries = {k: e for k, e in self._entries.items() if e["expires_at"] > now}
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
@@ -0,0 +1,77 @@
+"""
+Per-recipient topic subscriptions and article limits.
+
+JSON object keyed by recipient email, from the NEWS_SUBSCRIPTIONS env var or
+the SUBSCRIPTIONS_PATH file; "*" sets the default for everyone not listed:
+
+    {
+      "*":          {"max_per_topic": 5},
+      "jonas@x.lt": {"topics": ["Lietuvoje", "Sportas"], "limits": {"Sportas": 3}, "city": "Kaunas"}
+    }
+
+topics          topics to include, in digest order (all when missing)
+limits          max articles for a topic
+max_per_topic   max articles for the other topics (the digest's own cap when missing)
+city            weather city, one of WEATHER_CITIES (the first one when missing)
+
+Subscriptions are hashable: equal ones render to one shared document.
+"""
+
+from dataclasses import dataclass
+import json
+import os
+from typing import Any, Iterable
+
+from config import SUBSCRIPTIONS_PATH, TOPICS
+
+
+@dataclass(frozen=True)
+class Subscription:
+    topics: frozenset[str] | None = None
+    limits: tuple[tuple[str, int], ...] = ()
+    max_per_topic: int | None = None
+    city: str | None = None
+
+    @classmethod
+    def from_json(cls, spec: dict[str, Any]) -> "Subscription":
+        topics = spec.get("topics")
+        if topics is not None:
+            unknown = [t for t in topics if t not in TOPICS]
+            if unknown:
+                print(f"⚠️ Subscriptions: unknown topics ignored: {', '.join(unknown)}")
+            topics = frozenset(t for t in topics if t in TOPICS)
+        limits = tuple(sorted((t, int(n)) for t, n in (spec.get("limits") or {}).items()))
+        max_per_topic = spec.get("max_per_topic")
+        return cls(topics, limits, int(max_per_topic) if max_per_topic is not None else None, spec.get("city"))
+
+    def limits_for(self, topics: Iterable[str]) -> dict[str, int]:
+        """Article cap per topic; topics without one keep the digest's own cap."""
+        explicit = dict(self.limits)
+        caps = {t: explicit.get(t, self.max_per_topic) for t in topics}
+        return {t: n for t, n in caps.items() if n is not None}
+
+
+def _load_raw() -> dict[str, Any]:
+    raw = (os.getenv("NEWS_SUBSCRIPTIONS") or "").strip()
+    if not raw and os.path.exists(SUBSCRIPTIONS_PATH):
+        with open(SUBSCRIPTIONS_PATH, encoding="utf-8") as f:
+            raw = f.read()
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except ValueError as ex:
+        raise RuntimeError(f"Invalid subscriptions JSON: {ex}") from ex
+    if not isinstance(data, dict):
+        raise RuntimeError("Subscriptions must be a JSON object keyed by recipient email.")
+    return data
+
+
+def subscriptions_for(recipients: list[str]) -> dict[str, Subscription]:
+    """Subscription of every recipient (the "*" default, or everything, when not listed)."""
+    data = {k.strip().lower(): v for k, v in _load_raw().items()}
+    default = Subscription.from_json(data["*"]) if "*" in data else Subscription()
+    return {
+        r: Subscription.from_json(data[r.lower()]) if r.lower() in data else default
+        for r in recipients
+    }
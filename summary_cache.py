@@ -0,0 +1,135 @@
+"""
+Persistent on-disk cache for article summaries (SQLite).
+
+Key: (url, sha256 of extracted text, model). A changed article body or a model
+switch is a miss; a retried run or an overlapping window is a hit.
+Eviction: entries older than the TTL are dropped, and the least recently used
+entries go once the table grows past `max_entries`.
+
+After close() lookups miss, but put() still writes (through a short-lived
+connection), so a summary that arrives after its run stopped waiting is kept
+for the next run.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from config import SUMMARY_CACHE_MAX_ENTRIES, SUMMARY_CACHE_PATH, SUMMARY_CACHE_TTL_DAYS
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    def __init__(
+        self,
+        path: str = SUMMARY_CACHE_PATH,
+        ttl_days: float = SUMMARY_CACHE_TTL_DAYS,
+        max_entries: int = SUMMARY_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.path = path
+        self._closed = False
+
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                url TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (url, text_hash, model)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries (accessed_at)")
+        self.evict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._db.close()
+
+    def get(self, url: str, text: str, model: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            if self._closed:
+                return None
+            row = self._db.execute(
+                "SELECT summary, created_at FROM summaries WHERE url = ? AND text_hash = ? AND model = ?",
+                (url, text_hash(text), model),
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE summaries SET accessed_at = ? WHERE url = ? AND text_hash = ? AND model = ?",
+                (now, url, text_hash(text), model),
+            )
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, url: str, text: str, model: str, summary: str) -> None:
+        self.put_hashed(url, text_hash(text), model, summary)
+
+    def put_hashed(self, url: str, digest: str, model: str, summary: str) -> None:
+        """`put` for a caller that kept only the text's hash (text_hash), e.g. a Batch API job."""
+        now = time.time()
+        row = (url, digest, model, summary, now, now)
+        with self._lock:
+            if self._closed:
+                # A straggler: stored, eviction waits for the next run
+                db = sqlite3.connect(self.path)
+                try:
+                    db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?)", row)
+                    db.commit()
+                finally:
+                    db.close()
+                return
+            self._db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?)", row)
+            self._db.commit()
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then LRU entries above `max_entries` (no-op once closed)."""
+        with self._lock:
+            if self._closed:
+                # A straggler's put raced close(): eviction waits for the next run
+                return
+            self._db.execute("DELETE FROM summaries WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self._db.execute(
+                """
+                DELETE FROM summaries WHERE rowid IN (
+                    SELECT rowid FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def stats_line(self) -> str:
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return f"Summary cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Flat modules at the repo root; the local service stand-ins live with the benchmarks
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+# openai_helpers builds the client on import; no test talks to the API
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,43 @@
+import pytest
+
+import batch_jobs
+from batch_jobs import BatchJobStore
+from summary_cache import SummaryCache
+
+ARTICLES = [
+    ("https://www.lrt.lt/naujienos/lietuvoje/1", "Pirmas tekstas"),
+    ("https://www.lrt.lt/naujienos/lietuvoje/2", "Antras tekstas"),
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with SummaryCache(str(tmp_path / "summaries.sqlite3")) as c:
+        yield c
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = BatchJobStore(str(tmp_path / "batch_jobs.json"))
+    s.add("batch_1", "gpt-test", ARTICLES)
+    s.save()
+    return s
+
+
+def test_running_job_stays_pending(store, cache, monkeypatch):
+    monkeypatch.setattr(batch_jobs, "poll_summary_batch_job", lambda batch_id, n: None)
+
+    assert store.collect(cache) == 0
+    assert len(store) == 1
+    assert cache.get(*ARTICLES[0], "gpt-test") is None
+
+
+def test_finished_job_fills_summary_cache(store, cache, monkeypatch):
+    monkeypatch.setattr(batch_jobs, "poll_summary_batch_job", lambda batch_id, n: ["- santrauka", None])
+    # A later run (e.g. the digest send) loads the jobs from disk
+    later = BatchJobStore(store.path)
+
+    assert later.collect(cache) == 1
+    assert len(later) == 0
+    assert cache.get(*ARTICLES[0], "gpt-test") == "- santrauka"
+    assert cache.get(*ARTICLES[1], "gpt-test") is None
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from feed_state import FeedStateStore
+from standins import LrtStandIn
+
+
+@pytest.fixture
+def stand_in():
+    server = LrtStandIn(["Lietuvoje"], 5, window_minutes=60)
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeedStateStore(str(tmp_path / "feed_state.json"), retention_hours=48)
+
+
+def _add_entry(stand_in: LrtStandIn, entry_id: int, published: datetime) -> None:
+    stand_in.items[0].append({"id": entry_id, "title": f"Straipsnis {entry_id}", "published": published})
+
+
+def test_unchanged_feed_is_not_modified(stand_in, store):
+    url = stand_in.topic_feeds()["Lietuvoje"]
+    first = store.poll(url)
+    second = store.poll(url)
+
+    assert len(first.new_entries) == 5
+    assert second.not_modified
+    assert len(second.entries) == 5 and second.new_entries == []
+
+
+def test_backdated_entry_is_reported_once(stand_in, store):
+    url = stand_in.topic_feeds()["Lietuvoje"]
+    store.poll(url)
+    # Published (per its pubDate) before everything already seen, but new to the feed
+    _add_entry(stand_in, 100, datetime.now(timezone.utc) - timedelta(hours=3))
+
+    late = store.poll(url)
+    assert [e["link"] for e in late.new_entries] == [f"{stand_in.base_url}/article/100"]
+    assert len(late.entries) == 6
+
+    _add_entry(stand_in, 101, datetime.now(timezone.utc))
+    assert [e["link"] for e in store.poll(url).new_entries] == [f"{stand_in.base_url}/article/101"]
+
+
+def test_entry_older_than_retention_is_ignored(stand_in, store):
+    url = stand_in.topic_feeds()["Lietuvoje"]
+    store.poll(url)
+    _add_entry(stand_in, 100, datetime.now(timezone.utc) - timedelta(hours=72))
+
+    poll = store.poll(url)
+    assert poll.new_entries == []
+    assert len(poll.entries) == 5
@@ -0,0 +1,45 @@
+from html_builder import DigestFragments
+
+SUMMARY = "\n".join(f"- Svarbi detalė numeris {n}, aprašyta keliais sakiniais apie įvykį." for n in range(4))
+
+
+def _fragments(n: int, max_bytes: int, mode: str = "inline") -> DigestFragments:
+    items = [
+        {"title": f"Straipsnis {i}", "url": f"https://www.lrt.lt/naujienos/lietuvoje/{i}", "summary": SUMMARY, "rank": i}
+        for i in range(n)
+    ]
+    return DigestFragments("2026-10-17", "Rytinė santrauka", "Naujienos", {"Lietuvoje": items}, [], None, mode, max_bytes)
+
+
+def _size(doc: str) -> int:
+    return len(doc.encode("utf-8"))
+
+
+def test_inline_within_budget():
+    fragments = _fragments(3, 90000)
+    doc = fragments.document()
+
+    assert "<style>" not in doc and 'class="s0"' not in doc
+    assert fragments.stats["compacted"] == 0
+
+
+def test_compact_only_when_over_budget():
+    inline = _fragments(20, 0).document()
+    fragments = _fragments(20, _size(inline) - 1)
+    doc = fragments.document()
+
+    assert 'class="s0"' in doc and _size(doc) < _size(inline)
+    assert fragments.compacted == 1 and fragments.shortened == fragments.dropped == 0
+
+
+def test_lowest_ranked_cards_dropped_before_better_ones_shortened():
+    budget = _size(_fragments(20, 0, "compact").document()) * 2 // 3
+    fragments = _fragments(20, budget)
+    doc = fragments.document()
+
+    assert _size(doc) <= budget
+    assert fragments.dropped > 1 and fragments.shortened <= 1
+    shown = [i for i in range(20) if f"/lietuvoje/{i}\"" in doc]
+    assert shown == list(range(len(shown)))
+    # Every shown card but (at most) the last keeps its whole summary
+    assert doc.count("numeris 3") >= len(shown) - 1
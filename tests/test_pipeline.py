@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+import pipeline
+from batch_jobs import BatchJobStore
+
+BODY = " ".join(f"Seimas šiandien svarstė biudžeto projektą numeris {i} ir pataisas." for i in range(40))
+
+
+@pytest.fixture
+def stubbed(monkeypatch):
+    # Every URL serves (nearly) the same story, extracted in order a, b, c; the summary of "A" fails
+    monkeypatch.setattr(pipeline, "fetch_html", lambda url: f"{BODY} {url[-1]}")
+    monkeypatch.setattr(pipeline, "extract_text", lambda html: time.sleep(0.1 * "abc".index(html[-1])) or html)
+    monkeypatch.setattr(pipeline, "summarize_batch_lt", lambda articles, model: [None] * len(articles))
+
+    def summarize(title, text, model):
+        if title == "A":
+            raise RuntimeError("500 Server Error")
+        return f"santrauka {title}"
+
+    monkeypatch.setattr(pipeline, "summarize_lt", summarize)
+
+
+@pytest.mark.parametrize("mode", ["single", "batch"])
+def test_duplicate_replaces_failed_representative(stubbed, mode):
+    items = [{"url": f"https://example.lt/{t.lower()}", "title": t, "topic": "Lietuvoje"} for t in "ABC"]
+    with pipeline.DigestPipeline(extract_in_processes=False, summary_mode=mode, near_dup=True) as p:
+        by_title = {it["title"]: it for it in p.run(items)}
+
+    assert by_title["A"]["status"] == "summary_error"
+    assert by_title["B"]["status"] == "summarized" and by_title["B"]["summary"] == "santrauka B"
+    assert by_title["C"]["status"] == "duplicate" and by_title["C"]["duplicate_of"] == "https://example.lt/b"
+
+
+def test_batch_job_is_submitted_not_awaited(stubbed, monkeypatch, tmp_path):
+    monkeypatch.setattr(pipeline, "submit_summary_batch_job", lambda articles, model: f"batch_{len(articles)}")
+    items = [{"url": "https://example.lt/b", "title": "B", "topic": "Lietuvoje"}]
+    jobs = BatchJobStore(str(tmp_path / "batch_jobs.json"))
+    with pipeline.DigestPipeline(extract_in_processes=False, summary_mode="batch_job", batch_jobs=jobs) as p:
+        (item,) = p.run(items)
+
+    assert item["status"] == "submitted" and item["summary"] == ""
+    assert jobs.pending_urls() == {"https://example.lt/b"}
@@ -0,0 +1,65 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import side_cache
+import weather
+from side_cache import SideDataCache
+from standins import WeatherStandIn
+
+CITIES = {"Vilnius": (54.6872, 25.2797), "Kaunas": (54.8985, 23.9036), "Klaipėda": (55.7033, 21.1443)}
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    server = WeatherStandIn()
+    monkeypatch.setattr(weather, "WEATHER_API_URL", server.url)
+    monkeypatch.setattr(weather, "INCLUDE_WEATHER", True)
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SideDataCache(str(tmp_path / "side_data.json"))
+
+
+def test_all_cities_in_one_request(stand_in, cache):
+    lines = weather.get_weather(CITIES, cache)
+
+    assert stand_in.requests == 1
+    assert stand_in.locations == len(CITIES)
+    assert set(lines) == set(CITIES)
+    assert lines["Kaunas"].startswith("Kaunas: dabar 5.5°C, vėjas 3.5 m/s, šiandien 1.0…7.5°C")
+
+
+def test_cached_within_ttl_then_refetched(stand_in, cache, monkeypatch):
+    first = weather.get_weather(CITIES, cache)
+    # A new run reads the saved cache from disk
+    again = weather.get_weather(CITIES, SideDataCache(cache.path))
+    assert again == first
+    assert stand_in.requests == 1
+
+    expired = time.time() + weather.WEATHER_CACHE_MINUTES * 60 + 1
+    monkeypatch.setattr(side_cache, "time", SimpleNamespace(time=lambda: expired))
+    assert weather.get_weather(CITIES, SideDataCache(cache.path)) == first
+    assert stand_in.requests == 2
+
+
+def test_upstream_failure_yields_no_weather(stand_in, cache):
+    stand_in.fail = True
+
+    assert weather.get_weather(CITIES, cache) == {}
+    assert stand_in.requests == 1
+    # Nothing cached: the next run tries again
+    stand_in.fail = False
+    assert set(weather.get_weather(CITIES, cache)) == set(CITIES)
+    assert stand_in.requests == 2
+
+
+def test_bad_city_entries_are_skipped(capsys):
+    cities = weather.parse_cities("Vilnius:54.6872:25.2797,Kaunas:54.89x:23.9,Klaipėda,:1:2")
+
+    assert cities == {"Vilnius": (54.6872, 25.2797)}
+    assert capsys.readouterr().out.count("skipping") == 3
@@ -0,0 +1,139 @@
+"""
+Pre-LLM input reduction for article text.
+
+Instead of cutting the text at a fixed character count (which can land
+mid-sentence and always spends the full budget on long articles), the text is
+sentence-segmented, boilerplate and repeated paragraphs are dropped, and the
+lead sentences plus the highest-scoring remaining sentences are kept, in their
+original order, up to a token budget.
+"""
+
+import html
+import math
+import re
+from collections import Counter
+
+from config import SUMMARY_INPUT_TOKENS, SUMMARY_LEAD_SENTENCES, SUMMARY_LOCAL_SENTENCES
+
+# Lines that are site furniture rather than article content
+_BOILERPLATE_RE = re.compile(
+    r"^(?:"
+    r"skaityk(?:ite)? (?:daugiau|taip pat)|taip pat skaitykite|susiję straipsniai"
+    r"|sekite (?:lrt|mus)|prenumeruok|naujienlaiškis|dalintis|pasidalink"
+    r"|jei pastebėjote klaidą|reklama|©|lrt\.lt|nuotr\.|foto:|video:"
+    r"|visos teisės saugomos|komentarai"
+    r")",
+    re.IGNORECASE,
+)
+_TAG_RE = re.compile(r"<[^>]+>")
+# Sentence end: . ! ? … followed by whitespace and an upper-case letter / digit / quote
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+(?=[\"„“(]?[A-ZĄČĘĖĮŠŲŪŽ0-9])")
+_WORD_RE = re.compile(r"[a-ząčęėįšųūž0-9]+", re.IGNORECASE)
+
+# Frequent Lithuanian function words; they say nothing about a sentence's content
+_STOPWORDS = {
+    "ir", "kad", "bet", "tai", "yra", "buvo", "bus", "jo", "jos", "jų", "kuris", "kuri",
+    "kurie", "kurios", "su", "iš", "į", "per", "apie", "nuo", "iki", "dėl", "po", "prie",
+    "taip", "pat", "kaip", "jau", "dar", "tik", "ar", "ne", "nėra", "nes", "o", "jis", "ji",
+    "jie", "mes", "jūs", "aš", "tas", "ta", "tie", "tos", "šis", "ši", "šie", "kai",
+    "kur", "kas", "kiek", "be", "bei", "arba", "už", "tarp", "savo", "teigė", "sakė",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for Lithuanian text (~3 chars per token)."""
+    return len(text) // 3 + 1
+
+
+def strip_html(fragment: str, max_chars: int | None = None) -> str:
+    """Plain text of an HTML fragment (e.g. an RSS description), optionally cut at a word boundary."""
+    text = " ".join(html.unescape(_TAG_RE.sub(" ", fragment or "")).split())
+    if max_chars is not None and len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0].rstrip(",;:") + "…"
+    return text
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s.strip()]
+
+
+def clean_paragraphs(text: str) -> list[str]:
+    """Drop boilerplate lines and repeated paragraphs (first occurrence wins)."""
+    seen: set[str] = set()
+    out: list[str] = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line or _BOILERPLATE_RE.match(line):
+            continue
+        key = line.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(line)
+    return out
+
+
+def extractive_summary(text: str, max_sentences: int = SUMMARY_LOCAL_SENTENCES) -> str:
+    """Summary of a short article without the LLM: its lead sentences as bullets."""
+    sentences = [s for p in clean_paragraphs(text) for s in split_sentences(p)]
+    return "\n".join(f"- {s}" for s in sentences[:max_sentences])
+
+
+def content_words(s: str) -> list[str]:
+    return [w for w in (m.lower() for m in _WORD_RE.findall(s)) if len(w) > 2 and w not in _STOPWORDS]
+
+
+def reduce_text(
+    title: str,
+    text: str,
+    token_budget: int = SUMMARY_INPUT_TOKENS,
+    lead_sentences: int = SUMMARY_LEAD_SENTENCES,
+) -> str:
+    """
+    Keep the lead plus the most informative sentences within `token_budget`.
+    Text that already fits (after boilerplate removal) is returned whole.
+    """
+    paragraphs = clean_paragraphs(text)
+    cleaned = "\n".join(paragraphs)
+    if estimate_tokens(cleaned) <= token_budget:
+        return cleaned
+
+    # (paragraph index, sentence)
+    sentences = [(pi, s) for pi, p in enumerate(paragraphs) for s in split_sentences(p)]
+    words = [content_words(s) for _, s in sentences]
+    freq = Counter(w for ws in words for w in set(ws))
+    title_words = set(content_words(title))
+
+    def score(i: int) -> float:
+        ws = words[i]
+        if not ws:
+            return 0.0
+        # Average document frequency of the sentence's words (how central it is),
+        # plus overlap with the title and a small bonus for concrete numbers
+        centrality = sum(freq[w] for w in ws) / len(ws)
+        title_hits = sum(1 for w in set(ws) if w in title_words)
+        has_number = any(w.isdigit() for w in ws)
+        return centrality + 2.0 * title_hits + (1.0 if has_number else 0.0) - 0.5 * math.log1p(i)
+
+    chosen: set[int] = set()
+    used = 0
+    order = list(range(min(lead_sentences, len(sentences))))
+    order += sorted(range(len(order), len(sentences)), key=score, reverse=True)
+    for i in order:
+        cost = estimate_tokens(sentences[i][1])
+        if used + cost > token_budget:
+            continue
+        chosen.add(i)
+        used += cost
+
+    # Rebuild in original order, keeping paragraph breaks
+    out: list[str] = []
+    last_pi = None
+    for i in sorted(chosen):
+        pi, s = sentences[i]
+        if last_pi is not None and pi == last_pi:
+            out[-1] += " " + s
+        else:
+            out.append(s)
+        last_pi = pi
+    return "\n".join(out)
@@ -1,11 +1,20 @@
 from datetime import datetime, timezone, time as dtime
+import os
+import time
 
 from config import LOCAL_TZ
 
 
-def get_digest_type() -> str | None:
-    """Return 'morning' at 07:xx, 'midday' at 12:xx Vilnius time, else None."""
-    now = datetime.now(LOCAL_TZ)
+def get_digest_type(now: datetime | None = None) -> str | None:
+    """
+    Return 'morning' at 07:xx, 'midday' at 12:xx Vilnius time, else None.
+    DIGEST_TYPE env var forces a type (manual runs, benchmarks). `now` (local
+    time) asks for another moment, e.g. the digest due after a lead time.
+    """
+    forced = os.getenv("DIGEST_TYPE", "").strip().lower()
+    if forced:
+        return forced
+    now = now or datetime.now(LOCAL_TZ)
     if now.hour in [7, 8]:
         return "morning"
     if now.hour in [12]:
@@ -15,13 +24,15 @@ def get_digest_type() -> str | None:
     return None
 
 
-def get_time_window_local(digest_type: str) -> tuple[datetime, datetime]:
+def get_time_window_local(digest_type: str, now: datetime | None = None) -> tuple[datetime, datetime]:
     """
     Morning: today 00:00 -> now
     Midday:  today 07:00 -> now  (so it's 'only NEW since morning')
     Evening: today 18:00 -> now  (so it's 'only NEW since midday')
+
+    `now` (local time) replays the window of an earlier digest (backfill.py).
     """
-    now = datetime.now(LOCAL_TZ)
+    now = now or datetime.now(LOCAL_TZ)
     start_of_day = datetime.combine(now.date(), dtime(0, 0), tzinfo=LOCAL_TZ)
     if digest_type == "midday":
         start = datetime.combine(now.date(), dtime(7, 0), tzinfo=LOCAL_TZ)
@@ -58,3 +69,21 @@ def to_local_dt(struct_time_obj) -> datetime | None:
     dt_utc = datetime(*struct_time_obj[:6], tzinfo=timezone.utc)
     return dt_utc.astimezone(LOCAL_TZ)
 
+
+class Deadline:
+    """A point on the monotonic clock; `seconds` of None or <= 0 means no deadline."""
+
+    def __init__(self, seconds: float | None):
+        self.at = time.monotonic() + seconds if seconds and seconds > 0 else None
+
+    def remaining(self) -> float | None:
+        return None if self.at is None else max(0.0, self.at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.at is not None and time.monotonic() >= self.at
+
+    def minus(self, seconds: float) -> "Deadline":
+        """An earlier deadline, e.g. leaving time for the stages that follow."""
+        d = Deadline(None)
+        d.at = None if self.at is None else self.at - seconds
+        return d
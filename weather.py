@@ -1,48 +1,133 @@
+"""
+Weather lines for the digest header (open-meteo), for every city in
+WEATHER_CITIES. Cities not in the side-data cache are fetched together in one
+multi-coordinate request; each location's data is cached on disk for
+WEATHER_CACHE_MINUTES, so frequent digests and per-recipient cities do not add
+API calls.
+"""
+
+from functools import lru_cache
+from typing import Any, Mapping
+
 import requests
 
-from config import INCLUDE_WEATHER
+from config import INCLUDE_WEATHER, WEATHER_API_URL, WEATHER_CACHE_MINUTES, WEATHER_CITIES, WEATHER_TIMEOUT_SECONDS
+from metrics import metrics
+from side_cache import SideDataCache
+
+
+def parse_cities(spec: str) -> dict[str, tuple[float, float]]:
+    """"Vilnius:54.6872:25.2797,Kaunas:54.8985:23.9036" -> {name: (lat, lon)}; bad entries are skipped."""
+    cities: dict[str, tuple[float, float]] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, coords = part.strip().partition(":")
+        lat, _, lon = coords.partition(":")
+        try:
+            if not name:
+                raise ValueError("no name")
+            cities[name] = (float(lat), float(lon))
+        except ValueError:
+            print(f"⚠️ WEATHER_CITIES: skipping {part.strip()!r} (expected Name:lat:lon)")
+    return cities
+
+
+@lru_cache(maxsize=1)
+def configured_cities() -> dict[str, tuple[float, float]]:
+    """WEATHER_CITIES, parsed on first use (a typo there must not break importing the digest)."""
+    return parse_cities(WEATHER_CITIES)
 
 
-def get_vilnius_weather_summary() -> str | None:
+def default_city() -> str | None:
+    """The first configured city: the weather line of recipients without one of their own."""
+    return next(iter(configured_cities()), None)
+
+
+def format_weather(name: str, data: dict[str, Any]) -> str | None:
     """
-    Returns short LT text like: "Vilnius: dabar 2°C, vėjas 4 m/s, šiandien 0…4°C."
-    Graceful failure: returns None if API fails.
+    Short LT text like: "Vilnius: dabar 2°C, vėjas 4 m/s, šiandien 0…4°C."
+    None if the location's data has none of it.
     """
-    if not INCLUDE_WEATHER:
-        return None
-    try:
-        # Vilnius coords
-        lat, lon = 54.6872, 25.2797
-        url = (
-            "https://api.open-meteo.com/v1/forecast"
-            f"?latitude={lat}&longitude={lon}"
-            "&current=temperature_2m,wind_speed_10m"
-            "&daily=temperature_2m_max,temperature_2m_min"
-            "&timezone=Europe%2FVilnius"
-        )
-        r = requests.get(url, timeout=20)
-        r.raise_for_status()
-        data = r.json()
-
-        cur = data.get("current", {})
-        daily = data.get("daily", {})
-        t_now = cur.get("temperature_2m")
-        w_now = cur.get("wind_speed_10m")
-        tmin = (daily.get("temperature_2m_min") or [None])[0]
-        tmax = (daily.get("temperature_2m_max") or [None])[0]
-
-        parts: list[str] = []
-        if t_now is not None:
-            parts.append(f"dabar {t_now}°C")
-        if w_now is not None:
-            parts.append(f"vėjas {w_now} m/s")
-        if tmin is not None and tmax is not None:
-            parts.append(f"šiandien {tmin}…{tmax}°C")
-
-        if not parts:
-            return None
-
-        return "Vilnius: " + ", ".join(parts) + "."
-    except Exception:
+    cur = data.get("current", {})
+    daily = data.get("daily", {})
+    t_now = cur.get("temperature_2m")
+    w_now = cur.get("wind_speed_10m")
+    tmin = (daily.get("temperature_2m_min") or [None])[0]
+    tmax = (daily.get("temperature_2m_max") or [None])[0]
+
+    parts: list[str] = []
+    if t_now is not None:
+        parts.append(f"dabar {t_now}°C")
+    if w_now is not None:
+        parts.append(f"vėjas {w_now} m/s")
+    if tmin is not None and tmax is not None:
+        parts.append(f"šiandien {tmin}…{tmax}°C")
+
+    if not parts:
         return None
 
+    return f"{name}: " + ", ".join(parts) + "."
+
+
+def _cache_key(lat: float, lon: float) -> str:
+    return f"weather:{lat:.4f},{lon:.4f}"
+
+
+def _fetch(coords: list[tuple[float, float]]) -> list[dict[str, Any]]:
+    """One open-meteo request for all `coords`; one data dict per location, in order."""
+    r = requests.get(
+        WEATHER_API_URL,
+        params={
+            "latitude": ",".join(str(lat) for lat, _ in coords),
+            "longitude": ",".join(str(lon) for _, lon in coords),
+            "current": "temperature_2m,wind_speed_10m",
+            "daily": "temperature_2m_max,temperature_2m_min",
+            "timezone": "Europe/Vilnius",
+        },
+        timeout=WEATHER_TIMEOUT_SECONDS,
+    )
+    r.raise_for_status()
+    data = r.json()
+    # A single location comes back as an object, several as a list
+    return data if isinstance(data, list) else [data]
+
+
+def get_weather(
+    cities: Mapping[str, tuple[float, float]] | None = None, cache: SideDataCache | None = None
+) -> dict[str, str]:
+    """
+    Weather line per city (default: WEATHER_CITIES). Graceful failure: cities
+    whose data could not be fetched (API down, bad response) are left out.
+    """
+    if not INCLUDE_WEATHER:
+        return {}
+    if cities is None:
+        cities = configured_cities()
+    if not cities:
+        return {}
+    cache = cache or SideDataCache()
+    data: dict[str, dict[str, Any]] = {}
+    missing: dict[str, tuple[float, float]] = {}
+    for name, (lat, lon) in cities.items():
+        cached = cache.get(_cache_key(lat, lon))
+        if cached is not None:
+            data[name] = cached
+        else:
+            missing[name] = (lat, lon)
+    metrics.incr("weather_cache_hits", len(data))
+
+    if missing:
+        try:
+            fetched = _fetch(list(missing.values()))
+            metrics.incr("weather_requests")
+            for (name, (lat, lon)), loc in zip(missing.items(), fetched):
+                loc = {"current": loc.get("current", {}), "daily": loc.get("daily", {})}
+                data[name] = loc
+                cache.put(_cache_key(lat, lon), loc, WEATHER_CACHE_MINUTES * 60)
+            cache.save()
+        except Exception:
+            pass
+
+    lines = {name: format_weather(name, loc) for name, loc in data.items()}
+    return {name: line for name, line in lines.items() if line}